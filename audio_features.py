@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Audio Features
+Ranks Freesound search candidates by how they actually sound, using small
+low-quality previews instead of full downloads
+
+Features:
+- Previews for all candidates fetched concurrently (one capped GET each)
+- WAV decoded with the standard library, MP3/Ogg through ffmpeg when it is
+  on PATH (FFMPEG_BINARY to point elsewhere)
+- Duration, RMS level, spectral centroid, onset sharpness and leading
+  silence computed for every candidate in one batch: all clips' frames go
+  through a single NumPy FFT
+- Feature vectors cached per sound ID in SQLite, so a re-run decodes nothing
+- Target profiles ("click", "beep", ...) with a distance score; Freesound's
+  own ranking breaks near-ties
+
+NumPy is imported on first use; without it (or without a decoder for a
+preview's format) ranking raises FeatureError and callers keep Freesound's
+order.
+
+Usage:
+    python audio_features.py clip.wav other.mp3 --profile click
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from freesound_cache import default_cache_path
+
+# Bump when feature definitions change; older cached vectors are ignored
+FEATURE_VERSION = 1
+FRAME_SIZE = 1024
+HOP_SIZE = 512
+DECODE_SAMPLE_RATE = 22050      # ffmpeg output rate; WAV keeps its own
+MAX_PREVIEW_BYTES = 512 * 1024
+SILENCE_FLOOR_DB = -60.0
+SILENCE_BELOW_PEAK_DB = 40.0
+DEFAULT_RANK_WORKERS = 6
+RANK_TIE_BREAK = 0.05           # score added per place in Freesound's order
+FFMPEG_TIMEOUT = 30.0
+
+class FeatureError(Exception):
+    """Features could not be computed (missing NumPy/decoder, unreadable audio)"""
+
+@dataclass
+class AudioFeatures:
+    duration: float             # seconds
+    rms_db: float               # whole-clip RMS level, dBFS
+    centroid_hz: float          # energy-weighted mean spectral centroid
+    onset_sharpness: float      # steepest frame-to-frame level rise, dB per 10 ms
+    leading_silence: float      # seconds before the level first nears the peak
+
+    def to_dict(self) -> Dict[str, float]:
+        return {key: round(value, 4) for key, value in asdict(self).items()}
+
+@dataclass
+class TargetProfile:
+    """What a slot should sound like; None leaves a feature unconstrained"""
+    duration: Optional[float] = None
+    rms_db: Optional[float] = None
+    centroid_hz: Optional[float] = None
+    onset_sharpness: Optional[float] = None     # minimum; sharper is never penalized
+    max_leading_silence: float = 0.05
+
+    def distance(self, features: AudioFeatures) -> float:
+        """0 for a perfect match; roughly 1 per octave / 12 dB / doubling off"""
+        score = 0.0
+        if self.duration:
+            score += abs(math.log2(max(features.duration, 0.01) / self.duration))
+        if self.rms_db is not None:
+            score += abs(features.rms_db - self.rms_db) / 12.0
+        if self.centroid_hz:
+            score += abs(math.log2(max(features.centroid_hz, 20.0) / self.centroid_hz))
+        if self.onset_sharpness:
+            score += max(0.0, self.onset_sharpness - features.onset_sharpness) / self.onset_sharpness
+        score += max(0.0, features.leading_silence - self.max_leading_silence) / 0.1
+        return score
+
+PROFILES = {
+    "click": TargetProfile(duration=0.12, centroid_hz=3000, onset_sharpness=20, max_leading_silence=0.02),
+    "beep": TargetProfile(duration=0.3, centroid_hz=1500, onset_sharpness=10, max_leading_silence=0.03),
+    "chime": TargetProfile(duration=1.2, centroid_hz=2000, onset_sharpness=6),
+    "whoosh": TargetProfile(duration=0.5, centroid_hz=2500),
+    "static": TargetProfile(duration=2.0, rms_db=-18, centroid_hz=4000),
+    "hum": TargetProfile(duration=2.5, centroid_hz=250),
+    "boot": TargetProfile(duration=1.5, centroid_hz=1200, onset_sharpness=6, max_leading_silence=0.1),
+}
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise FeatureError("NumPy is required for audio features (pip install numpy)") from None
+    return numpy
+
+def ffmpeg_binary() -> Optional[str]:
+    return shutil.which(os.environ.get("FFMPEG_BINARY", "ffmpeg"))
+
+def decode(data: bytes) -> Tuple[Any, int]:
+    """Mono float32 samples in [-1, 1] and their sample rate
+
+    Truncated input decodes as far as it goes, so a capped preview is fine.
+    """
+    np = _numpy()
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            with wave.open(io.BytesIO(data)) as wav:
+                channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+                raw = wav.readframes(wav.getnframes())
+        except (wave.Error, EOFError) as e:
+            raise FeatureError(f"Unreadable WAV: {e}") from e
+        usable = len(raw) - len(raw) % (width * channels)
+        if width == 1:
+            samples = (np.frombuffer(raw[:usable], np.uint8).astype(np.float32) - 128) / 128
+        elif width == 2:
+            samples = np.frombuffer(raw[:usable], "<i2").astype(np.float32) / 32768
+        elif width == 3:
+            triplets = np.frombuffer(raw[:usable], np.uint8).reshape(-1, 3).astype(np.int32)
+            values = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+            samples = (np.where(values >= 1 << 23, values - (1 << 24), values) / float(1 << 23)).astype(np.float32)
+        elif width == 4:
+            samples = np.frombuffer(raw[:usable], "<i4").astype(np.float32) / 2147483648
+        else:
+            raise FeatureError(f"Unsupported WAV sample width: {width}")
+        return samples.reshape(-1, channels).mean(axis=1), rate
+
+    ffmpeg = ffmpeg_binary()
+    if ffmpeg is None:
+        raise FeatureError("Decoding compressed previews needs ffmpeg on PATH (or FFMPEG_BINARY)")
+    completed = subprocess.run(
+        [ffmpeg, "-v", "error", "-i", "pipe:0", "-f", "f32le", "-ac", "1",
+         "-ar", str(DECODE_SAMPLE_RATE), "pipe:1"],
+        input=data, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    if completed.returncode != 0 and not completed.stdout:
+        raise FeatureError(f"ffmpeg failed: {completed.stderr.decode(errors='replace').strip()[:200]}")
+    return np.frombuffer(completed.stdout, "<f4"), DECODE_SAMPLE_RATE
+
+def extract_features(clips: Sequence[Tuple[Any, int]]) -> List[AudioFeatures]:
+    """Features for (samples, sample_rate) clips, computed as one batch
+
+    Every clip is cut into Hann-windowed frames; the frames of all clips are
+    stacked into one matrix for a single FFT, and per-clip values come from
+    reduceat over each clip's slice of rows.
+    """
+    np = _numpy()
+    if not clips:
+        return []
+    eps = 1e-10
+    framed, rates = [], []
+    for samples, rate in clips:
+        samples = np.asarray(samples, dtype=np.float32)
+        if len(samples) < FRAME_SIZE:
+            samples = np.pad(samples, (0, FRAME_SIZE - len(samples)))
+        framed.append(np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE])
+        rates.append(rate)
+    counts = np.array([len(frames) for frames in framed])
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rates = np.array(rates, dtype=np.float64)
+    frames = np.concatenate(framed)
+
+    # Levels and spectra for every frame of every clip at once
+    level_db = np.maximum(20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) + eps), SILENCE_FLOOR_DB)
+    power = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE).astype(np.float32), axis=1)) ** 2
+    frame_energy = power.sum(axis=1)
+    centroid_bins = power @ np.arange(power.shape[1]) / (frame_energy + eps)
+    centroid_hz = (np.add.reduceat(centroid_bins * frame_energy, offsets)
+                   / (np.add.reduceat(frame_energy, offsets) + eps) * rates / FRAME_SIZE)
+
+    # Steepest rise from the previous frame; a clip's first frame rises from
+    # the silence floor, so a sound that starts at full level counts as sharp
+    rise = np.empty(len(frames))
+    rise[1:] = np.diff(level_db)
+    rise[offsets] = level_db[offsets] - SILENCE_FLOOR_DB
+    onset_sharpness = np.maximum(np.maximum.reduceat(rise, offsets), 0) * rates * 0.01 / HOP_SIZE
+
+    # Leading silence: frames before the first one within reach of the peak
+    peak_db = np.maximum.reduceat(level_db, offsets)
+    threshold = np.repeat(np.maximum(peak_db - SILENCE_BELOW_PEAK_DB, SILENCE_FLOOR_DB), counts)
+    index = np.where(level_db >= threshold, np.arange(len(frames)), len(frames))
+    first_loud = np.minimum.reduceat(index, offsets) - offsets
+
+    features = []
+    for clip, (samples, rate) in enumerate(clips):
+        samples = np.asarray(samples, dtype=np.float32)
+        duration = len(samples) / rate
+        rms = float(np.sqrt(np.mean(samples ** 2))) if len(samples) else 0.0
+        silent = peak_db[clip] <= SILENCE_FLOOR_DB
+        features.append(AudioFeatures(
+            duration=duration,
+            rms_db=20 * math.log10(rms + eps),
+            centroid_hz=float(centroid_hz[clip]),
+            onset_sharpness=float(onset_sharpness[clip]),
+            leading_silence=duration if silent else min(duration, float(first_loud[clip]) * HOP_SIZE / rate),
+        ))
+    return features
+
+def default_feature_cache_path() -> Path:
+    return default_cache_path().parent / "audio_features.sqlite3"
+
+class FeatureCache:
+    """Thread-safe SQLite store of feature vectors by (sound ID, source)"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_feature_cache_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS features (
+                sound_id INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                features TEXT NOT NULL,
+                added_at REAL NOT NULL,
+                PRIMARY KEY (sound_id, source)
+            )
+        """)
+
+    def get_many(self, sound_ids: Sequence[int], source: str) -> Dict[int, AudioFeatures]:
+        if not sound_ids:
+            return {}
+        marks = ",".join("?" * len(sound_ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT sound_id, features FROM features WHERE source = ? AND version = ? "
+                f"AND sound_id IN ({marks})", (source, FEATURE_VERSION, *sound_ids)
+            ).fetchall()
+        return {sound_id: AudioFeatures(**json.loads(data)) for sound_id, data in rows}
+
+    def put_many(self, features: Dict[int, AudioFeatures], source: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?)",
+                [(sound_id, source, FEATURE_VERSION, json.dumps(asdict(value)), now)
+                 for sound_id, value in features.items()]
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM features WHERE version = ?",
+                                     (FEATURE_VERSION,)).fetchone()[0]
+        return {"entries": count, "path": str(self.path)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+def preview_url(sound: Dict[str, Any]) -> Optional[str]:
+    """The smallest preview a sound's metadata offers"""
+    previews = sound.get("previews", {})
+    return previews.get("preview-lq-mp3") or previews.get("preview-hq-mp3")
+
+class CandidateRanker:
+    """Scores search results against a TargetProfile from their previews"""
+
+    def __init__(self, client, cache: Optional[FeatureCache] = None,
+                 workers: int = DEFAULT_RANK_WORKERS, source: str = "preview-lq"):
+        self.client = client
+        self.cache = cache
+        self.source = source
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="freesound-rank")
+
+    def features(self, sounds: Sequence[Dict[str, Any]]) -> Dict[int, Any]:
+        """AudioFeatures per sound ID, or the error message for sounds that failed"""
+        _numpy()
+        ids = [sound["id"] for sound in sounds]
+        results: Dict[int, Any] = dict(self.cache.get_many(ids, self.source)) if self.cache else {}
+        missing = [sound for sound in sounds if sound["id"] not in results]
+        if missing and ffmpeg_binary() is None:
+            # Freesound previews are always MP3/Ogg; don't fetch what can't be decoded
+            raise FeatureError("Decoding compressed previews needs ffmpeg on PATH (or FFMPEG_BINARY)")
+        decoded = list(self._executor.map(self._fetch_and_decode, missing))
+
+        clips = [(sound["id"], clip) for sound, clip in zip(missing, decoded) if not isinstance(clip, str)]
+        computed = dict(zip([sound_id for sound_id, _ in clips],
+                            extract_features([clip for _, clip in clips])))
+        if self.cache and computed:
+            self.cache.put_many(computed, self.source)
+        results.update(computed)
+        results.update({sound["id"]: clip for sound, clip in zip(missing, decoded) if isinstance(clip, str)})
+        return results
+
+    def rank(self, sounds: Sequence[Dict[str, Any]],
+             profile: TargetProfile) -> List[Tuple[float, Dict[str, Any], Any]]:
+        """(score, sound, features or error) best first
+
+        Sounds without features keep their relative order after the rest.
+        """
+        features = self.features(sounds)
+        scored, unscored = [], []
+        for position, sound in enumerate(sounds):
+            value = features.get(sound["id"])
+            if isinstance(value, AudioFeatures):
+                scored.append((profile.distance(value) + RANK_TIE_BREAK * position, sound, value))
+            else:
+                unscored.append((math.inf, sound, value))
+        scored.sort(key=lambda entry: entry[0])
+        return scored + unscored
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _fetch_and_decode(self, sound: Dict[str, Any]):
+        url = preview_url(sound)
+        if not url:
+            return "No preview URL in metadata"
+        try:
+            data, _ = self.client.fetch_range(url, 0, MAX_PREVIEW_BYTES)
+            return decode(data)
+        except FeatureError as e:
+            return str(e)
+        except Exception as e:
+            return f"Preview fetch failed: {e}"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compute audio features and rank local clips")
+    parser.add_argument("files", nargs="+", help="Audio files")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="Rank against this profile")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    clips = [decode(Path(path).read_bytes()) for path in args.files]
+    features = extract_features(clips)
+    elapsed = (time.perf_counter() - start) * 1000
+    rows = list(zip(args.files, features))
+    if args.profile:
+        profile = PROFILES[args.profile]
+        rows.sort(key=lambda row: profile.distance(row[1]))
+    for path, value in rows:
+        score = f"{PROFILES[args.profile].distance(value):6.2f}  " if args.profile else ""
+        print(f"{score}{json.dumps(value.to_dict())}  {path}")
+    print(f"\n{len(rows)} clip(s) in {elapsed:.1f} ms", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
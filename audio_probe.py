@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Audio Probe
+Reads sample rate, channels, bit depth and duration from the first few
+kilobytes of a sound file, fetched with an HTTP Range request
+
+Features:
+- WAV, AIFF, FLAC, MP3 (CBR and Xing/Info VBR) and Ogg Vorbis/Opus headers
+- Skips leading ID3v2 tags, with one extra range request if the tag is large
+- Ogg duration from the last page's granule position (a suffix range)
+- Estimated decoded (PCM) size
+- Requirement checks, so candidates can be rejected before downloading
+
+Usage:
+    python audio_probe.py <file-or-url> [...]
+"""
+
+import json
+import os
+import struct
+import sys
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple
+
+PROBE_BYTES = 16 * 1024
+OGG_TAIL_BYTES = 16 * 1024
+
+class ProbeError(Exception):
+    """The header could not be recognised or is truncated"""
+
+@dataclass
+class AudioInfo:
+    format: str
+    sample_rate: int
+    channels: int
+    bits_per_sample: Optional[int] = None  # None for lossy codecs
+    duration: Optional[float] = None
+    bitrate_kbps: Optional[float] = None
+    file_size: Optional[int] = None
+    codec: Optional[str] = None
+    pre_skip: int = 0  # Opus: decoder delay in 48 kHz samples
+
+    @property
+    def decoded_bytes(self) -> Optional[int]:
+        """PCM size once decoded (16-bit for lossy formats)"""
+        if self.duration is None:
+            return None
+        return int(self.duration * self.sample_rate * self.channels * (self.bits_per_sample or 16) / 8)
+
+    def to_dict(self) -> dict:
+        info = asdict(self)
+        del info["pre_skip"]
+        info["decoded_bytes"] = self.decoded_bytes
+        if info["duration"] is not None:
+            info["duration"] = round(info["duration"], 3)
+        return info
+
+@dataclass
+class AudioRequirements:
+    """Acceptance criteria; zero / None means no constraint"""
+    formats: Optional[List[str]] = None
+    min_sample_rate: int = 0
+    max_channels: int = 0
+    min_bits_per_sample: int = 0
+    max_duration: float = 0.0
+    max_decoded_bytes: int = 0
+
+    def rejection(self, info: AudioInfo) -> Optional[str]:
+        """Why info fails these requirements, or None if it passes"""
+        if self.formats and info.format not in self.formats:
+            return f"format {info.format} not in {', '.join(self.formats)}"
+        if self.min_sample_rate and info.sample_rate < self.min_sample_rate:
+            return f"sample rate {info.sample_rate} Hz < {self.min_sample_rate} Hz"
+        if self.max_channels and info.channels > self.max_channels:
+            return f"{info.channels} channels > {self.max_channels}"
+        if (self.min_bits_per_sample and info.bits_per_sample is not None
+                and info.bits_per_sample < self.min_bits_per_sample):
+            return f"{info.bits_per_sample}-bit < {self.min_bits_per_sample}-bit"
+        if self.max_duration and info.duration is not None and info.duration > self.max_duration:
+            return f"duration {info.duration:.2f}s > {self.max_duration}s"
+        decoded = info.decoded_bytes
+        if self.max_decoded_bytes and decoded is not None and decoded > self.max_decoded_bytes:
+            return f"decoded size {decoded} bytes > {self.max_decoded_bytes}"
+        return None
+
+# ----------------------------------------------------------------------
+# Header parsers
+# ----------------------------------------------------------------------
+
+def id3v2_size(data: bytes) -> int:
+    """Bytes taken by a leading ID3v2 tag (0 if there is none)"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def parse_header(data: bytes, file_size: Optional[int] = None) -> AudioInfo:
+    """Parse the start of a file (any leading ID3v2 tag must be included whole)"""
+    offset = id3v2_size(data)
+    if offset > len(data):
+        raise ProbeError("ID3 tag extends past the probed bytes")
+    return parse_audio(data[offset:], file_size, offset)
+
+def parse_audio(data: bytes, file_size: Optional[int] = None, audio_start: int = 0) -> AudioInfo:
+    """Parse audio data that starts audio_start bytes into the file (after ID3)"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return _parse_wav(data, file_size)
+    if data[:4] == b"FORM" and data[8:12] in (b"AIFF", b"AIFC"):
+        return _parse_aiff(data, file_size)
+    if data[:4] == b"fLaC":
+        return _parse_flac(data, file_size)
+    if data[:4] == b"OggS":
+        return _parse_ogg(data, file_size)
+    return _parse_mp3(data, file_size, audio_start)
+
+def _chunks(data: bytes, start: int, little_endian: bool):
+    fmt = "<4sI" if little_endian else ">4sI"
+    pos = start
+    while pos + 8 <= len(data):
+        chunk_id, size = struct.unpack_from(fmt, data, pos)
+        yield chunk_id, pos + 8, size
+        pos += 8 + size + (size & 1)
+
+def _parse_wav(data: bytes, file_size: Optional[int]) -> AudioInfo:
+    info = None
+    for chunk_id, pos, size in _chunks(data, 12, little_endian=True):
+        if chunk_id == b"fmt " and pos + 16 <= len(data):
+            format_tag, channels, sample_rate, byte_rate, _, bits = struct.unpack_from("<HHIIHH", data, pos)
+            codec = {1: "pcm", 3: "float", 0xFFFE: "extensible"}.get(format_tag, f"0x{format_tag:04x}")
+            info = AudioInfo("wav", sample_rate, channels, bits, codec=codec, file_size=file_size,
+                             bitrate_kbps=byte_rate * 8 / 1000)
+        elif chunk_id == b"data" and info is not None:
+            if info.bitrate_kbps:
+                info.duration = size / (info.bitrate_kbps * 1000 / 8)
+            return info
+    if info is None:
+        raise ProbeError("WAV fmt chunk not found in probed bytes")
+    if file_size and info.bitrate_kbps:
+        # data chunk header lies beyond the probe: assume it runs to the end
+        info.duration = file_size / (info.bitrate_kbps * 1000 / 8)
+    return info
+
+def _extended_to_float(raw: bytes) -> float:
+    """80-bit IEEE 754 extended precision, as used by AIFF sample rates"""
+    exponent = ((raw[0] & 0x7F) << 8) | raw[1]
+    mantissa = int.from_bytes(raw[2:10], "big")
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    value = mantissa * 2.0 ** (exponent - 16383 - 63)
+    return -value if raw[0] & 0x80 else value
+
+def _parse_aiff(data: bytes, file_size: Optional[int]) -> AudioInfo:
+    for chunk_id, pos, size in _chunks(data, 12, little_endian=False):
+        if chunk_id == b"COMM" and pos + 18 <= len(data):
+            channels, frames, bits = struct.unpack_from(">HIH", data, pos)
+            sample_rate = int(_extended_to_float(data[pos + 8:pos + 18]))
+            duration = frames / sample_rate if sample_rate else None
+            return AudioInfo("aiff", sample_rate, channels, bits, duration, file_size=file_size,
+                             bitrate_kbps=sample_rate * channels * bits / 1000)
+    raise ProbeError("AIFF COMM chunk not found in probed bytes")
+
+def _parse_flac(data: bytes, file_size: Optional[int]) -> AudioInfo:
+    if len(data) < 8 + 18 or data[4] & 0x7F != 0:
+        raise ProbeError("FLAC STREAMINFO block missing")
+    packed = int.from_bytes(data[8 + 10:8 + 18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & ((1 << 36) - 1)
+    duration = total_samples / sample_rate if sample_rate and total_samples else None
+    bitrate = file_size * 8 / duration / 1000 if file_size and duration else None
+    return AudioInfo("flac", sample_rate, channels, bits, duration, bitrate, file_size, "flac")
+
+def _parse_ogg(data: bytes, file_size: Optional[int]) -> AudioInfo:
+    if len(data) < 27:
+        raise ProbeError("Truncated Ogg page")
+    segments = data[26]
+    packet = data[27 + segments:]
+    if packet[:7] == b"\x01vorbis" and len(packet) >= 24:
+        channels, sample_rate, _, nominal = struct.unpack_from("<BIiI", packet, 11)
+        bitrate = nominal / 1000 if 0 < nominal < 0xFFFFFFFF else None
+        return AudioInfo("ogg", sample_rate, channels, None, None, bitrate, file_size, "vorbis")
+    if packet[:8] == b"OpusHead" and len(packet) >= 16:
+        channels, pre_skip, input_rate = struct.unpack_from("<BHI", packet, 9)
+        return AudioInfo("ogg", input_rate or 48000, channels, None, None, None, file_size,
+                         "opus", pre_skip)
+    raise ProbeError("Unsupported Ogg codec")
+
+def ogg_duration(info: AudioInfo, tail: bytes) -> Optional[float]:
+    """Duration from the granule position of the last Ogg page in tail"""
+    last = tail.rfind(b"OggS")
+    if last < 0 or last + 14 > len(tail):
+        return None
+    granule = int.from_bytes(tail[last + 6:last + 14], "little")
+    if info.codec == "opus":
+        # Opus granules always count 48 kHz samples
+        return max(0, granule - info.pre_skip) / 48000
+    return granule / info.sample_rate if info.sample_rate else None
+
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+
+def _mp3_frame(data: bytes, pos: int) -> Optional[Tuple[int, int, int, int, int, int]]:
+    """(version, layer, bitrate kbps, sample rate, channels, frame length) at pos"""
+    if pos + 4 > len(data):
+        return None
+    header = int.from_bytes(data[pos:pos + 4], "big")
+    if header >> 21 != 0x7FF:
+        return None
+    version = {0: 25, 2: 2, 3: 1}.get((header >> 19) & 3)
+    layer = {1: 3, 2: 2, 3: 1}.get((header >> 17) & 3)
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    channels = 1 if (header >> 6) & 3 == 3 else 2
+    if layer == 1:
+        length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        length = samples // 8 * bitrate * 1000 // sample_rate + padding
+    return version, layer, bitrate, sample_rate, channels, length
+
+def _parse_mp3(data: bytes, file_size: Optional[int], audio_start: int) -> AudioInfo:
+    # Find a frame whose successor also syncs, to avoid false matches
+    for pos in range(0, max(0, len(data) - 4)):
+        frame = _mp3_frame(data, pos)
+        if frame is None:
+            continue
+        following = pos + frame[5]
+        if following + 4 <= len(data) and _mp3_frame(data, following) is None:
+            continue
+        break
+    else:
+        raise ProbeError("No MPEG audio frame found")
+
+    version, layer, bitrate, sample_rate, channels, _ = frame
+    samples_per_frame = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+    duration = None
+
+    # Xing/Info header (VBR and LAME CBR) carries the frame count
+    side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info") and xing + 12 <= len(data):
+        flags = int.from_bytes(data[xing + 4:xing + 8], "big")
+        if flags & 1:
+            frames = int.from_bytes(data[xing + 8:xing + 12], "big")
+            duration = frames * samples_per_frame / sample_rate
+    if duration is None and file_size:
+        duration = (file_size - audio_start - pos) * 8 / (bitrate * 1000)
+    if duration and file_size:
+        bitrate = (file_size - audio_start - pos) * 8 / duration / 1000
+
+    return AudioInfo("mp3", sample_rate, channels, None, duration, round(bitrate, 1), file_size,
+                     f"mpeg{'2.5' if version == 25 else version} layer {layer}")
+
+# ----------------------------------------------------------------------
+# Remote probing
+# ----------------------------------------------------------------------
+
+def probe_url(client, url: str, timeout: Optional[float] = None) -> AudioInfo:
+    """Probe a remote file with one or two small Range requests"""
+    data, file_size = client.fetch_range(url, 0, PROBE_BYTES, timeout)
+    tag_size = id3v2_size(data)
+    if tag_size + 4 > len(data):
+        # Large ID3 tag (cover art): read the audio header that follows it
+        audio, file_size = client.fetch_range(url, tag_size, PROBE_BYTES, timeout)
+    else:
+        audio = data[tag_size:]
+    info = parse_audio(audio, file_size, tag_size)
+    if info.format == "ogg" and info.duration is None:
+        tail, _ = client.fetch_range(url, -OGG_TAIL_BYTES, OGG_TAIL_BYTES, timeout)
+        info.duration = ogg_duration(info, tail)
+        if info.duration and file_size:
+            info.bitrate_kbps = round(file_size * 8 / info.duration / 1000, 1)
+    return info
+
+def probe_file(path: str) -> AudioInfo:
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        data = f.read(PROBE_BYTES)
+        tag_size = id3v2_size(data)
+        if tag_size + 4 > len(data):
+            f.seek(tag_size)
+            audio = f.read(PROBE_BYTES)
+        else:
+            audio = data[tag_size:]
+        info = parse_audio(audio, size, tag_size)
+        if info.format == "ogg" and info.duration is None:
+            f.seek(max(0, size - OGG_TAIL_BYTES))
+            info.duration = ogg_duration(info, f.read())
+    return info
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    status = 0
+    for target in sys.argv[1:]:
+        try:
+            if target.startswith(("http://", "https://")):
+                from freesound_client import FreesoundClient
+                info = probe_url(FreesoundClient(), target)
+            else:
+                info = probe_file(target)
+            print(json.dumps({"source": target, **info.to_dict()}))
+        except (ProbeError, OSError) as e:
+            print(json.dumps({"source": target, "error": str(e)}))
+            status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
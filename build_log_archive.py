@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Build Log Archive
+Compressed, indexed storage for every Gradle invocation's output
+
+Layout (under .pipeline/logs by default):
+- <build_id>.log.xz    independent xz streams, one per block of log lines
+- <build_id>.idx.json  block offsets, per-task metadata and a trigram
+                       Bloom filter per block
+
+Searching checks each block's Bloom filter first and only seeks to and
+decompresses the blocks that can contain the pattern.
+
+Usage:
+    python build_log_archive.py list
+    python build_log_archive.py search "deprecated" --task lint
+    python build_log_archive.py search -E "took [0-9]{3,}ms" -i
+    python build_log_archive.py show <build_id> --task assembleDebug
+    python build_log_archive.py prune --older-than 90
+"""
+
+import argparse
+import base64
+import json
+import lzma
+import os
+import re
+import sys
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_ARCHIVE_DIR = ".pipeline/logs"
+BLOCK_SIZE = 1024 * 1024          # uncompressed bytes per block
+BLOOM_BITS_PER_TRIGRAM = 10
+BLOOM_HASHES = 6
+
+def _trigrams(data: bytes) -> set:
+    lowered = data.lower()
+    return {lowered[i:i + 3] for i in range(len(lowered) - 2)}
+
+def _bloom_positions(trigram: bytes, size_bits: int) -> Iterator[int]:
+    h1 = zlib.crc32(trigram)
+    h2 = zlib.adler32(trigram) | 1
+    for i in range(BLOOM_HASHES):
+        yield (h1 + i * h2) % size_bits
+
+def _build_bloom(data: bytes) -> Tuple[bytes, int]:
+    trigrams = _trigrams(data)
+    size_bits = max(64, len(trigrams) * BLOOM_BITS_PER_TRIGRAM)
+    bits = bytearray((size_bits + 7) // 8)
+    for trigram in trigrams:
+        for pos in _bloom_positions(trigram, size_bits):
+            bits[pos >> 3] |= 1 << (pos & 7)
+    return bytes(bits), size_bits
+
+def _bloom_may_contain(bits: bytes, size_bits: int, trigrams: set) -> bool:
+    for trigram in trigrams:
+        for pos in _bloom_positions(trigram, size_bits):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+    return True
+
+def _required_literals(pattern: str, regex: bool) -> List[bytes]:
+    """Substrings every match must contain, used to prefilter blocks"""
+    if not regex:
+        return [pattern.encode()]
+    try:
+        from re import _parser as sre_parse
+    except ImportError:
+        import sre_parse
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+
+    # Consecutive top-level literals must appear verbatim in every match
+    literals, current = [], []
+    for op, arg in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(arg))
+            continue
+        if current:
+            literals.append("".join(current))
+        current = []
+    if current:
+        literals.append("".join(current))
+    return [literal.encode() for literal in literals if len(literal) >= 3]
+
+class BuildLogWriter:
+    """Appends task output for one build as indexed, compressed blocks"""
+
+    def __init__(self, archive_dir: Path, build_id: str, metadata: Optional[Dict] = None):
+        self.archive_dir = archive_dir
+        self.build_id = build_id
+        self.log_path = archive_dir / f"{build_id}.log.xz"
+        self.index_path = archive_dir / f"{build_id}.idx.json"
+        self.index = {
+            "build_id": build_id,
+            "started": datetime.now().isoformat(),
+            "metadata": metadata or {},
+            "tasks": [],
+            "blocks": [],
+        }
+        self.uncompressed_bytes = 0
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        self._log = open(self.log_path, "ab")
+
+    def add_task_output(self, task: str, output: bytes, returncode: Optional[int],
+                        duration: float) -> None:
+        """Archive the full output of one invocation"""
+        task_entry = {
+            "task": task,
+            "returncode": returncode,
+            "duration": round(duration, 3),
+            "bytes": len(output),
+            "blocks": [],
+        }
+        line_no = 1
+        for chunk in self._split_blocks(output):
+            bloom, size_bits = _build_bloom(chunk)
+            compressed = lzma.compress(chunk, format=lzma.FORMAT_XZ, preset=6)
+            offset = self._log.tell()
+            self._log.write(compressed)
+            task_entry["blocks"].append(len(self.index["blocks"]))
+            self.index["blocks"].append({
+                "task": task,
+                "offset": offset,
+                "length": len(compressed),
+                "first_line": line_no,
+                "bloom": base64.b64encode(bloom).decode("ascii"),
+                "bloom_bits": size_bits,
+            })
+            line_no += chunk.count(b"\n")
+        self.uncompressed_bytes += len(output)
+        self.index["tasks"].append(task_entry)
+        self._log.flush()
+        self._write_index()
+
+    def close(self) -> None:
+        self.index["finished"] = datetime.now().isoformat()
+        self._write_index()
+        self._log.close()
+
+    def _write_index(self) -> None:
+        self.index["uncompressed_bytes"] = self.uncompressed_bytes
+        self.index["compressed_bytes"] = self._log.tell()
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _split_blocks(output: bytes) -> Iterator[bytes]:
+        """Cut output into blocks of about BLOCK_SIZE on line boundaries"""
+        start = 0
+        while start < len(output):
+            end = start + BLOCK_SIZE
+            if end < len(output):
+                newline = output.rfind(b"\n", start, end)
+                end = newline + 1 if newline >= start else end
+            yield output[start:end]
+            start = end
+
+class LogArchive:
+    """Read side of the archive: listing, searching and pruning builds"""
+
+    def __init__(self, archive_dir: Path = Path(DEFAULT_ARCHIVE_DIR)):
+        self.archive_dir = Path(archive_dir)
+
+    def open_build(self, build_id: str, metadata: Optional[Dict] = None) -> BuildLogWriter:
+        return BuildLogWriter(self.archive_dir, build_id, metadata)
+
+    def builds(self, since: Optional[datetime] = None) -> List[Dict]:
+        """Indexes of all archived builds, oldest first"""
+        indexes = []
+        for index_path in self.archive_dir.glob("*.idx.json"):
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if since and datetime.fromisoformat(index["started"]) < since:
+                continue
+            indexes.append(index)
+        return sorted(indexes, key=lambda index: index["started"])
+
+    def read_block(self, build_id: str, block: Dict) -> bytes:
+        with open(self.archive_dir / f"{build_id}.log.xz", "rb") as f:
+            f.seek(block["offset"])
+            return lzma.decompress(f.read(block["length"]), format=lzma.FORMAT_XZ)
+
+    def search(self, pattern: str, regex: bool = False, ignore_case: bool = False,
+               task: Optional[str] = None, since: Optional[datetime] = None,
+               workers: int = 4) -> Iterator[Tuple[str, str, int, str]]:
+        """Yield (build_id, task, line_no, line) for every matching line"""
+        flags = re.IGNORECASE if ignore_case else 0
+        matcher = re.compile(pattern.encode() if regex else re.escape(pattern.encode()), flags)
+        required = [_trigrams(literal) for literal in _required_literals(pattern, regex)]
+
+        def scan(index: Dict) -> List[Tuple[str, str, int, str]]:
+            matches = []
+            for block in index["blocks"]:
+                if task and block["task"] != task:
+                    continue
+                bits = base64.b64decode(block["bloom"])
+                if not all(_bloom_may_contain(bits, block["bloom_bits"], trigrams)
+                           for trigrams in required):
+                    continue
+                data = self.read_block(index["build_id"], block)
+                for offset, line in enumerate(data.splitlines()):
+                    if matcher.search(line):
+                        matches.append((index["build_id"], block["task"],
+                                        block["first_line"] + offset,
+                                        line.decode(errors="replace")))
+            return matches
+
+        # Only a window of scans runs ahead, in build order, so a consumer
+        # that stops early (--first, --limit) leaves the rest unread
+        indexes = iter(self.builds(since))
+        window: Deque[Future] = deque()
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            window.extend(pool.submit(scan, index) for index in islice(indexes, workers))
+            while window:
+                matches = window.popleft().result()
+                window.extend(pool.submit(scan, index) for index in islice(indexes, 1))
+                yield from matches
+        finally:
+            for future in window:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def task_output(self, build_id: str, task: Optional[str] = None) -> Iterator[Tuple[str, bytes]]:
+        with open(self.archive_dir / f"{build_id}.idx.json") as f:
+            index = json.load(f)
+        for block in index["blocks"]:
+            if task is None or block["task"] == task:
+                yield block["task"], self.read_block(build_id, block)
+
+    def prune(self, older_than_days: int) -> int:
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        removed = 0
+        for index in self.builds():
+            if datetime.fromisoformat(index["started"]) >= cutoff:
+                continue
+            for suffix in (".log.xz", ".idx.json"):
+                path = self.archive_dir / f"{index['build_id']}{suffix}"
+                if path.exists():
+                    path.unlink()
+            removed += 1
+        return removed
+
+def new_build_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Search and manage archived build logs")
+    parser.add_argument("--archive-dir", default=DEFAULT_ARCHIVE_DIR, help="Archive directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List archived builds")
+
+    search_parser = subparsers.add_parser("search", help="Grep across archived builds")
+    search_parser.add_argument("pattern")
+    search_parser.add_argument("-E", "--regex", action="store_true", help="Pattern is a regex")
+    search_parser.add_argument("-i", "--ignore-case", action="store_true")
+    search_parser.add_argument("--task", help="Only search this task's output")
+    search_parser.add_argument("--since", help="Only builds started on/after YYYY-MM-DD")
+    search_parser.add_argument("--first", action="store_true",
+                               help="Stop at the earliest build containing a match")
+    search_parser.add_argument("--limit", type=int, default=0, help="Maximum matches to print")
+
+    show_parser = subparsers.add_parser("show", help="Print a build's archived output")
+    show_parser.add_argument("build_id")
+    show_parser.add_argument("--task", help="Only print this task's output")
+
+    prune_parser = subparsers.add_parser("prune", help="Delete old builds")
+    prune_parser.add_argument("--older-than", type=int, required=True, metavar="DAYS")
+
+    args = parser.parse_args()
+    archive = LogArchive(Path(args.archive_dir))
+
+    if args.command == "list":
+        for index in archive.builds():
+            raw = index.get("uncompressed_bytes", 0)
+            packed = index.get("compressed_bytes", 0)
+            ratio = raw / packed if packed else 0
+            failed = sum(1 for t in index["tasks"] if t["returncode"] not in (0, None))
+            print(f"{index['build_id']}  {index['started'][:19]}  "
+                  f"{len(index['tasks']):3d} tasks  {failed} failed  "
+                  f"{raw / 1024:9.1f} KB -> {packed / 1024:7.1f} KB ({ratio:.1f}x)")
+        return 0
+
+    if args.command == "search":
+        since = datetime.fromisoformat(args.since) if args.since else None
+        search_start = time.time()
+        count = 0
+        first_build = None
+        with closing(archive.search(args.pattern, args.regex, args.ignore_case,
+                                    args.task, since)) as matches:
+            for build_id, task, line_no, line in matches:
+                if args.first and first_build not in (None, build_id):
+                    break
+                first_build = build_id
+                print(f"{build_id}:{task}:{line_no}: {line}")
+                count += 1
+                if args.limit and count >= args.limit:
+                    break
+        print(f"\n{count} match(es) in {time.time() - search_start:.2f}s", file=sys.stderr)
+        return 0 if count else 1
+
+    if args.command == "show":
+        for task, data in archive.task_output(args.build_id, args.task):
+            sys.stdout.write(f"===== {task} =====\n")
+            sys.stdout.write(data.decode(errors="replace"))
+        return 0
+
+    if args.command == "prune":
+        print(f"Removed {archive.prune(args.older_than)} build(s)")
+        return 0
+
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
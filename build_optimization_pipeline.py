@@ -5,42 +5,52 @@ Pip-Boy Application - Build Automation Script
 Version: 5.0 - Wear OS Extension
 """
 
+import argparse
+import ast
 import asyncio
+import hashlib
+import importlib.util
 import json
 import os
+import shutil
 import subprocess
 import sys
 import time
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from enum import Enum
 
-class BuildStage(Enum):
-    VALIDATION = "validation"
-    DEPENDENCY_CHECK = "dependency_check"
-    STATIC_ANALYSIS = "static_analysis"
-    COMPILATION = "compilation"
-    TESTING = "testing"
-    PACKAGING = "packaging"
-    DEPLOYMENT = "deployment"
+from build_log_archive import BuildLogWriter, LogArchive, new_build_id
+from pipeline_definition import PipelineSpec, StageSpec, TaskSpec
 
 class BuildType(Enum):
     DEBUG = "debug"
     RELEASE = "release"
     BENCHMARK = "benchmark"
 
+class FailFastPolicy(Enum):
+    OFF = "off"          # run every task, report all failures at the end
+    DRAIN = "drain"      # stop starting new tasks, let running ones finish
+    CANCEL = "cancel"    # terminate running tasks on the first failure
+
 @dataclass
 class BuildMetrics:
     stage_times: Dict[str, float]
     total_time: float = 0.0
     artifact_count: int = 0
     test_results: Dict[str, int] = None
+    asset_times: Dict[str, float] = None
 
     def __post_init__(self):
         if self.test_results is None:
             self.test_results = {}
+        if self.asset_times is None:
+            self.asset_times = {}
 
 @dataclass
 class BuildConfig:
@@ -50,36 +60,334 @@ class BuildConfig:
     enable_dynamic_features: bool = True
     run_tests: bool = True
     enable_proguard: bool = True
+    create_universal_apk: bool = False
+    fail_fast: FailFastPolicy = FailFastPolicy.CANCEL
+    max_parallel_tasks: Optional[int] = None   # overrides each stage's max_parallel
+    pipeline_file: str = "pipeline.toml"
+    state_dir: str = ".pipeline"
+    build_assets: bool = True
+    ai_assets: bool = False
+    rebuild_assets: bool = False
+    asset_workers: Optional[int] = None
+    archive_logs: bool = True
+    speculative: bool = False
+
+class TaskHistory:
+    """Persistent per-task failure and duration statistics"""
+
+    DEFAULT_DURATION = 60.0
+    DURATION_SMOOTHING = 0.3
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tasks: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                self.tasks = json.load(f).get("tasks", {})
+        except (OSError, ValueError):
+            print(f"⚠️  Ignoring unreadable task history: {self.path}")
+            self.tasks = {}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"tasks": self.tasks}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def failure_rate(self, task: str) -> float:
+        """Laplace-smoothed failure probability, 0.5 for unseen tasks"""
+        entry = self.tasks.get(task, {})
+        return (entry.get("failures", 0) + 1) / (entry.get("runs", 0) + 2)
+
+    def known(self, task: str) -> Optional[Dict]:
+        return self.tasks.get(task)
+
+    def expected_duration(self, task: str) -> float:
+        entry = self.tasks.get(task)
+        if entry:
+            return max(entry["avg_duration"], 0.1)
+        known = [e["avg_duration"] for e in self.tasks.values()]
+        return sorted(known)[len(known) // 2] if known else self.DEFAULT_DURATION
+
+    def record(self, task: str, duration: float, success: bool) -> None:
+        entry = self.tasks.setdefault(task, {"runs": 0, "failures": 0, "avg_duration": duration})
+        entry["runs"] += 1
+        if not success:
+            entry["failures"] += 1
+        entry["avg_duration"] += self.DURATION_SMOOTHING * (duration - entry["avg_duration"])
+        entry["max_duration"] = max(entry.get("max_duration", 0.0), duration)
+        entry["last_run"] = datetime.now().isoformat()
+        entry["last_success"] = success
+
+    def prioritize(self, tasks: List[str]) -> List[str]:
+        """Order tasks so the likeliest failures per second of work run first"""
+        return sorted(tasks, key=lambda t: self.failure_rate(t) / self.expected_duration(t), reverse=True)
+
+@dataclass
+class AssetTarget:
+    """A generated file and the script call that produces it"""
+    output: Path
+    script: Path
+    function: str
+    args: List[Any] = field(default_factory=list)
+    params: Any = None
+
+    def fingerprint(self) -> str:
+        """Hash of the declared inputs: script contents, entry point and parameters"""
+        inputs = {
+            "script": hashlib.sha256(self.script.read_bytes()).hexdigest(),
+            "function": self.function,
+            "params": self.params,
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+class AssetManifest:
+    """Fingerprints of the inputs each generated asset was last built from,
+    and the state of the output that build left behind"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if path.exists():
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                print(f"⚠️  Ignoring unreadable asset manifest: {path}")
+
+    def is_stale(self, key: str, target: AssetTarget, fingerprint: str) -> bool:
+        if not target.output.exists():
+            return True
+        entry = self.entries.get(key)
+        if entry is None:
+            # Pre-existing file we never built: adopt it rather than clobber it
+            self.record(key, fingerprint, 0.0, target.output)
+            return False
+        if self._changed_outside(entry, target.output):
+            # Replaced by hand or synced in since our last build: keep it
+            print(f"   📌 {key}: changed outside the pipeline, keeping it")
+            self.record(key, fingerprint, 0.0, target.output)
+            return False
+        return entry["fingerprint"] != fingerprint
+
+    def record(self, key: str, fingerprint: str, duration: float, output: Path) -> None:
+        stat = output.stat()
+        self.entries[key] = {
+            "fingerprint": fingerprint,
+            "built": datetime.now().isoformat(),
+            "duration": duration,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": hashlib.sha256(output.read_bytes()).hexdigest(),
+        }
+
+    def _changed_outside(self, entry: Dict, output: Path) -> bool:
+        if "sha256" not in entry:
+            # Recorded before outputs were tracked: nothing to compare against
+            return False
+        stat = output.stat()
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return False
+        # Only hash when size or mtime moved; a plain touch is not a change
+        return hashlib.sha256(output.read_bytes()).hexdigest() != entry["sha256"]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def _read_script_table(script: Path, variable: str) -> Any:
+    """Read a module-level dict or list from a generator script without importing it"""
+    tree = ast.parse(script.read_text(encoding="utf-8"))
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        if not any(isinstance(t, ast.Name) and t.id == variable for t in node.targets):
+            continue
+        if isinstance(node.value, ast.Dict):
+            # Values that are not literals (e.g. function references) read as None
+            table = {}
+            for key, value in zip(node.value.keys, node.value.values):
+                try:
+                    table[ast.literal_eval(key)] = ast.literal_eval(value)
+                except ValueError:
+                    table[ast.literal_eval(key)] = None
+            return table
+        return ast.literal_eval(node.value)
+    raise KeyError(f"{variable} not found in {script}")
+
+# Extra Gradle arguments for the lane the current asyncio task runs in
+_gradle_lane: ContextVar[List[str]] = ContextVar("gradle_lane", default=[])
+
+class SpeculativeWorkspace:
+    """Isolated Gradle state for stages that run ahead of validation
+
+    Speculative builds get their own project cache dir and, through an init
+    script, their own build directories, so cancelling them can never leave
+    the real build/ or .gradle/ half-written. Task outputs still land in the
+    shared build cache, which Gradle writes atomically.
+    """
+
+    # Each redirected build directory records the project directory it
+    # stands in for, so commit() promotes outputs whatever the module layout
+    INIT_SCRIPT = """// Generated by build_optimization_pipeline.py for speculative builds
+allprojects {{
+    def lane = project.path == ":" ? "root" : project.path.substring(1).replace(":", "/")
+    def laneDir = new File("{build_root}", lane)
+    laneDir.mkdirs()
+    new File(laneDir, "{marker}").text = project.projectDir.absolutePath
+    layout.buildDirectory.set(laneDir)
+}}
+"""
+    PROJECT_MARKER = ".project-dir"
+
+    def __init__(self, root: Path, project_root: Path):
+        self.root = root
+        self.project_root = project_root
+        self.build_root = root / "build"
+        self.init_script = root / "speculative.init.gradle"
+
+    def prepare(self) -> None:
+        self.discard()
+        self.build_root.mkdir(parents=True)
+        self.init_script.write_text(
+            self.INIT_SCRIPT.format(build_root=self.build_root.resolve().as_posix(),
+                                    marker=self.PROJECT_MARKER)
+        )
+
+    def gradle_args(self) -> List[str]:
+        return [
+            "--project-cache-dir", str((self.root / "gradle").resolve()),
+            "--init-script", str(self.init_script.resolve()),
+        ]
+
+    def commit(self) -> int:
+        """Promote speculative outputs into each module's real build/outputs"""
+        promoted = 0
+        for marker in sorted(self.build_root.rglob(self.PROJECT_MARKER)):
+            outputs = marker.parent / "outputs"
+            if not outputs.exists():
+                continue
+            module_dir = Path(marker.read_text(encoding="utf-8").strip())
+            target = module_dir / "build" / "outputs"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            previous = target.with_name(f"outputs.previous-{os.getpid()}")
+            if target.exists():
+                os.replace(target, previous)
+            os.replace(outputs, target)
+            shutil.rmtree(previous, ignore_errors=True)
+            promoted += 1
+        self.discard()
+        return promoted
+
+    def discard(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+_loaded_scripts: Dict[str, Any] = {}
+
+def _build_asset(script: str, function: str, args: List[Any]) -> float:
+    """Process pool entry point: run one generator call, return its duration"""
+    module = _loaded_scripts.get(script)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(Path(script).stem, script)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded_scripts[script] = module
+
+    asset_start = time.time()
+    if getattr(module, function)(*args) is False:
+        raise RuntimeError(f"{Path(script).name}:{function} reported failure")
+    return time.time() - asset_start
+
+class ResourcePool:
+    """CPU, memory and slot reservations granted in request order
+
+    Requests that don't fit yet wait; smaller requests further back in the
+    queue may start in the meantime (backfilling), so concurrent work is
+    packed into the budget instead of strictly serialized.
+    """
+
+    def __init__(self, capacity: Dict[str, float]):
+        self.capacity = capacity
+        self.used = {resource: 0.0 for resource in capacity}
+        self._waiters: List[tuple] = []
+
+    @asynccontextmanager
+    async def reserve(self, request: Dict[str, float]):
+        # Never ask for more than the pool holds, or the request could never start
+        request = {r: min(amount, self.capacity[r]) for r, amount in request.items()
+                   if r in self.capacity}
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((request, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(request)
+            else:
+                self._waiters = [w for w in self._waiters if w[1] is not future]
+            raise
+        try:
+            yield
+        finally:
+            self._release(request)
+
+    def _release(self, request: Dict[str, float]) -> None:
+        for resource, amount in request.items():
+            self.used[resource] -= amount
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for request, future in list(self._waiters):
+            if future.done():
+                self._waiters.remove((request, future))
+            elif all(self.used[r] + amount <= self.capacity[r] for r, amount in request.items()):
+                for resource, amount in request.items():
+                    self.used[resource] += amount
+                self._waiters.remove((request, future))
+                future.set_result(None)
 
 class BuildOrchestrator:
+    BUILTIN_STAGES = {
+        "validate_project": "_validate_project",
+        "build_assets": "_build_assets",
+        "prepare_deployment": "_prepare_deployment",
+    }
+
     def __init__(self, config: BuildConfig):
         self.config = config
         self.metrics = BuildMetrics({})
         self.start_time = time.time()
+        self.state_dir = Path(config.project_root) / config.state_dir
+        self.pipeline = PipelineSpec.load(Path(config.project_root) / config.pipeline_file)
+        self.host_pool = ResourcePool({
+            "cpus": self.pipeline.host_cpus,
+            "memory_mb": self.pipeline.host_memory_mb,
+        })
+        self.history = TaskHistory(self.state_dir / "task_history.json")
+        self.asset_manifest = AssetManifest(self.state_dir / "assets.json")
+        self.log_writer: Optional[BuildLogWriter] = None
+        if config.archive_logs:
+            self.log_writer = LogArchive(self.state_dir / "logs").open_build(
+                new_build_id(),
+                {"build_type": config.build_type.value, "revision": self._git_revision()}
+            )
 
     async def execute_pipeline(self) -> bool:
         print("🚀 PIP-BOY BUILD OPTIMIZATION PIPELINE")
         print("=" * 50)
 
         try:
-            # Validation Stage
-            await self._execute_stage(BuildStage.VALIDATION, self._validate_project)
-
-            # Dependency Check
-            await self._execute_stage(BuildStage.DEPENDENCY_CHECK, self._check_dependencies)
-
-            # Static Analysis
-            await self._execute_stage(BuildStage.STATIC_ANALYSIS, self._run_static_analysis)
-
-            # Compilation
-            await self._execute_stage(BuildStage.COMPILATION, self._compile_project)
-
-            # Testing
-            if self.config.run_tests:
-                await self._execute_stage(BuildStage.TESTING, self._run_tests)
-
-            # Packaging
-            await self._execute_stage(BuildStage.PACKAGING, self._package_artifacts)
+            await self._run_stages()
 
             return self._generate_report()
 
@@ -87,20 +395,151 @@ class BuildOrchestrator:
             print(f"❌ BUILD FAILED: {e}")
             return False
 
-    async def _execute_stage(self, stage: BuildStage, stage_function) -> None:
-        print(f"\n📋 STAGE: {stage.value.upper()}")
+        finally:
+            self.history.save()
+            self.asset_manifest.save()
+            if self.log_writer:
+                self.log_writer.close()
+                print(f"🗄️  Logs archived as build {self.log_writer.build_id}")
+
+    async def _execute_stage(self, stage: str, stage_function, label: str = "") -> None:
+        print(f"\n📋 STAGE: {stage.upper()}{label}")
         print("-" * 30)
 
         stage_start = time.time()
         try:
             await stage_function()
             stage_time = time.time() - stage_start
-            self.metrics.stage_times[stage.value] = stage_time
-            print(f"✅ {stage.value} completed in {stage_time:.2f}s")
+            self.metrics.stage_times[stage] = stage_time
+            print(f"✅ {stage}{label} completed in {stage_time:.2f}s")
         except Exception as e:
-            print(f"❌ {stage.value} failed: {e}")
+            print(f"❌ {stage}{label} failed: {e}")
+            raise
+
+    async def _run_stages(self) -> None:
+        """Run the pipeline's stage graph, starting each stage once its dependencies finish
+
+        With --speculative, the pipeline's speculative stages ignore their
+        dependencies on validation stages and run in an isolated workspace.
+        Their outputs are promoted only if every stage succeeds; a failed
+        validation cancels them, and a failed speculation re-queues them to
+        run normally.
+        """
+        spec = self.pipeline
+        active = [stage for stage in spec.stages if self._condition_met(stage.when)]
+        done = {stage.name for stage in spec.stages} - {stage.name for stage in active}
+
+        speculative = set(spec.speculative_stages) if self.config.speculative else set()
+        downstream = spec.downstream_of(set(spec.validation_stages))
+        workspace = None
+        if speculative:
+            workspace = SpeculativeWorkspace(self.state_dir / "speculative", Path(self.config.project_root))
+            workspace.prepare()
+
+        def dependencies(stage: StageSpec, speculate: bool) -> set:
+            ancestors = spec.ancestors(stage.name)
+            if speculate:
+                return {name for name in ancestors if name not in downstream or name in speculative}
+            return ancestors
+
+        pending = list(active)
+        running: Dict[asyncio.Task, tuple] = {}
+        try:
+            while pending or running:
+                for stage in list(pending):
+                    speculate = stage.name in speculative
+                    if dependencies(stage, speculate) <= done:
+                        pending.remove(stage)
+                        lane = workspace if speculate else None
+                        running[asyncio.create_task(self._run_stage(stage, lane))] = (stage, speculate)
+
+                if not running:
+                    raise RuntimeError("Pipeline stalled: unmet stage dependencies")
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in finished:
+                    if task not in running:
+                        continue  # cancelled by a failed speculation above
+                    stage, speculated = running.pop(task)
+                    try:
+                        task.result()
+                    except Exception as e:
+                        if not speculated:
+                            raise
+                        print(f"⚠️  Speculation failed ({e}), re-running speculative stages normally")
+                        await self._cancel_stages(t for t, (_, s) in running.items() if s)
+                        running = {t: v for t, v in running.items() if not v[1]}
+                        pending.extend(s for s in active if s.name in speculative
+                                       and s not in pending and s is not stage)
+                        pending.append(stage)
+                        pending.sort(key=active.index)
+                        done -= speculative
+                        speculative = set()
+                        workspace.discard()
+                        workspace = None
+                        continue
+                    done.add(stage.name)
+        except BaseException:
+            if running:
+                print("🛑 Cancelling running stages")
+                await self._cancel_stages(running)
+            if workspace:
+                workspace.discard()
             raise
 
+        if workspace:
+            promoted = workspace.commit()
+            print(f"✅ Committed speculative outputs for {promoted} module(s)")
+
+    async def _cancel_stages(self, tasks) -> None:
+        tasks = list(tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_stage(self, stage: StageSpec, workspace: Optional[SpeculativeWorkspace]) -> None:
+        if workspace:
+            _gradle_lane.set(workspace.gradle_args())
+
+        async def run() -> None:
+            if stage.description:
+                print(stage.description)
+            if stage.builtin:
+                await getattr(self, self.BUILTIN_STAGES[stage.builtin])()
+            tasks = [task for task in stage.tasks if self._condition_met(task.when)]
+            if tasks:
+                await self._run_task_batch(stage, tasks)
+
+        await self._execute_stage(stage.name, run, " (speculative)" if workspace else "")
+
+    def _condition_met(self, conditions: List[str]) -> bool:
+        """Evaluate a stage or task `when` list; all conditions must hold"""
+        flags = {
+            "wear_os": self.config.enable_wear_os,
+            "dynamic_features": self.config.enable_dynamic_features,
+            "tests": self.config.run_tests,
+            "assets": self.config.build_assets,
+            "universal_apk": self.config.create_universal_apk,
+            "release": self.config.build_type == BuildType.RELEASE,
+            "debug": self.config.build_type != BuildType.RELEASE,
+        }
+        for condition in conditions:
+            negate = condition.startswith("!")
+            name = condition.lstrip("!")
+            if name.startswith("exists:"):
+                value = (Path(self.config.project_root) / name[len("exists:"):]).exists()
+            elif name in flags:
+                value = flags[name]
+            else:
+                raise ValueError(f"Unknown pipeline condition: {condition}")
+            if value == negate:
+                return False
+        return True
+
+    @property
+    def variant(self) -> str:
+        return "Release" if self.config.build_type == BuildType.RELEASE else "Debug"
+
     async def _validate_project(self) -> None:
         """Validate project structure and configuration"""
         print("🔍 Validating project structure...")
@@ -130,109 +569,83 @@ class BuildOrchestrator:
 
         print("✅ Project validation completed")
 
-    async def _check_dependencies(self) -> None:
-        """Check and resolve dependencies"""
-        print("📦 Checking dependencies...")
-
-        # Run Gradle dependency check
-        await self._run_gradle_task("dependencies", "--refresh-dependencies")
-
-        # Verify Wear OS dependencies if enabled
-        if self.config.enable_wear_os:
-            await self._run_gradle_task(":wear:dependencies")
-
-        # Verify dynamic feature dependencies if enabled
-        if self.config.enable_dynamic_features:
-            await self._run_gradle_task(":dynamic-feature-inventory:dependencies")
-
-        print("✅ Dependency check completed")
-
-    async def _run_static_analysis(self) -> None:
-        """Run static analysis tools"""
-        print("🔍 Running static analysis...")
-
-        # Check for Android Lint
-        await self._run_gradle_task("lint", "lintDebug")
-
-        # Check for Detekt (Kotlin static analysis)
-        if os.path.exists("detekt.yml"):
-            await self._run_command("./gradlew", "detekt")
-
-        # Check for SpotBugs
-        if os.path.exists("spotbugs.gradle"):
-            await self._run_gradle_task("spotbugsDebug")
-
-        print("✅ Static analysis completed")
-
-    async def _compile_project(self) -> None:
-        """Compile the project"""
-        print("🔨 Compiling project...")
-
-        tasks = ["compileDebugKotlin", "compileDebugJavaWithJavac"]
-
-        if self.config.enable_wear_os:
-            tasks.extend([
-                ":wear:compileDebugKotlin",
-                ":wear:compileDebugJavaWithJavac"
-            ])
-
-        if self.config.enable_dynamic_features:
-            tasks.extend([
-                ":dynamic-feature-inventory:compileDebugKotlin",
-                ":dynamic-feature-inventory:compileDebugJavaWithJavac"
-            ])
-
-        for task in tasks:
-            await self._run_gradle_task(task)
-
-        print("✅ Compilation completed")
-
-    async def _run_tests(self) -> None:
-        """Run all tests"""
-        print("🧪 Running tests...")
-
-        # Unit tests
-        await self._run_gradle_task("testDebugUnitTest")
-
-        # Instrumentation tests
-        await self._run_gradle_task("connectedDebugAndroidTest")
-
-        # Wear OS tests if enabled
-        if self.config.enable_wear_os:
-            await self._run_gradle_task(":wear:connectedDebugAndroidTest")
-
-        print("✅ Testing completed")
-
-    async def _package_artifacts(self) -> None:
-        """Package build artifacts"""
-        print("📦 Packaging artifacts...")
-
-        # Build base APK
-        build_task = "assembleDebug"
-        if self.config.build_type == BuildType.RELEASE:
-            build_task = "assembleRelease"
-
-        await self._run_gradle_task(build_task)
-
-        # Build Wear OS APK if enabled
-        if self.config.enable_wear_os:
-            wear_task = ":wear:assembleDebug"
-            if self.config.build_type == BuildType.RELEASE:
-                wear_task = ":wear:assembleRelease"
-            await self._run_gradle_task(wear_task)
-
-        # Build dynamic features if enabled
-        if self.config.enable_dynamic_features:
-            df_task = ":dynamic-feature-inventory:assembleDebug"
-            if self.config.build_type == BuildType.RELEASE:
-                df_task = ":dynamic-feature-inventory:assembleRelease"
-            await self._run_gradle_task(df_task)
-
-        # Create universal APK if requested
-        if self.config.create_universal_apk:
-            await self._run_gradle_task("bundleDebug")
-
-        print("✅ Packaging completed")
+    def _asset_targets(self) -> List[AssetTarget]:
+        """Declare every generated asset with the script call that produces it"""
+        root = Path(self.config.project_root)
+        scripts = root / "scripts"
+        raw_dir = root / "src" / "main" / "res" / "raw"
+        images_dir = root / "docs" / "images"
+        targets = []
+
+        sound_script = scripts / "generate_placeholder_sounds.py"
+        sound_names = list(_read_script_table(sound_script, "SOUND_GENERATORS"))
+        sound_names += _read_script_table(sound_script, "MINIMAL_SOUNDS")
+        for name in sound_names:
+            targets.append(AssetTarget(
+                output=raw_dir / f"{name}.wav",
+                script=sound_script,
+                function="generate_sound",
+                args=[str(raw_dir), name],
+                params=name
+            ))
+
+        if self.config.ai_assets:
+            image_script = scripts / "generate_images_simple.py"
+            function = "build_image"
+        else:
+            image_script = scripts / "create_placeholder_images.py"
+            function = "create_placeholder"
+        for name, params in _read_script_table(image_script, "IMAGES").items():
+            targets.append(AssetTarget(
+                output=images_dir / f"{name}.png",
+                script=image_script,
+                function=function,
+                args=[name, params],
+                params=params
+            ))
+
+        return targets
+
+    async def _build_assets(self) -> None:
+        """Regenerate stale sound and image assets in a process pool"""
+        print("🎨 Checking generated assets...")
+
+        root = Path(self.config.project_root).resolve()
+        stale = []
+        for target in self._asset_targets():
+            key = str(target.output.resolve().relative_to(root))
+            fingerprint = target.fingerprint()
+            if self.config.rebuild_assets or self.asset_manifest.is_stale(key, target, fingerprint):
+                stale.append((key, fingerprint, target))
+
+        if not stale:
+            print("✅ All assets up to date")
+            return
+
+        print(f"🔨 Rebuilding {len(stale)} stale asset(s)...")
+        loop = asyncio.get_running_loop()
+        failures = []
+
+        with ProcessPoolExecutor(max_workers=self.config.asset_workers) as pool:
+            async def build(key: str, fingerprint: str, target: AssetTarget) -> None:
+                try:
+                    duration = await loop.run_in_executor(
+                        pool, _build_asset, str(target.script), target.function, target.args
+                    )
+                except Exception as e:
+                    print(f"   ❌ {key}: {e}")
+                    failures.append(key)
+                    return
+                self.asset_manifest.record(key, fingerprint, duration, target.output)
+                self.metrics.asset_times[key] = duration
+                print(f"   ✓ {key}: {duration:.2f}s")
+
+            await asyncio.gather(*(build(*item) for item in stale))
+
+        if failures:
+            raise RuntimeError(f"Asset generation failed: {', '.join(failures)}")
+
+        print("✅ Asset generation completed")
 
     async def _prepare_deployment(self) -> None:
         """Prepare for deployment"""
@@ -247,46 +660,199 @@ class BuildOrchestrator:
 
         print("✅ Deployment preparation completed")
 
-    async def _run_gradle_task(self, *tasks: str) -> None:
+    async def _run_task_batch(self, stage: StageSpec, tasks: List[TaskSpec]) -> None:
+        """Run a stage's independent tasks, likeliest failures first, within its budgets"""
+        by_key = {task.key(self.variant): task for task in tasks}
+        ordered = self.history.prioritize(list(by_key))
+        policy = self.config.fail_fast
+        stage_pool = ResourcePool({
+            "cpus": stage.budget_cpus or self.pipeline.host_cpus,
+            "memory_mb": stage.budget_memory_mb or self.pipeline.host_memory_mb,
+            "tasks": max(1, self.config.max_parallel_tasks or stage.max_parallel),
+        })
+        failures: List[str] = []
+        running: List[asyncio.Task] = []
+
+        async def run(key: str) -> None:
+            task = by_key[key]
+            request = {"cpus": task.cpus, "memory_mb": task.memory_mb, "tasks": 1}
+            async with stage_pool.reserve(request), self.host_pool.reserve(request):
+                if failures and policy != FailFastPolicy.OFF:
+                    print(f"⏭️  Skipped after earlier failure: {key}")
+                    return
+                try:
+                    await self._run_task(task)
+                except RuntimeError:
+                    failures.append(key)
+                    if policy == FailFastPolicy.CANCEL:
+                        for other in running:
+                            if other is not asyncio.current_task():
+                                other.cancel()
+
+        running.extend(asyncio.create_task(run(key)) for key in ordered)
+        results = await asyncio.gather(*running, return_exceptions=True)
+
+        if failures:
+            raise RuntimeError(f"Task(s) failed: {', '.join(failures)}")
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    async def _run_task(self, task: TaskSpec) -> None:
+        """Run one task with its adaptive timeout and retry policy"""
+        args = task.resolved_args(self.variant)
+        key = " ".join(args)
+        known = self.history.known(key)
+        timeout = task.timeout.resolve(
+            known["avg_duration"] if known else None,
+            known.get("max_duration") if known else None
+        )
+
+        for attempt in range(task.retry.retries + 1):
+            try:
+                if task.kind == "command":
+                    await self._run_command(*args, timeout=timeout)
+                else:
+                    await self._run_gradle_task(*args, timeout=timeout)
+                return
+            except RuntimeError as e:
+                if attempt < task.retry.retries:
+                    delay = task.retry.delay(attempt)
+                    print(f"🔁 Retrying {key} in {delay:.0f}s "
+                          f"(attempt {attempt + 2}/{task.retry.retries + 1})")
+                    await asyncio.sleep(delay)
+                elif task.allow_failure:
+                    print(f"⚠️  Ignoring failure: {e}")
+                    return
+                else:
+                    raise
+
+    async def _run_gradle_task(self, *tasks: str, timeout: float = 300) -> None:
         """Run Gradle task(s)"""
-        cmd = ["./gradlew"] + list(tasks)
+        lane_args = _gradle_lane.get()
+        cmd = ["./gradlew"] + lane_args + list(tasks)
+        key = " ".join(tasks)
+        label = f"{key} [speculative]" if lane_args else key
+        task_start = time.time()
 
         try:
-            result = subprocess.run(
-                cmd,
-                cwd=self.config.project_root,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
-
-            if result.returncode != 0:
-                print(f"Gradle task failed: {' '.join(tasks)}")
-                print(f"Error: {result.stderr}")
-                raise RuntimeError(f"Gradle task failed: {' '.join(tasks)}")
-
-        except subprocess.TimeoutExpired:
-            raise RuntimeError(f"Gradle task timed out: {' '.join(tasks)}")
+            returncode, stdout, stderr, timed_out = await self._run_process(cmd, label, timeout, task_start)
         except FileNotFoundError:
             raise RuntimeError("Gradle wrapper not found. Please ensure ./gradlew exists")
 
-    async def _run_command(self, *cmd: str) -> None:
-        """Run arbitrary command"""
+        if timed_out:
+            self.history.record(key, time.time() - task_start, success=False)
+            self._archive_output(label, stdout, stderr, returncode, task_start)
+            raise RuntimeError(f"Gradle task timed out: {label}")
+
+        success = returncode == 0
+        self.history.record(key, time.time() - task_start, success)
+        self._archive_output(label, stdout, stderr, returncode, task_start)
+
+        if not success:
+            print(f"Gradle task failed: {label}")
+            print(f"Error: {stderr.decode(errors='replace')}")
+            raise RuntimeError(f"Gradle task failed: {label}")
+
+    async def _run_process(self, cmd: List[str], label: str, timeout: float,
+                           task_start: float) -> Tuple[Optional[int], bytearray, bytearray, bool]:
+        """Run a child process without blocking the event loop
+
+        Returns (returncode, stdout, stderr, timed_out); a timed-out process
+        is terminated first. Output is collected incrementally so timed-out
+        and cancelled runs keep their logs; on cancellation the process is
+        terminated, its partial output archived, and CancelledError re-raised.
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=self.config.project_root,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = bytearray(), bytearray()
+
+        async def drain(stream: asyncio.StreamReader, buffer: bytearray) -> None:
+            while chunk := await stream.read(65536):
+                buffer.extend(chunk)
+
+        collect = asyncio.ensure_future(asyncio.gather(
+            drain(process.stdout, stdout), drain(process.stderr, stderr), process.wait()
+        ))
+        try:
+            await asyncio.wait({collect}, timeout=timeout)
+        except asyncio.CancelledError:
+            await self._terminate_process(process, collect)
+            self._archive_output(label, stdout, stderr, process.returncode, task_start)
+            print(f"🛑 Cancelled: {label}")
+            raise
+
+        timed_out = not collect.done()
+        if timed_out:
+            await self._terminate_process(process, collect)
+        return process.returncode, stdout, stderr, timed_out
+
+    def _archive_output(self, key: str, stdout: bytes, stderr: bytes,
+                        returncode: Optional[int], task_start: float) -> None:
+        """Store an invocation's full output in the compressed log archive"""
+        if not self.log_writer:
+            return
+        output = bytes(stdout)
+        if stderr:
+            output += b"\n--- stderr ---\n" + bytes(stderr)
+        self.log_writer.add_task_output(key, output, returncode, time.time() - task_start)
+
+    def _git_revision(self) -> Optional[str]:
         try:
             result = subprocess.run(
-                cmd,
+                ["git", "rev-parse", "HEAD"],
                 cwd=self.config.project_root,
                 capture_output=True,
                 text=True,
-                timeout=60
+                timeout=10
             )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    async def _terminate_process(self, process: asyncio.subprocess.Process,
+                                 collect: asyncio.Future) -> None:
+        """Stop a child process gracefully (a Gradle client then lets the daemon abort the build cleanly)"""
+        if process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+
+        # Let the output readers hit EOF, unless something else holds the pipes open
+        await asyncio.wait({collect}, timeout=5)
+        if not collect.done():
+            collect.cancel()
+        try:
+            await collect
+        except asyncio.CancelledError:
+            pass
 
-            if result.returncode != 0:
-                print(f"Command failed: {' '.join(cmd)}")
-                print(f"Error: {result.stderr}")
+    async def _run_command(self, *cmd: str, timeout: float = 60) -> None:
+        """Run arbitrary command"""
+        label = " ".join(cmd)
+        command_start = time.time()
+        try:
+            returncode, stdout, stderr, timed_out = await self._run_process(list(cmd), label, timeout,
+                                                                            command_start)
+        except FileNotFoundError:
+            raise RuntimeError(f"Command not found: {cmd[0]}")
 
-        except subprocess.TimeoutExpired:
-            print(f"Command timed out: {' '.join(cmd)}")
+        self._archive_output(label, stdout, stderr, returncode, command_start)
+        self.history.record(label, time.time() - command_start, returncode == 0 and not timed_out)
+        if timed_out:
+            raise RuntimeError(f"Command timed out: {label}")
+
+        if returncode != 0:
+            print(f"Command failed: {label}")
+            print(f"Error: {stderr.decode(errors='replace')}")
+            raise RuntimeError(f"Command failed: {label}")
 
     async def _verify_artifacts(self) -> None:
         """Verify generated artifacts"""
@@ -322,15 +888,23 @@ class BuildOrchestrator:
         for stage, duration in self.metrics.stage_times.items():
             print(f"  {stage}: {duration:.2f}s")
 
+        if self.metrics.asset_times:
+            print("\nAsset breakdown:")
+            for asset, duration in sorted(self.metrics.asset_times.items(),
+                                          key=lambda item: item[1], reverse=True):
+                print(f"  {asset}: {duration:.2f}s")
+
         # Save detailed report
         report = {
             "timestamp": datetime.now().isoformat(),
             "build_type": self.config.build_type.value,
             "total_time": self.metrics.total_time,
             "stage_times": self.metrics.stage_times,
+            "asset_times": self.metrics.asset_times,
             "artifacts": self.metrics.artifact_count,
             "wear_os_enabled": self.config.enable_wear_os,
-            "dynamic_features_enabled": self.config.enable_dynamic_features
+            "dynamic_features_enabled": self.config.enable_dynamic_features,
+            "speculative": self.config.speculative
         }
 
         with open("build_report.json", "w") as f:
@@ -348,6 +922,22 @@ async def main():
     parser.add_argument("--no-dynamic", action="store_true", help="Disable dynamic features")
     parser.add_argument("--no-tests", action="store_true", help="Skip tests")
     parser.add_argument("--project-root", default=".", help="Project root directory")
+    parser.add_argument("--no-assets", action="store_true", help="Skip the asset generation stage")
+    parser.add_argument("--ai-assets", action="store_true",
+                       help="Generate docs images with Gemini instead of placeholders")
+    parser.add_argument("--rebuild-assets", action="store_true",
+                       help="Regenerate every asset even if up to date")
+    parser.add_argument("--speculative", action="store_true",
+                       help="Compile and package while dependency checks and static analysis run")
+    parser.add_argument("--no-log-archive", action="store_true",
+                       help="Don't archive Gradle output under .pipeline/logs")
+    parser.add_argument("--fail-fast", choices=[p.value for p in FailFastPolicy],
+                       default=FailFastPolicy.CANCEL.value,
+                       help="What to do with remaining tasks after the first failure")
+    parser.add_argument("--max-parallel", type=int, default=None,
+                       help="Maximum concurrent tasks per stage (overrides the pipeline file)")
+    parser.add_argument("--pipeline", default="pipeline.toml",
+                       help="Pipeline definition file (TOML or JSON), relative to the project root")
 
     args = parser.parse_args()
 
@@ -356,7 +946,15 @@ async def main():
         build_type=BuildType(args.type),
         enable_wear_os=not args.no_wear,
         enable_dynamic_features=not args.no_dynamic,
-        run_tests=not args.no_tests
+        run_tests=not args.no_tests,
+        build_assets=not args.no_assets,
+        ai_assets=args.ai_assets,
+        rebuild_assets=args.rebuild_assets,
+        archive_logs=not args.no_log_archive,
+        speculative=args.speculative,
+        fail_fast=FailFastPolicy(args.fail_fast),
+        max_parallel_tasks=args.max_parallel,
+        pipeline_file=args.pipeline
     )
 
     orchestrator = BuildOrchestrator(config)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Freesound Response Cache
+Persistent SQLite cache for Freesound API responses
+
+Features:
+- Keyed by endpoint and normalized query parameters
+- Per-endpoint TTLs (search results and sound details)
+- ETag / If-None-Match revalidation of expired entries
+- Size-bounded LRU eviction
+- In-memory front cache so repeated lookups skip SQLite and JSON decoding
+- Hit / miss statistics
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Seconds a response stays fresh, by endpoint prefix; unlisted endpoints are not cached
+DEFAULT_TTLS = {
+    "search/": 60 * 60,
+    "sounds/": 24 * 60 * 60,
+}
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 256
+
+def default_cache_path() -> Path:
+    cache_root = os.environ.get("FREESOUND_CACHE_DIR")
+    if not cache_root:
+        xdg = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_root = os.path.join(xdg, "pip-droid")
+    return Path(cache_root) / "freesound.sqlite3"
+
+@dataclass
+class CacheEntry:
+    data: Any
+    etag: Optional[str]
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache of decoded API responses"""
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.path = Path(path) if path else default_cache_path()
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0,
+                         "stores": 0, "evictions": 0}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[dict] = None) -> str:
+        """Stable key: endpoint plus sorted params, with free-text queries normalized"""
+        normalized = {}
+        for name, value in (params or {}).items():
+            if name == "token":
+                continue
+            value = str(value)
+            if name == "query":
+                value = " ".join(value.lower().split())
+            normalized[name] = value
+        return endpoint.strip("/") + "?" + urllib.parse.urlencode(sorted(normalized.items()))
+
+    def ttl_for(self, endpoint: str) -> float:
+        endpoint = endpoint.lstrip("/")
+        for prefix, ttl in self.ttls.items():
+            if endpoint.startswith(prefix):
+                return ttl
+        return 0
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key, fresh or stale (stale ones can be revalidated)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._db.execute(
+                    "SELECT body, etag, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.counters["misses"] += 1
+                    return None
+                entry = CacheEntry(json.loads(zlib.decompress(row[0])), row[1], row[2])
+                self._remember(key, entry)
+
+            self._touched[key] = time.time()
+            if entry.fresh:
+                self.counters["hits"] += 1
+            else:
+                self.counters["stale"] += 1
+            if len(self._touched) >= 64:
+                self._flush_access_times()
+            return entry
+
+    def store(self, key: str, endpoint: str, body: bytes, data: Any,
+              etag: Optional[str], ttl: float) -> None:
+        """Store a decoded response together with its raw JSON body"""
+        now = time.time()
+        packed = zlib.compress(body, 6)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, packed, etag, now, now + ttl, now, len(packed))
+            )
+            self._remember(key, CacheEntry(data, etag, now + ttl))
+            self.counters["stores"] += 1
+            self._touched.pop(key, None)
+            self._evict()
+
+    def refresh(self, key: str, ttl: float) -> None:
+        """Extend an entry's freshness after a 304 Not Modified"""
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._db.execute("UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                             (expires_at, time.time(), key))
+            entry = self._memory.get(key)
+            if entry is not None:
+                entry.expires_at = expires_at
+            self.counters["revalidated"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["misses"] + counters["stale"]
+        return {
+            **counters,
+            "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "path": str(self.path),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._memory.clear()
+            self._touched.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_access_times()
+            self._db.close()
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_access_times(self) -> None:
+        """Write batched LRU access times; hits stay read-only until then"""
+        if self._touched:
+            self._db.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                                 [(at, key) for key, at in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        self._flush_access_times()
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self.counters["evictions"] += 1
@@ -0,0 +1,751 @@
+#!/usr/bin/env python3
+"""
+Freesound API Client
+Shared HTTP client for the Freesound MCP server and the download scripts
+
+Features:
+- Pool of persistent HTTP/1.1 keep-alive connections per host
+- gzip response decoding for API calls
+- Per-request timeouts
+- Redirect following for download URLs
+- Resumable downloads: streamed to a .part file, resumed with Range
+  requests, size/checksum verified, then atomically renamed into place
+- Batched metadata lookup for many sound IDs
+- Streaming search across result pages with next-page prefetch
+- Single-flight coalescing of identical concurrent API calls
+- Optional persistent response cache with ETag revalidation (freesound_cache.py)
+- Token-bucket rate limiting to Freesound's published limits, with
+  exponential backoff on 429 responses
+- Optional latency, byte, error and cache metrics per upstream call
+  (mcp_metrics.py)
+
+API Documentation: https://freesound.org/docs/api/
+"""
+
+import gzip
+import hashlib
+import http.client
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from freesound_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+FREESOUND_BASE_URL = "https://freesound.org/apiv2"
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_POOL_SIZE = 8
+MAX_REDIRECTS = 5
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_RETRIES = 3
+USER_AGENT = "pip-droid-freesound/1.0"
+
+# Freesound's published throttling for standard API keys
+RATE_LIMIT_PER_MINUTE = 60
+RATE_LIMIT_PER_DAY = 2000
+MAX_RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_BACKOFF = 2.0  # seconds before the first retry, doubled after each
+
+# Sound IDs per id:(a OR b ...) metadata request; search pages hold at most 150
+BATCH_CHUNK_SIZE = 100
+
+# Connection errors that mean a pooled keep-alive socket went stale
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+class FreesoundAPIError(Exception):
+    """Non-2xx response from the Freesound API"""
+
+    def __init__(self, status: int, body: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"Freesound API Error {status}: {body}")
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+class RateLimiter:
+    """Token bucket for the per-minute limit plus a per-day request budget
+
+    Shared by every thread using a client, so a fan-out never sends more
+    than the bucket allows. per_minute=0 disables limiting.
+    """
+
+    def __init__(self, per_minute: int = RATE_LIMIT_PER_MINUTE,
+                 per_day: int = RATE_LIMIT_PER_DAY, burst: Optional[int] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or per_minute)
+        self.per_day = per_day
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.day = date.today()
+        self.day_count = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                if date.today() != self.day:
+                    self.day, self.day_count = date.today(), 0
+                if self.per_day and self.day_count >= self.per_day:
+                    raise FreesoundAPIError(429, f"Daily limit of {self.per_day} requests reached")
+                if not self.rate:
+                    self.day_count += 1
+                    return
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.day_count += 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+    def throttled(self) -> None:
+        """The server said 429: drain the bucket so every thread slows down"""
+        with self._lock:
+            self.tokens = min(self.tokens, 0.0)
+
+class DownloadError(Exception):
+    """A download finished with the wrong size or checksum"""
+
+@dataclass
+class DownloadResult:
+    path: str
+    size: int
+    sha256: str
+    resumed_from: int = 0  # bytes reused from an earlier partial download
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait for it and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._flights)
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": in_flight}
+
+class SearchStream:
+    """Iterator over search results across pages, following `next` links
+
+    While one page is being consumed the next one is already being fetched
+    on a background thread. Iteration ends when results run out, after
+    `limit` results, or at the first result for which `until` returns True
+    (that result is not yielded).
+    """
+
+    def __init__(self, client: "FreesoundClient", endpoint: str, params: dict,
+                 limit: Optional[int] = None, until: Optional[Callable[[dict], bool]] = None,
+                 prefetch: bool = True):
+        self.client = client
+        self.endpoint = endpoint
+        self.params = dict(params)
+        self.limit = limit
+        self.until = until
+        self.prefetch = prefetch
+        self.count: Optional[int] = None  # total matches reported by Freesound
+        self.pages = 0
+        self.yielded = 0
+        self.exhausted = False
+        self._iterator = self._run()
+
+    def __iter__(self) -> "SearchStream":
+        return self
+
+    def __next__(self) -> dict:
+        return next(self._iterator)
+
+    def take(self, n: int) -> List[dict]:
+        """The next n results (fewer once the stream ends)"""
+        return list(islice(self, n))
+
+    def close(self) -> None:
+        self._iterator.close()
+        self.exhausted = True
+
+    def _run(self) -> Iterator[dict]:
+        executor = (ThreadPoolExecutor(max_workers=1, thread_name_prefix="freesound-prefetch")
+                    if self.prefetch else None)
+        try:
+            page = self.client.get_json(self.endpoint, self.params)
+            while True:
+                self.pages += 1
+                if self.count is None:
+                    self.count = page.get("count")
+                results = page.get("results", [])
+                next_url = page.get("next")
+
+                pending: Optional[Future] = None
+                needs_next = not self.limit or self.yielded + len(results) < self.limit
+                if next_url and needs_next and executor is not None:
+                    pending = executor.submit(self.client.get_json,
+                                              *self.client.split_api_url(next_url))
+
+                for sound in results:
+                    if self.until is not None and self.until(sound):
+                        return
+                    yield sound
+                    self.yielded += 1
+                    if self.limit and self.yielded >= self.limit:
+                        return
+
+                if not next_url:
+                    return
+                page = (pending.result() if pending is not None
+                        else self.client.get_json(*self.client.split_api_url(next_url)))
+        finally:
+            self.exhausted = True
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+class ConnectionPool:
+    """Idle keep-alive connections for one scheme/host/port"""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int], max_idle: int):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, reused)"""
+        with self._lock:
+            if self._idle:
+                conn = self._idle.pop()
+                self.reused += 1
+                reused = True
+            else:
+                conn = None
+                self.created += 1
+                reused = False
+        if conn is None:
+            connection_class = (http.client.HTTPSConnection if self.scheme == "https"
+                                else http.client.HTTPConnection)
+            conn = connection_class(self.host, self.port, timeout=timeout)
+        else:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        return conn, reused
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+class FreesoundClient:
+    """Thread-safe Freesound API client over pooled keep-alive connections"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = FREESOUND_BASE_URL,
+                 timeout: float = DEFAULT_TIMEOUT, pool_size: int = DEFAULT_POOL_SIZE,
+                 cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 response_hooks: Optional[List[Callable[[str, Any], None]]] = None,
+                 metrics=None):
+        self.api_key = api_key if api_key is not None else os.environ.get("FREESOUND_API_KEY", "")
+        self.base_url = base_url.rstrip("/")
+        self.api_host = urllib.parse.urlsplit(self.base_url).netloc
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.throttled_responses = 0
+        # Called as hook(endpoint, data) for every JSON body fetched from the network
+        self.response_hooks = list(response_hooks or [])
+        # mcp_metrics.Metrics (or anything with observe/inc/timer); None records nothing
+        self.metrics = metrics
+        self.single_flight = SingleFlight()
+        self._pools: Dict[Tuple[str, str], ConnectionPool] = {}
+        # Guards the connection pools and throttled_responses
+        self._pools_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_json(self, endpoint: str, params: Optional[dict] = None,
+                 timeout: Optional[float] = None, use_cache: bool = True) -> dict:
+        """GET an API endpoint (e.g. "search/text/") and decode its JSON body
+
+        With a cache attached, fresh entries are returned without touching the
+        network and expired ones are revalidated with If-None-Match. Requests
+        are paced by the rate limiter and 429s retried with exponential backoff.
+        Identical calls made while one is in flight share its HTTP request and
+        parsed result, so callers must not mutate the returned object.
+        """
+        self._require_key()
+        key = f"{int(use_cache)}:{ResponseCache.make_key(endpoint, params)}"
+        return self.single_flight.do(key, lambda: self._get_json(endpoint, params, timeout, use_cache))
+
+    def download(self, url: str, output_path: str, timeout: Optional[float] = None,
+                 expected_size: Optional[int] = None,
+                 expected_sha256: Optional[str] = None,
+                 retries: int = DOWNLOAD_RETRIES) -> DownloadResult:
+        """Download a sound or preview URL to output_path
+
+        The body is streamed to a hidden ".<name>.part" file next to
+        output_path (hidden so aapt skips it inside res/raw), which survives
+        dropped connections: the next attempt, or a later call, resumes it with
+        a Range request. A ".<name>.part.json" sidecar records the URL, the
+        response's validator (ETag or Last-Modified) and its total size; a
+        part is only resumed for the same URL, with If-Range, and is thrown
+        away if the remote file changed. Only a complete file whose size and
+        SHA-256 match is renamed over output_path, so the destination is never
+        left truncated.
+        """
+        directory, name = os.path.split(output_path)
+        part_path = os.path.join(directory, f".{name}.part")
+        resumed_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if resumed_from and (expected_size is not None and resumed_from > expected_size
+                             or self._part_meta(part_path).get("url") != url):
+            self._discard_part(part_path)
+            resumed_from = 0
+
+        for attempt in range(retries + 1):
+            try:
+                size, total, reused = self._fetch_part(url, part_path, timeout)
+                break
+            except (http.client.HTTPException, OSError) as e:
+                if attempt >= retries:
+                    raise
+                logger.info(f"Download interrupted ({e}); resuming {os.path.basename(output_path)}")
+                time.sleep(min(2 ** attempt, 10))
+
+        if expected_size is None:
+            expected_size = total
+        if expected_size is not None and size != expected_size:
+            self._discard_part(part_path)
+            raise DownloadError(f"{url}: got {size} bytes, expected {expected_size}")
+        digest = self._sha256(part_path)
+        if expected_sha256 and digest != expected_sha256.lower():
+            self._discard_part(part_path)
+            raise DownloadError(f"{url}: SHA-256 mismatch ({digest} != {expected_sha256})")
+
+        with open(part_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(part_path, output_path)
+        self._discard_part(part_path)
+        return DownloadResult(output_path, size, digest, min(resumed_from, reused))
+
+    def fetch_range(self, url: str, start: int, length: int,
+                    timeout: Optional[float] = None) -> Tuple[bytes, Optional[int]]:
+        """Read length bytes at start (or the last length bytes if start < 0)
+
+        Returns (data, total file size if the server reported it). Servers that
+        ignore Range get only the needed prefix read before the connection is
+        dropped.
+        """
+        spec = f"bytes={start}" if start < 0 else f"bytes={start}-{start + length - 1}"
+        with self._observed("range"), self.stream(url, {"Range": spec}, timeout) as response:
+            if response.status == 416:
+                response.read()
+                return b"", None
+            if response.status >= 400:
+                raise FreesoundAPIError(response.status, response.read().decode(errors="replace"))
+            if response.status == 206:
+                total = response.getheader("Content-Range", "").rpartition("/")[2]
+                data = response.read()
+                self._count("upstream_bytes_total", len(data), call="range")
+                return data, int(total) if total.isdigit() else None
+            content_length = response.getheader("Content-Length")
+            total = int(content_length) if content_length and content_length.isdigit() else None
+            data = response.read() if start < 0 else response.read(start + length)
+            self._count("upstream_bytes_total", len(data), call="range")
+            if start < 0:
+                # Full body just to reach the tail; only acceptable for small files
+                return data[start:], len(data)
+            return data[start:], total
+
+    def get_sounds(self, sound_ids: List[int], fields: Optional[str] = None,
+                   chunk_size: int = BATCH_CHUNK_SIZE) -> Dict[int, dict]:
+        """Metadata for many sounds in a few search requests, keyed by sound ID
+
+        IDs are resolved with an id:(a OR b ...) filter, chunk_size per
+        request. Unknown or deleted IDs are simply absent from the result.
+        """
+        unique_ids = list(dict.fromkeys(int(sound_id) for sound_id in sound_ids))
+        sounds: Dict[int, dict] = {}
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            params = {
+                "filter": "id:(" + " OR ".join(str(sound_id) for sound_id in chunk) + ")",
+                "page_size": len(chunk),
+            }
+            if fields:
+                params["fields"] = fields if "id" in fields.split(",") else f"id,{fields}"
+            for sound in self.get_json("search/text/", params).get("results", []):
+                sounds[sound["id"]] = sound
+        return sounds
+
+    def search_stream(self, params: dict, endpoint: str = "search/text/",
+                      limit: Optional[int] = None,
+                      until: Optional[Callable[[dict], bool]] = None,
+                      prefetch: bool = True) -> SearchStream:
+        """Stream search results past the 150-per-page cap; see SearchStream"""
+        return SearchStream(self, endpoint, params, limit, until, prefetch)
+
+    def split_api_url(self, url: str) -> Tuple[str, dict]:
+        """(endpoint, params) for an absolute API URL such as a page's `next` link"""
+        parts = urllib.parse.urlsplit(url)
+        base_path = urllib.parse.urlsplit(self.base_url).path.rstrip("/")
+        endpoint = parts.path[len(base_path):] if parts.path.startswith(base_path) else parts.path
+        return endpoint.lstrip("/"), dict(urllib.parse.parse_qsl(parts.query))
+
+    def api_url(self, endpoint: str, params: Optional[dict] = None) -> str:
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        return url
+
+    @contextmanager
+    def stream(self, url: str, headers: Optional[Dict[str, str]] = None,
+               timeout: Optional[float] = None) -> Iterator[http.client.HTTPResponse]:
+        """Open a GET response, following redirects, on a pooled connection
+
+        The connection goes back to the pool only if the body was read to
+        the end; otherwise it is closed.
+        """
+        timeout = timeout or self.timeout
+        for _ in range(MAX_REDIRECTS + 1):
+            conn, pool, response = self._send("GET", url, headers or {}, timeout)
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                response.read()
+                self._finish(pool, conn, response)
+                url = urllib.parse.urljoin(url, response.getheader("Location"))
+                continue
+            try:
+                yield response
+            finally:
+                self._finish(pool, conn, response)
+            return
+        raise FreesoundAPIError(310, f"Too many redirects for {url}")
+
+    def request_stats(self) -> Dict[str, Any]:
+        """Counters for coalesced and throttled API calls and connection reuse"""
+        with self._pools_lock:
+            throttled = self.throttled_responses
+        return {
+            "single_flight": self.single_flight.stats(),
+            "throttled_responses": throttled,
+            "rate_limit_wait_seconds": round(self.rate_limiter.waited, 2),
+            "connections": self.pool_stats(),
+        }
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._pools_lock:
+            pools = list(self._pools.values())
+        return {pool.host: {"created": pool.created, "reused": pool.reused} for pool in pools}
+
+    def close(self) -> None:
+        with self._pools_lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _get_json(self, endpoint: str, params: Optional[dict], timeout: Optional[float],
+                  use_cache: bool) -> dict:
+        cache = self.cache if use_cache else None
+        ttl = cache.ttl_for(endpoint) if cache else 0
+        key = entry = None
+        if ttl > 0:
+            key = cache.make_key(endpoint, params)
+            entry = cache.lookup(key)
+            if entry is not None and entry.fresh:
+                self._count("cache_lookups_total", result="hit")
+                return entry.data
+
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+
+        url = self.api_url(endpoint, params)
+        label = re.sub(r"\d+", ":id", endpoint.strip("/"))
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.rate_limiter.acquire()
+            logger.info(f"API Request: {endpoint}")
+            with self._observed("api", endpoint=label), self.stream(url, headers, timeout) as response:
+                body = response.read()
+                self._count("upstream_bytes_total", len(body), call="api")
+                if response.getheader("Content-Encoding", "").lower() == "gzip":
+                    body = gzip.decompress(body)
+                status = response.status
+                response_headers = dict(response.getheaders())
+            if status >= 400:
+                self._count("upstream_errors_total", call="api", endpoint=label, error=str(status))
+            if status == 429 and attempt < MAX_RATE_LIMIT_RETRIES:
+                with self._pools_lock:
+                    self.throttled_responses += 1
+                self.rate_limiter.throttled()
+                time.sleep(self._backoff(attempt, response_headers.get("Retry-After")))
+                continue
+            break
+
+        if status == 304 and entry is not None:
+            self._count("cache_lookups_total", result="revalidated")
+            cache.refresh(key, ttl)
+            return entry.data
+        if status >= 400:
+            raise FreesoundAPIError(status, body.decode(errors="replace"), response_headers)
+        if ttl > 0:
+            self._count("cache_lookups_total", result="miss")
+        etag = response_headers.get("ETag")
+
+        data = json.loads(body.decode())
+        if ttl > 0:
+            cache.store(key, endpoint, body, data, etag, ttl)
+        for hook in self.response_hooks:
+            try:
+                hook(endpoint, data)
+            except Exception as e:
+                logger.warning(f"Response hook failed for {endpoint}: {e}")
+        return data
+
+    def _observed(self, call: str, **labels: str):
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.timer("upstream_seconds", errors="upstream_errors_total", call=call, **labels)
+
+    def _count(self, name: str, amount: float = 1, **labels: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc(name, amount, **labels)
+
+    def _require_key(self) -> None:
+        if not self.api_key:
+            raise ValueError(
+                "FREESOUND_API_KEY environment variable not set. "
+                "Get your free API key at: https://freesound.org/apiv2/apply/"
+            )
+
+    def _fetch_part(self, url: str, part_path: str,
+                     timeout: Optional[float]) -> Tuple[int, Optional[int], int]:
+        """Append the rest of url to part_path
+
+        Returns (bytes on disk, total size, bytes kept from the existing part).
+
+        A part is resumed only if its sidecar matches url and names a
+        validator, sent as If-Range so a changed file comes back whole; a
+        range reply for a different total or ETag discards the part.
+        """
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        meta = self._part_meta(part_path) if offset else {}
+        validator = meta.get("etag") or meta.get("last_modified")
+        if offset and (meta.get("url") != url or not validator):
+            # Not known to be the same remote file; a Range request could splice two
+            self._discard_part(part_path)
+            offset, meta = 0, {}
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator} if offset else {}
+        start = offset
+        with self._observed("download"), self.stream(url, headers, timeout) as response:
+            total = response.getheader("Content-Range", "").rpartition("/")[2]
+            total = int(total) if total.isdigit() else None
+            if response.status == 416:
+                # Nothing left past offset: complete only if that is the whole recorded file
+                response.read()
+                if total is not None and total == meta.get("total") == offset:
+                    return offset, total, offset
+                stale = True
+            elif response.status == 206:
+                etag = response.getheader("ETag")
+                stale = total != meta.get("total") or bool(etag and meta.get("etag")
+                                                           and etag != meta["etag"])
+                if stale:
+                    response.read()
+            else:
+                stale = False
+            if response.status >= 400 and not stale:
+                raise FreesoundAPIError(response.status, response.read().decode(errors="replace"))
+
+            if not stale:
+                if response.status == 206:
+                    mode = "ab"
+                else:
+                    # A fresh download, a server that ignored Range, or If-Range
+                    # found the file changed: start over and record what it is
+                    length = response.getheader("Content-Length")
+                    total = int(length) if length and length.isdigit() else None
+                    offset = start = 0
+                    mode = "wb"
+                    self._write_part_meta(part_path, {
+                        "url": url,
+                        "etag": response.getheader("ETag"),
+                        "last_modified": response.getheader("Last-Modified"),
+                        "total": total,
+                    })
+
+                try:
+                    with open(part_path, mode) as f:
+                        while chunk := response.read(CHUNK_SIZE):
+                            f.write(chunk)
+                            offset += len(chunk)
+                finally:
+                    self._count("upstream_bytes_total", offset - start, call="download")
+                if response.length:
+                    # read(n) reports a dropped connection as a short body, not an error
+                    raise http.client.IncompleteRead(b"", response.length)
+        if stale:
+            # The remote file is not the one the part came from; fetch it whole
+            self._discard_part(part_path)
+            return self._fetch_part(url, part_path, timeout)
+        return offset, total, start
+
+    @staticmethod
+    def _part_meta(part_path: str) -> Dict[str, Any]:
+        try:
+            with open(part_path + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_part_meta(part_path: str, meta: Dict[str, Any]) -> None:
+        with open(part_path + ".json", "w") as f:
+            json.dump(meta, f)
+
+    @staticmethod
+    def _discard_part(part_path: str) -> None:
+        for path in (part_path, part_path + ".json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        delay = RATE_LIMIT_BACKOFF * (2 ** attempt)
+        return delay + random.uniform(0, delay / 2)
+
+    def _pool(self, scheme: str, netloc: str) -> ConnectionPool:
+        key = (scheme, netloc)
+        with self._pools_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                parsed = urllib.parse.urlsplit(f"{scheme}://{netloc}")
+                pool = ConnectionPool(scheme, parsed.hostname, parsed.port, self.pool_size)
+                self._pools[key] = pool
+            return pool
+
+    def _send(self, method: str, url: str, headers: Dict[str, str], timeout: float):
+        parts = urllib.parse.urlsplit(url)
+        pool = self._pool(parts.scheme, parts.netloc)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+
+        request_headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive"}
+        if parts.netloc == self.api_host and self.api_key:
+            # Only ever send the key to the API host, never to CDN redirects
+            request_headers["Authorization"] = f"Token {self.api_key}"
+        request_headers.update(headers)
+
+        for attempt in range(2):
+            conn, reused = pool.acquire(timeout)
+            try:
+                if conn.sock is None and self.metrics is not None:
+                    # DNS, TCP and TLS setup, separated from the request itself
+                    with self.metrics.timer("upstream_connect_seconds", errors="upstream_connect_errors_total",
+                                            host=parts.hostname or ""):
+                        conn.connect()
+                conn.request(method, path, headers=request_headers)
+                return conn, pool, conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused or attempt:
+                    raise
+                logger.debug(f"Stale pooled connection to {parts.netloc}, reconnecting")
+            except BaseException:
+                conn.close()
+                raise
+
+    @staticmethod
+    def _finish(pool: ConnectionPool, conn: http.client.HTTPConnection,
+                response: http.client.HTTPResponse) -> None:
+        if response.isclosed() and not response.will_close:
+            pool.release(conn)
+        else:
+            conn.close()
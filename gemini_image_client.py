@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Gemini Image Client
+Shared google-genai helpers of the repository image scripts
+(scripts/generate_images_simple.py, scripts/generate_repo_images.py)
+
+The SDK is imported and the client built by the first request: both are
+slow, and a run served entirely from the image cache never needs them.
+
+Usage:
+    from gemini_image_client import MODEL, request_image, require_packages
+"""
+
+import importlib.util
+import sys
+
+MODEL = "gemini-2.5-flash-image-preview"
+
+# Gemini API client, created on first use
+# Note: Set your API key as environment variable: GEMINI_API_KEY
+_client = None
+
+def require_packages():
+    """Exit with install instructions if the SDK or Pillow is missing
+
+    Only looks the packages up: importing the SDK is slow and not needed
+    when every image is cached.
+    """
+    try:
+        missing = not (importlib.util.find_spec("google.genai") and importlib.util.find_spec("PIL"))
+    except ImportError:
+        missing = True
+    if missing:
+        print("ERROR: Required packages not installed!")
+        print("\nInstall with:")
+        print("  pip install google-genai pillow")
+        print("\nOr using conda:")
+        print("  conda install -c conda-forge pillow")
+        print("  pip install google-genai")
+        sys.exit(1)
+
+def get_client():
+    global _client
+    if _client is None:
+        from google import genai
+        _client = genai.Client()
+    return _client
+
+def request_image(prompt):
+    """Image bytes from the API, or None if the response has no image"""
+    response = get_client().models.generate_content(
+        model=MODEL,
+        contents=[prompt],
+    )
+
+    # Process response
+    for part in response.candidates[0].content.parts:
+        if part.text is not None:
+            print(f"   Response: {part.text}")
+        elif part.inline_data is not None:
+            return part.inline_data.data
+    return None
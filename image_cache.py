@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Generated Image Cache
+Content-addressed on-disk cache of Gemini image generations, shared by the
+Gemini MCP server and the repository image scripts
+
+Layout (under ~/.cache/pip-droid/images by default, GEMINI_IMAGE_CACHE_DIR
+to relocate):
+- objects/<sha256[:2]>/<sha256>  one blob per distinct image content
+- images.sqlite3                 request key -> blob, with provenance
+- tmp/                           blobs being written
+
+Features:
+- Keyed by a hash of the model name, the whitespace-normalized prompt and
+  the generation parameters, so re-running an unchanged prompt makes no
+  API call
+- Provenance per entry: model, original prompt, parameters, the tool that
+  generated it and when
+- Size-bounded LRU eviction (GEMINI_IMAGE_CACHE_MAX_MB, default 512)
+- Concurrent requests for the same key wait for one generation
+- GEMINI_IMAGE_CACHE=0 disables the cache
+
+Usage:
+    python image_cache.py list
+    python image_cache.py show <key prefix>
+    python image_cache.py stats
+    python image_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from freesound_cache import default_cache_path
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+GENERATE_LOCK_STRIPES = 64
+
+def default_image_cache_dir() -> Path:
+    cache_dir = os.environ.get("GEMINI_IMAGE_CACHE_DIR")
+    return Path(cache_dir) if cache_dir else default_cache_path().parent / "images"
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace runs and line breaks (case is kept: it can change
+    the text drawn into the image)"""
+    return " ".join(prompt.split())
+
+@dataclass
+class CachedImage:
+    key: str
+    sha256: str
+    size: int
+    model: str
+    prompt: str
+    params: Dict[str, Any]
+    source: str
+    created_at: float
+    path: Path
+
+    def read(self) -> bytes:
+        return self.path.read_bytes()
+
+    def provenance(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "sha256": self.sha256,
+            "size_bytes": self.size,
+            "model": self.model,
+            "prompt": self.prompt,
+            "params": self.params,
+            "source": self.source,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.created_at)),
+        }
+
+class ImageCache:
+    """Thread-safe content-addressed store of generated images"""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else default_image_cache_dir()
+        self.max_bytes = max_bytes
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Striped per-key locks: held while a key is generated or its blob read
+        self._generate_locks = [threading.Lock() for _ in range(GENERATE_LOCK_STRIPES)]
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._db = sqlite3.connect(str(self.root / "images.sqlite3"),
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                key TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                params TEXT NOT NULL,
+                source TEXT,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS images_lru ON images (last_access)")
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """SHA-256 of model, normalized prompt and sorted parameters"""
+        request = {"model": model, "prompt": normalize_prompt(prompt), "params": params or {}}
+        encoded = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256
+
+    def get(self, model: str, prompt: str,
+            params: Optional[Dict[str, Any]] = None) -> Optional[CachedImage]:
+        return self.lookup(self.make_key(model, prompt, params))
+
+    def lookup(self, key: str) -> Optional[CachedImage]:
+        """The entry for key, if its blob is still present"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key, sha256, size, model, prompt, params, source, created_at "
+                "FROM images WHERE key = ?", (key,)
+            ).fetchone()
+            entry = self._entry(row) if row else None
+            if entry is not None and (not entry.path.exists() or entry.path.stat().st_size != entry.size):
+                self._db.execute("DELETE FROM images WHERE key = ?", (key,))
+                entry = None
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._db.execute("UPDATE images SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.counters["hits"] += 1
+            return entry
+
+    def put(self, model: str, prompt: str, params: Optional[Dict[str, Any]], data: bytes,
+            source: str = "") -> CachedImage:
+        """Store generated image bytes with their provenance"""
+        key = self.make_key(model, prompt, params)
+        sha256 = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(sha256)
+        if not (blob.exists() and blob.stat().st_size == len(data)):
+            blob.parent.mkdir(exist_ok=True)
+            staging = self.tmp_dir / f"{sha256}.{threading.get_ident()}"
+            staging.write_bytes(data)
+            os.replace(staging, blob)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, sha256, len(data), model, prompt, json.dumps(params or {}, sort_keys=True),
+                 source, now, now)
+            )
+            self.counters["stores"] += 1
+            self._evict(keep=key)
+        return CachedImage(key, sha256, len(data), model, prompt, dict(params or {}), source, now, blob)
+
+    def get_or_generate(self, model: str, prompt: str, params: Optional[Dict[str, Any]],
+                        generate: Callable[[], Optional[bytes]], source: str = "",
+                        refresh: bool = False) -> Tuple[Optional[bytes], bool]:
+        """(image bytes, cached): the stored image, generating it only if missing
+
+        generate returns the image bytes, or None when no image was produced
+        (nothing is stored). refresh regenerates and replaces the entry.
+        """
+        key = self.make_key(model, prompt, params)
+        with self._key_lock(key):
+            if not refresh:
+                entry = self.lookup(key)
+                if entry is not None:
+                    # Read under the key lock: eviction skips keys being read
+                    return entry.read(), True
+            data = generate()
+            if data is None:
+                return None, False
+            self.put(model, prompt, params, data, source)
+            return data, False
+
+    def entries(self) -> List[CachedImage]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, sha256, size, model, prompt, params, source, created_at "
+                "FROM images ORDER BY created_at"
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+            stored = self._stored_bytes()
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": stored,
+            "max_bytes": self.max_bytes,
+            "path": str(self.root),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            shas = [row[0] for row in self._db.execute("SELECT DISTINCT sha256 FROM images")]
+            self._db.execute("DELETE FROM images")
+            for sha256 in shas:
+                self.blob_path(sha256).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _entry(self, row) -> CachedImage:
+        key, sha256, size, model, prompt, params, source, created_at = row
+        return CachedImage(key, sha256, size, model, prompt, json.loads(params or "{}"),
+                           source or "", created_at, self.blob_path(sha256))
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        return self._generate_locks[int(key, 16) % GENERATE_LOCK_STRIPES]
+
+    def _stored_bytes(self) -> int:
+        # Identical images under several keys share one blob
+        return self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM images GROUP BY sha256)"
+        ).fetchone()[0]
+
+    def _evict(self, keep: str) -> None:
+        total = self._stored_bytes()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, sha256, size FROM images ORDER BY last_access").fetchall()
+        for key, sha256, size in rows:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            # Never wait here (the caller holds _lock and a key lock): a key
+            # that is being generated or read is left for a later eviction
+            key_lock = self._key_lock(key)
+            if not key_lock.acquire(blocking=False):
+                continue
+            try:
+                self._db.execute("DELETE FROM images WHERE key = ?", (key,))
+                self.counters["evictions"] += 1
+                shared = self._db.execute("SELECT 1 FROM images WHERE sha256 = ? LIMIT 1",
+                                          (sha256,)).fetchone()
+                if shared is None:
+                    self.blob_path(sha256).unlink(missing_ok=True)
+                    total -= size
+            finally:
+                key_lock.release()
+
+def open_image_cache(root: Optional[Path] = None) -> Optional[ImageCache]:
+    """The image cache configured by the environment, or None if disabled"""
+    if os.environ.get("GEMINI_IMAGE_CACHE", "1") == "0":
+        return None
+    max_mb = float(os.environ.get("GEMINI_IMAGE_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)))
+    return ImageCache(root, max_bytes=int(max_mb * 1024 * 1024))
+
+def generate_cached(cache: Optional[ImageCache], model: str, prompt: str,
+                    params: Optional[Dict[str, Any]], generate: Callable[[], Optional[bytes]],
+                    source: str = "", refresh: bool = False) -> Tuple[Optional[bytes], bool]:
+    """(image bytes or None, served from cache); calls generate directly if cache is None"""
+    if cache is None:
+        return generate(), False
+    return cache.get_or_generate(model, prompt, params, generate, source, refresh)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect the generated image cache")
+    parser.add_argument("--cache-dir", help="Cache directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List cached images with their model and prompt")
+    show = subparsers.add_parser("show", help="Print an entry's provenance")
+    show.add_argument("key", help="Cache key or a unique prefix of it")
+    subparsers.add_parser("stats", help="Show entry count and size")
+    subparsers.add_parser("clear", help="Delete every cached image")
+    args = parser.parse_args()
+
+    cache = ImageCache(Path(args.cache_dir) if args.cache_dir else None)
+    if args.command == "list":
+        for entry in cache.entries():
+            prompt = normalize_prompt(entry.prompt)
+            print(f"{entry.key[:12]}  {entry.size / 1024:8.1f} KB  {entry.model:<28}  "
+                  f"{prompt[:60]}{'...' if len(prompt) > 60 else ''}")
+        return 0
+    if args.command == "show":
+        matches = [entry for entry in cache.entries() if entry.key.startswith(args.key)]
+        if len(matches) != 1:
+            print(f"❌ {len(matches)} entries match '{args.key}'")
+            return 1
+        print(json.dumps({**matches[0].provenance(), "path": str(matches[0].path)}, indent=2))
+        return 0
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+        return 0
+    if args.command == "clear":
+        cache.clear()
+        print(f"🗑️  Cleared {cache.root}")
+        return 0
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+MCP Background Jobs
+Runs bulk tool work in the background so the tool call can return a job ID
+immediately; shared by the Freesound and Gemini MCP servers
+
+Features:
+- One bounded worker pool for all jobs' items
+- Per-item status, timing and results, readable while the job runs
+- Cancellation: items not yet started are skipped, running items finish
+- Finished jobs are kept for a while for polling, then dropped
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_JOB_WORKERS = 6
+FINISHED_JOB_TTL = 60 * 60   # seconds a finished job stays pollable
+MAX_FINISHED_JOBS = 50
+
+@dataclass
+class JobItem:
+    name: str
+    status: str = "pending"     # pending, running, done, failed, cancelled
+    result: Any = None
+    error: Optional[str] = None
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        item = {"name": self.name, "status": self.status}
+        if self.started and self.finished:
+            item["seconds"] = round(self.finished - self.started, 2)
+        if self.result is not None:
+            item["result"] = self.result
+        if self.error is not None:
+            item["error"] = self.error
+        return item
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    items: Dict[str, JobItem]
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    cancel_requested: bool = False
+    remaining: int = 0
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def status(self) -> str:
+        if self.finished is None:
+            return "cancelling" if self.cancel_requested else "running"
+        # A cancel that arrived after the last item had started skipped nothing
+        if any(item.status == "cancelled" for item in self.items.values()):
+            return "cancelled"
+        if any(item.status == "failed" for item in self.items.values()):
+            return "completed_with_errors"
+        return "completed"
+
+    def to_dict(self, include_items: bool = True) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for item in self.items.values():
+            counts[item.status] = counts.get(item.status, 0) + 1
+        job = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": len(self.items),
+            "progress": counts,
+            "elapsed_seconds": round((self.finished or time.time()) - self.created, 2),
+        }
+        if include_items:
+            job["items"] = [item.to_dict() for item in self.items.values()]
+        return job
+
+class JobManager:
+    """Thread-safe registry of background jobs sharing one worker pool"""
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS, thread_name_prefix: str = "job"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix=thread_name_prefix)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, items: Dict[str, Any],
+               run_item: Callable[[str, Any], Any]) -> Job:
+        """Start a job that calls run_item(name, arg) for every entry in items
+
+        run_item's return value becomes the item's result; an exception marks
+        the item failed with its message.
+        """
+        job = Job(job_id=uuid.uuid4().hex[:12], kind=kind,
+                  items={name: JobItem(name) for name in items}, remaining=len(items))
+        with self._lock:
+            self._expire()
+            self._jobs[job.job_id] = job
+        if not items:
+            job.finished = time.time()
+            job.done.set()
+        for name, arg in items.items():
+            self._executor.submit(self._run_item, job, job.items[name], run_item, arg)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is not None and job.finished is None:
+            job.cancel_requested = True
+        return job
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run_item(self, job: Job, item: JobItem, run_item: Callable[[str, Any], Any],
+                  arg: Any) -> None:
+        try:
+            if job.cancel_requested:
+                item.status = "cancelled"
+                return
+            item.status = "running"
+            item.started = time.time()
+            try:
+                item.result = run_item(item.name, arg)
+                item.status = "done"
+            except Exception as e:
+                item.error = str(e)
+                item.status = "failed"
+            item.finished = time.time()
+        finally:
+            with self._lock:
+                job.remaining -= 1
+                if job.remaining == 0:
+                    job.finished = time.time()
+                    job.done.set()
+
+    def _expire(self) -> None:
+        """Drop finished jobs past their TTL, and the oldest beyond the cap"""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished is not None),
+                          key=lambda job: job.finished)
+        for index, job in enumerate(finished):
+            if now - job.finished > FINISHED_JOB_TTL or len(finished) - index > MAX_FINISHED_JOBS:
+                del self._jobs[job.job_id]
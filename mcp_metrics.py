@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+MCP Server Metrics
+In-process latency histograms and counters shared by the Freesound and
+Gemini MCP servers
+
+Features:
+- Fixed-bucket histograms (Prometheus layout) with p50/p95/p99 estimates
+- Labelled counters for bytes, errors and cache lookups
+- Gauges read from collector callbacks only when a snapshot is taken
+- Prometheus text-format export, optionally rewritten to a textfile on a
+  timer for node_exporter's textfile collector
+- A record costs one lock and a bisect, so tools and upstream calls can be
+  instrumented on the hot path
+"""
+
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; anything slower lands in the +Inf bucket
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TEXTFILE_INTERVAL = 15.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Bucketed distribution of observed values (not thread-safe on its own)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+class Metrics:
+    """Thread-safe registry of labelled histograms, counters and gauges"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.started = time.time()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name: str, errors: Optional[str] = None, **labels: str) -> Iterator[None]:
+        """Observe the block's duration; count exceptions in the errors counter"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            if errors:
+                self.inc(errors, error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def instrument_tool(self, func: Callable, is_error: Optional[Callable[[Any], bool]] = None) -> Callable:
+        """Wrap a tool body to record its latency, response size and failures
+
+        Tools report most failures in their return value rather than by
+        raising; is_error(result) recognises those.
+        """
+        tool = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                self.inc("tool_errors_total", tool=tool, error=type(e).__name__)
+                raise
+            finally:
+                self.observe("tool_seconds", time.perf_counter() - start, tool=tool)
+            if isinstance(result, str):
+                self.inc("tool_response_bytes_total", len(result), tool=tool)
+            if is_error is not None and is_error(result):
+                self.inc("tool_errors_total", tool=tool, error="result")
+            return result
+        return wrapper
+
+    def add_collector(self, collector: Callable[[], Dict[str, float]]) -> None:
+        """Register a callback returning gauge values, read at snapshot time"""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values as JSON-friendly dicts, latencies in milliseconds"""
+        with self._lock:
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": h.count,
+                        "avg_ms": round(h.sum / h.count * 1000, 2) if h.count else 0.0,
+                        "p50_ms": round(h.quantile(0.50) * 1000, 2),
+                        "p95_ms": round(h.quantile(0.95) * 1000, 2),
+                        "p99_ms": round(h.quantile(0.99) * 1000, 2),
+                        "max_ms": round(h.max * 1000, 2),
+                    }
+                    for key, h in sorted(series.items())
+                ]
+                for name, series in sorted(self._histograms.items())
+            }
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+        return {
+            "histograms": histograms,
+            "counters": counters,
+            "gauges": self._gauges(),
+        }
+
+    def prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{metric}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_labels(key)} {h.sum!r}")
+                    lines.append(f"{metric}_count{_labels(key)} {h.count}")
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_labels(key)} {value!r}")
+        for name, value in sorted(self._gauges().items()):
+            metric = f"{self.namespace}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically replace path with the Prometheus exposition"""
+        directory, name = os.path.split(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        staging = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+        with open(staging, "w") as f:
+            f.write(self.prometheus())
+        os.replace(staging, path)
+
+    def start_textfile_writer(self, path: str, interval: float = TEXTFILE_INTERVAL) -> threading.Thread:
+        """Rewrite the textfile every interval seconds on a daemon thread"""
+        def run():
+            while True:
+                try:
+                    self.write_textfile(path)
+                except Exception as e:
+                    logger.warning(f"Could not write metrics to {path}: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name=f"{self.namespace}-metrics", daemon=True)
+        thread.start()
+        return thread
+
+    def _gauges(self) -> Dict[str, float]:
+        gauges = {"uptime_seconds": round(time.time() - self.started, 1)}
+        for collector in self._collectors:
+            try:
+                gauges.update(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return gauges
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
@@ -8,7 +8,22 @@ Features:
 - Download sounds directly
 - Filter by license (CC0, CC-BY, etc.)
 - Preview before download
-- Get sound metadata
+- Get sound metadata, one sound or many per request
+- Persistent response cache for searches and sound details
+- Shared content-addressed sound library; installs are hardlinks
+- Offline / hybrid search over a local BM25 index of fetched metadata
+- Streaming search in chunks across result pages
+- Header-only audio probing to reject candidates before downloading
+- Candidate ranking by audio features of low-quality previews (NumPy),
+  so curated downloads pick the best-sounding result, not just the first
+- Async tool handlers over a bounded thread pool, so calls run concurrently
+- Bulk downloads run as background jobs with progress polling and cancel
+- Lockfile-pinned sounds (sounds.lock.json): verified in parallel, only
+  missing or changed files are fetched (sync_sounds)
+- Per-tool and per-upstream-call latency histograms, byte, error and cache
+  counters (get_server_metrics, optional Prometheus textfile)
+- Side-effect-free startup: on-disk stores open on the first tool call
+- Field projection and compact / newline-delimited JSON responses
 
 API Documentation: https://freesound.org/docs/api/
 """
@@ -16,20 +31,30 @@ API Documentation: https://freesound.org/docs/api/
 import os
 import sys
 import json
-import urllib.request
-import urllib.parse
+import time
+import uuid
+import asyncio
 import logging
-from typing import Any
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_features import PROFILES, CandidateRanker, FeatureCache, FeatureError, TargetProfile
+from audio_probe import AudioRequirements, ProbeError, probe_url
+from freesound_cache import ResponseCache
+from freesound_client import FreesoundAPIError, FreesoundClient
+from mcp_jobs import JobManager
+from mcp_metrics import Metrics
+from sound_index import SoundIndex
+from sound_library import SoundLibrary
+from sound_manifest import SoundManifest, sync_entry, verify
 
-# Add fastmcp to path if needed
 try:
-    from mcp.server import Server
-    from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
-except ImportError:
-    print("Installing fastmcp...")
-    os.system(f"{sys.executable} -m pip install fastmcp")
-    from mcp.server import Server
-    from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
+    from mcp.server.fastmcp import FastMCP
+except ImportError as e:
+    print(f"Error: Required package not installed: {e}", file=sys.stderr)
+    print("Install with: pip install mcp", file=sys.stderr)
+    sys.exit(1)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,47 +62,312 @@ logger = logging.getLogger(__name__)
 
 # Freesound API Configuration
 FREESOUND_API_KEY = os.environ.get("FREESOUND_API_KEY", "")
-FREESOUND_BASE_URL = "https://freesound.org/apiv2"
+FREESOUND_BASE_URL = os.environ.get("FREESOUND_BASE_URL", "https://freesound.org/apiv2")
+DEFAULT_DOWNLOAD_WORKERS = 6
+JOB_WORKERS = int(os.environ.get("FREESOUND_JOB_WORKERS", str(DEFAULT_DOWNLOAD_WORKERS)))
+
+# Threads available to tool handlers; calls beyond this queue instead of
+# piling up threads (set FREESOUND_TOOL_WORKERS to tune)
+TOOL_WORKERS = int(os.environ.get("FREESOUND_TOOL_WORKERS", "16"))
 
 # Create MCP server
-mcp = Server("freesound")
+mcp = FastMCP("freesound")
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="freesound-tool")
+
+# Latency/byte/error metrics; FREESOUND_METRICS_FILE also writes them for
+# Prometheus' node_exporter textfile collector
+metrics = Metrics("freesound_mcp")
+FREESOUND_METRICS_FILE = os.environ.get("FREESOUND_METRICS_FILE", "")
+
+# Tool response encodings: "pretty" (indented JSON), "compact" (no
+# whitespace) and "ndjson" (a header line, then one line per sound, so a
+# client can act on results as it reads them). FREESOUND_RESPONSE_ENCODING
+# sets the default; list tools also take an encoding argument. Errors are
+# always pretty.
+RESPONSE_ENCODINGS = ("pretty", "compact", "ndjson")
+DEFAULT_ENCODING = os.environ.get("FREESOUND_RESPONSE_ENCODING", "pretty")
+_compact_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+def _encode(payload: dict, encoding: str = None, items: str = None) -> str:
+    """Serialize a tool response; ndjson puts payload[items] one per line"""
+    encoding = encoding or DEFAULT_ENCODING
+    if encoding == "pretty":
+        return json.dumps(payload, indent=2)
+    if encoding not in RESPONSE_ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding} (use one of {', '.join(RESPONSE_ENCODINGS)})")
+    if encoding == "compact" or items is None:
+        return _compact_encoder.encode(payload)
+    header = {key: value for key, value in payload.items() if key != items}
+    lines = [_compact_encoder.encode(header)]
+    lines.extend(_compact_encoder.encode(entry) for entry in payload[items])
+    return "\n".join(lines)
+
+class ErrorResult(str):
+    """A tool's JSON error response, marked so metrics count the call as failed"""
+
+def _error(message: str, **details) -> str:
+    return ErrorResult(json.dumps({**details, "error": message}, indent=2))
+
+def _is_error_result(result) -> bool:
+    return isinstance(result, ErrorResult)
+
+def offloaded(func):
+    """Expose a blocking tool body as an async handler run on tool_executor
+
+    FastMCP calls plain functions on the event loop thread, where one slow
+    download would stall every other tool call. Time spent queued for a
+    worker is recorded separately from the tool's own latency.
+    """
+    instrumented = metrics.instrument_tool(func, is_error=_is_error_result)
+    
+    @functools.wraps(func)
+    async def handler(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        queued = time.perf_counter()
+        
+        def run():
+            metrics.observe("tool_queue_seconds", time.perf_counter() - queued, tool=func.__name__)
+            _open_stores()
+            return instrumented(*args, **kwargs)
+        
+        return await loop.run_in_executor(tool_executor, run)
+    return handler
+
+# Background jobs for bulk tools; their items share JOB_WORKERS threads
+jobs = JobManager(max_workers=JOB_WORKERS, thread_name_prefix="freesound-job")
+
+# On-disk stores, opened by the first tool call so that starting the server
+# touches neither the disk nor SQLite (see _open_stores):
+# - response cache (FREESOUND_CACHE=0 disables, FREESOUND_CACHE_DIR relocates)
+# - machine-wide sound library (FREESOUND_LIBRARY=0 downloads straight into the project)
+# - offline BM25 index of every sound seen in search/detail responses (FREESOUND_INDEX=0)
+# - audio feature vectors of ranked previews (FREESOUND_FEATURES=0)
+FREESOUND_CACHE_MAX_MB = int(os.environ.get("FREESOUND_CACHE_MAX_MB", "64"))
+cache = None
+library = None
+sound_index = None
+feature_cache = None
+stores_opened = False
+stores_lock = threading.Lock()
+
+# Shared keep-alive client; connections are opened lazily on first use
+client = FreesoundClient(FREESOUND_API_KEY, FREESOUND_BASE_URL, metrics=metrics)
+
+# Ranks search candidates from their previews; NumPy is imported on first use
+ranker = CandidateRanker(client, workers=JOB_WORKERS)
+ranking_warnings = set()
+
+def _open_stores() -> None:
+    """Open the cache, library and index once, and attach them to the client"""
+    global cache, library, sound_index, feature_cache, stores_opened
+    if stores_opened:
+        return
+    with stores_lock:
+        if stores_opened:
+            return
+        if os.environ.get("FREESOUND_CACHE", "1") != "0":
+            try:
+                cache = ResponseCache(max_bytes=FREESOUND_CACHE_MAX_MB * 1024 * 1024)
+                client.cache = cache
+            except Exception as e:
+                logger.warning(f"Response cache disabled: {e}")
+        if os.environ.get("FREESOUND_LIBRARY", "1") != "0":
+            try:
+                library = SoundLibrary()
+            except Exception as e:
+                logger.warning(f"Sound library disabled: {e}")
+        if os.environ.get("FREESOUND_INDEX", "1") != "0":
+            try:
+                sound_index = SoundIndex()
+                client.response_hooks.append(sound_index.add_response)
+            except Exception as e:
+                logger.warning(f"Sound index disabled: {e}")
+        if os.environ.get("FREESOUND_FEATURES", "1") != "0":
+            try:
+                feature_cache = FeatureCache()
+                ranker.cache = feature_cache
+            except Exception as e:
+                logger.warning(f"Feature cache disabled: {e}")
+        stores_opened = True
+
+def _collect_gauges() -> dict:
+    """Point-in-time values for get_server_metrics and the textfile"""
+    flights = client.single_flight.stats()
+    gauges = {
+        "single_flight_coalesced": flights["coalesced"],
+        "single_flight_in_flight": flights["in_flight"],
+        "rate_limit_wait_seconds": round(client.rate_limiter.waited, 3),
+        "jobs_running": sum(1 for job in jobs.jobs() if job.finished is None),
+    }
+    if cache is not None:
+        cache_stats = cache.stats()
+        gauges["cache_hit_ratio"] = cache_stats["hit_ratio"]
+        gauges["cache_entries"] = cache_stats["entries"]
+        gauges["cache_size_bytes"] = cache_stats["size_bytes"]
+    return gauges
+
+metrics.add_collector(_collect_gauges)
 
-def make_api_request(endpoint: str, params: dict = None) -> dict:
+def make_api_request(endpoint: str, params: dict = None, timeout: float = None) -> dict:
     """Make a request to the Freesound API"""
-    if not FREESOUND_API_KEY:
-        raise ValueError(
-            "FREESOUND_API_KEY environment variable not set. "
-            "Get your free API key at: https://freesound.org/apiv2/apply/"
-        )
+    try:
+        return client.get_json(endpoint, params, timeout=timeout)
+    except (ValueError, FreesoundAPIError):
+        raise
+    except Exception as e:
+        raise Exception(f"Request failed: {str(e)}")
+
+# Metadata needed to download a sound without a separate sounds/{id}/ call
+DOWNLOAD_FIELDS = "id,name,download,previews,type,filesize,samplerate,bitrate,duration,license,username"
+SEARCH_FIELDS = DOWNLOAD_FIELDS + ",description,tags"
+MAX_PAGE_SIZE = 150
+
+# Open search_sounds_stream cursors, dropped after STREAM_IDLE_SECONDS unused
+STREAM_IDLE_SECONDS = 600
+MAX_OPEN_STREAMS = 16
+streams = {}
+streams_lock = threading.Lock()
+
+LICENSE_FILTERS = {
+    "CC0": "license:\"Creative Commons 0\"",
+    "CC-BY": "license:\"Attribution\"",
+    "CC-BY-NC": "license:\"Attribution Noncommercial\"",
+}
+
+def _search_params(query: str, filter_license: str = "CC0", page_size: int = 10,
+                   min_duration: float = 0.1, max_duration: float = 5.0,
+                   sort: str = "rating_desc") -> dict:
+    """search/text/ parameters requesting every field download_sound needs"""
+    # Build filter string
+    filters = [f"duration:[{min_duration} TO {max_duration}]"]
+    if filter_license in LICENSE_FILTERS:
+        filters.append(LICENSE_FILTERS[filter_license])
     
-    # Add API key to params
-    if params is None:
-        params = {}
-    params["token"] = FREESOUND_API_KEY
+    return {
+        "query": query,
+        "filter": " AND ".join(filters),
+        "sort": sort,
+        "page_size": max(1, min(page_size, MAX_PAGE_SIZE)),
+        "fields": SEARCH_FIELDS
+    }
+
+def _search(query: str, filter_license: str = "CC0", max_results: int = 10,
+            min_duration: float = 0.1, max_duration: float = 5.0,
+            sort: str = "rating_desc") -> dict:
+    """Raw search/text/ response (first page only)"""
+    params = _search_params(query, filter_license, max_results, min_duration, max_duration, sort)
+    return make_api_request("search/text/", params)
+
+def _from_search_result(metadata: dict) -> dict:
+    """Accept a search_sounds result entry in place of API metadata"""
+    sound = dict(metadata)
+    if "download" not in sound and "download_url" in sound:
+        sound["download"] = sound["download_url"]
+    if "previews" not in sound and "preview_url" in sound:
+        sound["previews"] = {"preview-hq-mp3": sound["preview_url"]}
+    return sound
+
+def _has_download_fields(sound: dict, use_preview: bool) -> bool:
+    if "name" not in sound:
+        return False
+    if use_preview:
+        return "preview-hq-mp3" in sound.get("previews", {})
+    return bool(sound.get("download")) and bool(sound.get("type"))
+
+def _download_sound_file(sound: dict, output_path: str, use_preview: bool) -> dict:
+    """Download a sound whose API metadata is already known"""
+    # Choose download URL
+    if use_preview:
+        download_url = sound["previews"]["preview-hq-mp3"]
+        file_extension = ".mp3"
+    else:
+        download_url = sound["download"]
+        # Get file extension from type
+        file_type = sound.get("type", "wav")
+        file_extension = f".{file_type}" if not file_type.startswith(".") else file_type
     
-    # Build URL
-    query_string = urllib.parse.urlencode(params)
-    url = f"{FREESOUND_BASE_URL}/{endpoint}?{query_string}"
+    # Ensure output path has correct extension
+    if not output_path.endswith(file_extension):
+        output_path = os.path.splitext(output_path)[0] + file_extension
     
-    logger.info(f"API Request: {endpoint}")
+    # Originals can be checked against the metadata size; previews are transcodes
+    expected_size = None if use_preview else sound.get("filesize")
     
-    try:
-        with urllib.request.urlopen(url) as response:
-            return json.loads(response.read().decode())
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode()
-        raise Exception(f"Freesound API Error {e.code}: {error_body}")
-    except Exception as e:
-        raise Exception(f"Request failed: {str(e)}")
+    if library is not None:
+        # Stored once per machine; installs are hardlinks into the project
+        variant = "preview" if use_preview else "original"
+        cached = library.lookup(sound["id"], variant) is not None
+        if not cached:
+            logger.info(f"Downloading sound {sound['id']} into the sound library")
+        entry = library.fetch(client, sound, variant, download_url, file_extension, expected_size)
+        install_method = library.install(entry, output_path)
+        file_size, sha256 = entry.size, entry.sha256
+        source = "library" if cached else "download"
+    else:
+        # Create directory if needed
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        
+        # Download file
+        logger.info(f"Downloading sound {sound['id']} to {output_path}")
+        download = client.download(download_url, output_path, expected_size=expected_size)
+        file_size, sha256 = download.size, download.sha256
+        install_method, source = "download", "download"
+    
+    return {
+        "success": True,
+        "sound_id": sound["id"],
+        "name": sound["name"],
+        "file_path": output_path,
+        "file_size_bytes": file_size,
+        "file_size_kb": round(file_size / 1024, 2),
+        "sha256": sha256,
+        "source": source,
+        "install_method": install_method,
+        "format": file_extension.replace(".", ""),
+        "sample_rate": sound.get("samplerate"),
+        "message": f"Downloaded: {sound['name']}"
+    }
+
+# search_sounds entry fields, in output order, read from raw API metadata
+SOUND_FIELDS = {
+    "id": lambda sound: sound["id"],
+    "name": lambda sound: sound.get("name", ""),
+    "description": lambda sound: sound.get("description", "")[:200],
+    "duration": lambda sound: sound.get("duration"),
+    "download_url": lambda sound: sound.get("download"),
+    "preview_url": lambda sound: sound.get("previews", {}).get("preview-hq-mp3"),
+    "username": lambda sound: sound.get("username"),
+    "license": lambda sound: sound.get("license"),
+    "type": lambda sound: sound.get("type"),
+    "samplerate": lambda sound: sound.get("samplerate"),
+    "tags": lambda sound: sound.get("tags", [])[:5],
+}
+
+def _projection(fields: list, known=SOUND_FIELDS) -> list:
+    """Validated field names to return, always including id; None means all"""
+    if not fields:
+        return None
+    unknown = [name for name in fields if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(known)})")
+    return ["id"] + [name for name in known if name in fields and name != "id"]
+
+def _format_sound(sound: dict, fields: list = None) -> dict:
+    """search_sounds entry for raw API (or locally indexed) metadata"""
+    return {name: SOUND_FIELDS[name](sound) for name in (fields or SOUND_FIELDS)}
 
 @mcp.tool()
+@offloaded
 def search_sounds(
     query: str,
     filter_license: str = "CC0",
     max_results: int = 10,
     min_duration: float = 0.1,
     max_duration: float = 5.0,
-    sort: str = "rating_desc"
+    sort: str = "rating_desc",
+    mode: str = "online",
+    fields: list[str] = None,
+    encoding: str = None
 ) -> str:
     """
     Search for sound effects on Freesound.org
@@ -86,66 +376,196 @@ def search_sounds(
         query: Search query (e.g., "button click", "terminal beep", "radio static")
         filter_license: License filter - "CC0" (public domain), "CC-BY" (attribution), 
                        "CC-BY-NC" (non-commercial), or "all"
-        max_results: Maximum number of results (1-150)
+        max_results: Maximum number of results; more than 150 follows further pages
         min_duration: Minimum sound duration in seconds
         max_duration: Maximum sound duration in seconds
         sort: Sort order - "rating_desc", "downloads_desc", "created_desc", "duration_asc"
+        mode: "online" queries Freesound; "offline" searches only the local index
+              of previously fetched sounds (BM25 ranked, sort is ignored);
+              "hybrid" answers locally when enough indexed sounds match every
+              query term and falls back to Freesound otherwise
+        fields: Result fields to return, e.g. ["id", "name", "duration"]
+                (id is always included); all fields by default
+        encoding: "pretty", "compact" or "ndjson" (a header line, then
+                  one line per sound); FREESOUND_RESPONSE_ENCODING by default
     
     Returns:
         JSON array of sound effects with download info
     """
     try:
-        # Build filter string
-        filters = [f"duration:[{min_duration} TO {max_duration}]"]
+        if mode not in ("online", "offline", "hybrid"):
+            return _error(f"Unknown mode: {mode}")
+        fields = _projection(fields)
         
-        if filter_license and filter_license != "all":
-            if filter_license == "CC0":
-                filters.append("license:\"Creative Commons 0\"")
-            elif filter_license == "CC-BY":
-                filters.append("license:\"Attribution\"")
-            elif filter_license == "CC-BY-NC":
-                filters.append("license:\"Attribution Noncommercial\"")
-        
-        # Make API request
-        params = {
-            "query": query,
-            "filter": " AND ".join(filters),
-            "sort": sort,
-            "page_size": min(max_results, 150),
-            "fields": "id,name,description,duration,download,previews,username,license,tags"
-        }
+        if mode != "online" and sound_index is not None:
+            limit = min(max_results, 150)
+            local = sound_index.search(query, filter_license, min_duration, max_duration,
+                                       limit, require_all_terms=(mode == "hybrid"))
+            if mode == "offline" or len(local) >= limit:
+                return _encode({
+                    "source": "local",
+                    "total_found": len(local),
+                    "returned": len(local),
+                    "sounds": [dict(_format_sound(sound, fields), score=round(score, 3))
+                               for score, sound in local]
+                }, encoding, items="sounds")
+        elif mode == "offline":
+            return _error("Local sound index is disabled")
         
-        result = make_api_request("search/text/", params)
+        if max_results > MAX_PAGE_SIZE:
+            params = _search_params(query, filter_license, max_results, min_duration,
+                                    max_duration, sort)
+            stream = client.search_stream(params, limit=max_results)
+            result = {"results": list(stream), "count": stream.count}
+        else:
+            result = _search(query, filter_license, max_results, min_duration, max_duration, sort)
         
         # Format results
-        sounds = []
-        for sound in result.get("results", []):
-            sounds.append({
-                "id": sound["id"],
-                "name": sound["name"],
-                "description": sound.get("description", "")[:200],
-                "duration": sound["duration"],
-                "download_url": sound["download"],
-                "preview_url": sound["previews"]["preview-hq-mp3"],
-                "username": sound["username"],
-                "license": sound["license"],
-                "tags": sound.get("tags", [])[:5]
-            })
+        sounds = [_format_sound(sound, fields) for sound in result.get("results", [])]
         
-        return json.dumps({
-            "total_found": result.get("count", 0),
+        return _encode({
+            "source": "network",
+            "total_found": result.get("count") or 0,
             "returned": len(sounds),
             "sounds": sounds
-        }, indent=2)
+        }, encoding, items="sounds")
         
     except Exception as e:
-        return json.dumps({"error": str(e)}, indent=2)
+        return _error(str(e))
+
+def _stream_chunk(cursor: str, entry: dict, chunk_size: int) -> str:
+    with entry["lock"]:
+        stream = entry["stream"]
+        chunk_size = max(1, chunk_size)
+        sounds = [_format_sound(sound, entry["fields"]) for sound in stream.take(chunk_size)]
+        entry["last_used"] = time.time()
+        # A short chunk or a reached limit means nothing is left to stream
+        done = (stream.exhausted or len(sounds) < chunk_size
+                or bool(stream.limit and stream.yielded >= stream.limit))
+    if done:
+        stream.close()
+        with streams_lock:
+            streams.pop(cursor, None)
+    return _encode({
+        "cursor": None if done else cursor,
+        "total_found": stream.count or 0,
+        "returned": len(sounds),
+        "streamed_so_far": stream.yielded,
+        "done": done,
+        "sounds": sounds
+    }, entry["encoding"], items="sounds")
+
+@mcp.tool()
+@offloaded
+def search_sounds_stream(
+    query: str,
+    filter_license: str = "CC0",
+    min_duration: float = 0.1,
+    max_duration: float = 5.0,
+    sort: str = "rating_desc",
+    limit: int = 1000,
+    chunk_size: int = 50,
+    fields: list[str] = None,
+    encoding: str = None
+) -> str:
+    """
+    Start a paginated search and return its first chunk of results
+    
+    Later chunks come from search_sounds_next with the returned cursor; the
+    next Freesound page is fetched in the background meanwhile, so results
+    can be acted on before the whole result set has arrived.
+    
+    Args:
+        query: Search query
+        filter_license: "CC0", "CC-BY", "CC-BY-NC", or "all"
+        min_duration: Minimum sound duration in seconds
+        max_duration: Maximum sound duration in seconds
+        sort: Sort order - "rating_desc", "downloads_desc", "created_desc", "duration_asc"
+        limit: Stop after this many results in total
+        chunk_size: Results per chunk
+        fields: Result fields to return (id is always included); all by default
+        encoding: "pretty", "compact" or "ndjson"; later chunks use the same
+                  fields and encoding unless search_sounds_next overrides them
+    
+    Returns:
+        JSON with a chunk of sounds, a cursor for the next chunk and a done flag
+    """
+    try:
+        fields = _projection(fields)
+        if encoding and encoding not in RESPONSE_ENCODINGS:
+            return _error(f"Unknown encoding: {encoding}")
+        now = time.time()
+        with streams_lock:
+            for cursor, entry in list(streams.items()):
+                if now - entry["last_used"] > STREAM_IDLE_SECONDS:
+                    streams.pop(cursor)["stream"].close()
+            if len(streams) >= MAX_OPEN_STREAMS:
+                return _error(f"Too many open searches (max {MAX_OPEN_STREAMS})")
+        
+        params = _search_params(query, filter_license, min(limit, MAX_PAGE_SIZE),
+                                min_duration, max_duration, sort)
+        cursor = uuid.uuid4().hex[:12]
+        entry = {"stream": client.search_stream(params, limit=limit),
+                 "lock": threading.Lock(), "last_used": now,
+                 "fields": fields, "encoding": encoding}
+        with streams_lock:
+            streams[cursor] = entry
+        return _stream_chunk(cursor, entry, chunk_size)
+        
+    except Exception as e:
+        return _error(str(e))
+
+@mcp.tool()
+@offloaded
+def search_sounds_next(
+    cursor: str,
+    chunk_size: int = 50,
+    fields: list[str] = None,
+    encoding: str = None
+) -> str:
+    """
+    Get the next chunk of a search started with search_sounds_stream
+    
+    Args:
+        cursor: Cursor returned by the previous chunk
+        chunk_size: Results per chunk
+        fields: Change the result fields for this and later chunks
+        encoding: Change the encoding for this and later chunks
+    
+    Returns:
+        JSON with a chunk of sounds, the cursor for the next chunk and a done flag
+    """
+    try:
+        with streams_lock:
+            entry = streams.get(cursor)
+        if entry is None:
+            return _error(f"Unknown or expired cursor: {cursor}")
+        # Bad arguments are reported without dropping the stream
+        if encoding and encoding not in RESPONSE_ENCODINGS:
+            return _error(f"Unknown encoding: {encoding}")
+        try:
+            projection = _projection(fields)
+        except ValueError as e:
+            return _error(str(e))
+        with entry["lock"]:
+            if projection:
+                entry["fields"] = projection
+            if encoding:
+                entry["encoding"] = encoding
+        return _stream_chunk(cursor, entry, chunk_size)
+        
+    except Exception as e:
+        with streams_lock:
+            streams.pop(cursor, None)
+        return _error(str(e))
 
 @mcp.tool()
+@offloaded
 def download_sound(
     sound_id: int,
     output_path: str,
-    use_preview: bool = False
+    use_preview: bool = False,
+    metadata: dict = None
 ) -> str:
     """
     Download a sound effect from Freesound
@@ -154,69 +574,41 @@ def download_sound(
         sound_id: Freesound sound ID (from search results)
         output_path: Local path to save the file (e.g., "src/main/res/raw/button_click.wav")
         use_preview: If True, download MP3 preview instead of original file
+        metadata: Optional search_sounds result for this sound; skips the
+                  extra metadata request when it has the download URLs
     
     Returns:
         JSON with download status and file info
     """
     try:
-        # Get sound details
-        params = {
-            "fields": "id,name,download,previews,type,filesize,samplerate,bitrate"
-        }
-        sound = make_api_request(f"sounds/{sound_id}/", params)
-        
-        # Choose download URL
-        if use_preview:
-            download_url = sound["previews"]["preview-hq-mp3"]
-            file_extension = ".mp3"
-        else:
-            download_url = sound["download"]
-            # Get file extension from type
-            file_type = sound.get("type", "wav")
-            file_extension = f".{file_type}" if not file_type.startswith(".") else file_type
-        
-        # Ensure output path has correct extension
-        if not output_path.endswith(file_extension):
-            output_path = os.path.splitext(output_path)[0] + file_extension
-        
-        # Create directory if needed
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Download file
-        logger.info(f"Downloading sound {sound_id} to {output_path}")
-        
-        # Add API token to download URL
-        download_url_with_token = f"{download_url}?token={FREESOUND_API_KEY}"
+        sound = _from_search_result(metadata) if metadata else {}
+        if not _has_download_fields(sound, use_preview) and library is not None:
+            # Already in the library: its stored metadata is enough to install
+            entry = library.lookup(sound_id, "preview" if use_preview else "original")
+            if entry is not None:
+                sound = dict(entry.metadata)
+        if not _has_download_fields(sound, use_preview):
+            # Get sound details
+            params = {"fields": DOWNLOAD_FIELDS}
+            sound = make_api_request(f"sounds/{sound_id}/", params)
+        sound.setdefault("id", sound_id)
         
-        urllib.request.urlretrieve(download_url_with_token, output_path)
-        
-        file_size = os.path.getsize(output_path)
-        
-        return json.dumps({
-            "success": True,
-            "sound_id": sound_id,
-            "name": sound["name"],
-            "file_path": output_path,
-            "file_size_bytes": file_size,
-            "file_size_kb": round(file_size / 1024, 2),
-            "format": file_extension.replace(".", ""),
-            "sample_rate": sound.get("samplerate"),
-            "message": f"Downloaded: {sound['name']}"
-        }, indent=2)
+        return _encode(_download_sound_file(sound, output_path, use_preview))
         
     except Exception as e:
-        return json.dumps({
-            "success": False,
-            "error": str(e)
-        }, indent=2)
+        return _error(str(e), success=False)
 
 @mcp.tool()
-def get_sound_details(sound_id: int) -> str:
+@offloaded
+def get_sound_details(sound_id: int, fields: list[str] = None, encoding: str = None) -> str:
     """
     Get detailed information about a specific sound
     
     Args:
         sound_id: Freesound sound ID
+        fields: Fields to return, e.g. ["duration", "samplerate", "channels"]
+                (id is always included); all fields by default
+        encoding: "pretty" or "compact"; FREESOUND_RESPONSE_ENCODING by default
     
     Returns:
         JSON with complete sound metadata
@@ -224,7 +616,7 @@ def get_sound_details(sound_id: int) -> str:
     try:
         sound = make_api_request(f"sounds/{sound_id}/")
         
-        return json.dumps({
+        details = {
             "id": sound["id"],
             "name": sound["name"],
             "description": sound.get("description", ""),
@@ -245,15 +637,240 @@ def get_sound_details(sound_id: int) -> str:
             "num_downloads": sound.get("num_downloads", 0),
             "avg_rating": sound.get("avg_rating", 0),
             "num_ratings": sound.get("num_ratings", 0)
-        }, indent=2)
+        }
+        fields = _projection(fields, known=details)
+        if fields:
+            details = {name: details[name] for name in fields}
+        return _encode(details, encoding)
+        
+    except Exception as e:
+        return _error(str(e))
+
+@mcp.tool()
+@offloaded
+def probe_sound(
+    sound_id: int,
+    use_preview: bool = False,
+    metadata: dict = None,
+    formats: list[str] = None,
+    min_sample_rate: int = 0,
+    max_channels: int = 0,
+    max_duration: float = 0.0
+) -> str:
+    """
+    Inspect a sound's audio header without downloading it
+    
+    Only the first few kilobytes are fetched (HTTP Range). Supports WAV, AIFF,
+    FLAC, MP3 and Ogg Vorbis/Opus.
+    
+    Args:
+        sound_id: Freesound sound ID
+        use_preview: Probe the MP3 preview instead of the original file
+        metadata: Optional search_sounds result for this sound (skips a metadata request)
+        formats: Acceptable formats, e.g. ["wav", "flac"]
+        min_sample_rate: Minimum acceptable sample rate in Hz
+        max_channels: Maximum acceptable channel count
+        max_duration: Maximum acceptable duration in seconds
+    
+    Returns:
+        JSON with format, sample rate, channels, bit depth, duration,
+        estimated decoded size and whether the requirements are met
+    """
+    try:
+        sound = _from_search_result(metadata) if metadata else {}
+        if not _has_download_fields(sound, use_preview):
+            sound = make_api_request(f"sounds/{sound_id}/", {"fields": DOWNLOAD_FIELDS})
+        
+        info = probe_url(client, _download_url(sound, use_preview))
+        requirements = AudioRequirements(formats=formats, min_sample_rate=min_sample_rate,
+                                         max_channels=max_channels, max_duration=max_duration)
+        reason = requirements.rejection(info)
+        return _encode({
+            "sound_id": sound_id,
+            **info.to_dict(),
+            "accepted": reason is None,
+            "rejection_reason": reason
+        })
         
     except Exception as e:
-        return json.dumps({"error": str(e)}, indent=2)
+        return _error(str(e))
+
+@mcp.tool()
+@offloaded
+def get_sounds_batch(sound_ids: list[int], fields: str = DOWNLOAD_FIELDS,
+                     encoding: str = None) -> str:
+    """
+    Get metadata for many sounds at once
+    
+    IDs are resolved with id:(a OR b ...) search filters, up to 100 per
+    request, instead of one request per sound.
+    
+    Args:
+        sound_ids: Freesound sound IDs
+        fields: Comma-separated metadata fields to return
+        encoding: "pretty", "compact" or "ndjson" (a header line, then one
+                  line per sound); FREESOUND_RESPONSE_ENCODING by default
+    
+    Returns:
+        JSON with metadata per found sound and the IDs that were not found
+    """
+    try:
+        requested = list(dict.fromkeys(int(sound_id) for sound_id in sound_ids))
+        sounds = client.get_sounds(requested, fields)
+        return _encode({
+            "found": len(sounds),
+            "missing": [sound_id for sound_id in requested if sound_id not in sounds],
+            "sounds": [sounds[sound_id] for sound_id in requested if sound_id in sounds]
+        }, encoding, items="sounds")
+        
+    except Exception as e:
+        return _error(str(e))
+
+def _download_url(sound: dict, use_preview: bool) -> str:
+    return sound["previews"]["preview-hq-mp3"] if use_preview else sound["download"]
+
+def _first_acceptable(candidates: list, use_preview: bool,
+                      requirements: AudioRequirements) -> tuple:
+    """Probe candidates in rank order; return (sound, rejections) for the first that passes"""
+    rejections = []
+    for sound in candidates:
+        try:
+            info = probe_url(client, _download_url(sound, use_preview))
+        except (ProbeError, FreesoundAPIError, OSError) as e:
+            rejections.append({"id": sound["id"], "reason": f"probe failed: {e}"})
+            continue
+        reason = requirements.rejection(info)
+        if reason is None:
+            return sound, rejections
+        rejections.append({"id": sound["id"], "reason": reason})
+    return None, rejections
+
+def _ranked(sounds: list, profile: TargetProfile) -> tuple:
+    """(sounds best first, {id: (score, features)}); Freesound's order if ranking fails"""
+    try:
+        ranked = ranker.rank(sounds, profile)
+    except FeatureError as e:
+        if str(e) not in ranking_warnings:
+            ranking_warnings.add(str(e))
+            logger.warning(f"Candidate ranking unavailable, keeping search order: {e}")
+        return sounds, {}
+    scores = {sound["id"]: (score, features) for score, sound, features in ranked
+              if score != float("inf")}
+    return [sound for _, sound, _ in ranked], scores
+
+def _fetch_curated_sound(sound_name: str, search_query: str, output_dir: str,
+                         use_preview: bool, requirements: AudioRequirements = None,
+                         candidates: int = 1, rank: bool = False) -> dict:
+    """Search for and download one curated sound; runs on a worker thread"""
+    logger.info(f"Searching for: {sound_name}")
+    profile = PROFILES.get(CURATED_PROFILES.get(sound_name)) if rank else None
+    search_result = _search(
+        query=search_query,
+        filter_license="CC0",
+        max_results=candidates if requirements or profile else 1,
+        min_duration=0.1,
+        max_duration=3.0,
+        sort="rating_desc"
+    )
+    
+    if not search_result.get("results"):
+        return {"name": sound_name, "reason": "No results found"}
+    
+    # Results already carry the download URLs
+    results, scores = search_result["results"], {}
+    if profile:
+        # Previews are scored against the slot's profile; only the winner is downloaded
+        results, scores = _ranked(results, profile)
+    rejections = []
+    if requirements:
+        # Read only each candidate's header until one qualifies
+        sound, rejections = _first_acceptable(results, use_preview, requirements)
+        if sound is None:
+            return {"name": sound_name, "reason": "No candidate met the audio requirements",
+                    "rejected": rejections}
+    else:
+        sound = results[0]
+    
+    output_path = os.path.join(output_dir, f"{sound_name}.wav")
+    download_result = _download_sound_file(sound, output_path, use_preview)
+    
+    entry = {
+        "name": sound_name,
+        "file_path": download_result["file_path"],
+        "size_kb": download_result["file_size_kb"],
+        "sound_name": sound["name"],
+        "license": sound["license"]
+    }
+    if rejections:
+        entry["rejected"] = rejections
+    if sound["id"] in scores:
+        score, features = scores[sound["id"]]
+        entry["rank_score"] = round(score, 3)
+        entry["features"] = features.to_dict()
+        entry["candidates_ranked"] = len(scores)
+    return entry
+
+# Curated search queries for Pip-Boy sounds
+PIP_BOY_SOUNDS = {
+    "button_click": "mechanical button click computer",
+    "terminal_type": "keyboard key press mechanical",
+    "terminal_beep": "computer beep terminal",
+    "terminal_boot": "computer startup boot sequence",
+    "page_turn": "interface swoosh transition",
+    "success_beep": "success beep confirmation",
+    "error_beep": "error beep warning",
+    "radio_static": "radio static white noise",
+    "radio_on": "radio power on",
+    "quest_complete": "success chime achievement",
+    "level_up": "power up level up",
+}
+
+# audio_features profile each curated sound is ranked against
+CURATED_PROFILES = {
+    "button_click": "click",
+    "terminal_type": "click",
+    "terminal_beep": "beep",
+    "terminal_boot": "boot",
+    "page_turn": "whoosh",
+    "success_beep": "beep",
+    "error_beep": "beep",
+    "radio_static": "static",
+    "radio_on": "click",
+    "quest_complete": "chime",
+    "level_up": "chime",
+}
+
+def _curated_download_summary(job) -> dict:
+    """The aggregated download_pip_boy_sounds result for a finished job"""
+    results = {
+        "job_id": job.job_id,
+        "downloaded": [],
+        "failed": [],
+        "total_size_kb": 0
+    }
+    for item in job.items.values():
+        if item.status == "done":
+            results["downloaded"].append(item.result)
+            results["total_size_kb"] += item.result["size_kb"]
+        elif item.status == "failed":
+            results["failed"].append({"name": item.name, "reason": item.error})
+    cancelled = [item.name for item in job.items.values() if item.status == "cancelled"]
+    if cancelled:
+        results["cancelled"] = cancelled
+    results["elapsed_seconds"] = job.to_dict(include_items=False)["elapsed_seconds"]
+    results["summary"] = f"Downloaded {len(results['downloaded'])}/{len(job.items)} sounds"
+    return results
 
 @mcp.tool()
+@offloaded
 def download_pip_boy_sounds(
     output_dir: str = "src/main/res/raw",
-    use_preview: bool = True
+    use_preview: bool = True,
+    min_sample_rate: int = 0,
+    max_channels: int = 0,
+    candidates: int = 5,
+    wait: bool = False,
+    rank: bool = True
 ) -> str:
     """
     Download a curated set of Pip-Boy style sound effects
@@ -264,95 +881,200 @@ def download_pip_boy_sounds(
     - Electronic beeps and boops
     - Radio static and tuning
     
+    Runs as a background job: the call returns a job ID at once, and
+    get_job_status reports each sound as it finishes. Sounds are fetched
+    concurrently on the job pool; API calls share the client's rate limiter.
+    
     Args:
         output_dir: Directory to save sounds (default: src/main/res/raw)
         use_preview: Use MP3 previews instead of full files (faster, smaller)
+        min_sample_rate: Skip candidates below this sample rate (0 = any)
+        max_channels: Skip candidates with more channels (0 = any)
+        candidates: Search results to rank (and probe, when requirements are set) per sound
+        wait: Block until every sound is done and return the full results
+        rank: Score each sound's candidates from their low-quality previews
+              and download the best match instead of the top search result
+              (needs NumPy; ffmpeg to decode MP3 previews)
     
     Returns:
-        JSON with download results for each sound
+        JSON with the job ID and status, or the download results if wait is set
     """
     try:
-        # Curated search queries for Pip-Boy sounds
-        sound_searches = {
-            "button_click": "mechanical button click computer",
-            "terminal_type": "keyboard key press mechanical",
-            "terminal_beep": "computer beep terminal",
-            "terminal_boot": "computer startup boot sequence",
-            "page_turn": "interface swoosh transition",
-            "success_beep": "success beep confirmation",
-            "error_beep": "error beep warning",
-            "radio_static": "radio static white noise",
-            "radio_on": "radio power on",
-            "quest_complete": "success chime achievement",
-            "level_up": "power up level up",
-        }
+        requirements = None
+        if min_sample_rate or max_channels:
+            requirements = AudioRequirements(min_sample_rate=min_sample_rate,
+                                             max_channels=max_channels)
         
-        results = {
-            "downloaded": [],
-            "failed": [],
-            "total_size_kb": 0
-        }
+        def fetch(sound_name: str, search_query: str) -> dict:
+            entry = _fetch_curated_sound(sound_name, search_query, output_dir,
+                                         use_preview, requirements, candidates, rank)
+            if "reason" in entry:
+                raise RuntimeError(entry["reason"])
+            logger.info(f"✓ {sound_name} ({entry['size_kb']} KB)")
+            return entry
         
-        for sound_name, search_query in sound_searches.items():
-            try:
-                # Search for sound
-                logger.info(f"Searching for: {sound_name}")
-                search_result = json.loads(search_sounds(
-                    query=search_query,
-                    filter_license="CC0",
-                    max_results=1,
-                    min_duration=0.1,
-                    max_duration=3.0,
-                    sort="rating_desc"
-                ))
-                
-                if search_result.get("returned", 0) == 0:
-                    results["failed"].append({
-                        "name": sound_name,
-                        "reason": "No results found"
-                    })
-                    continue
-                
-                # Get first result
-                sound = search_result["sounds"][0]
-                
-                # Download sound
-                output_path = os.path.join(output_dir, f"{sound_name}.wav")
-                download_result = json.loads(download_sound(
-                    sound_id=sound["id"],
-                    output_path=output_path,
-                    use_preview=use_preview
-                ))
-                
-                if download_result.get("success"):
-                    results["downloaded"].append({
-                        "name": sound_name,
-                        "file_path": download_result["file_path"],
-                        "size_kb": download_result["file_size_kb"],
-                        "sound_name": sound["name"],
-                        "license": sound["license"]
-                    })
-                    results["total_size_kb"] += download_result["file_size_kb"]
-                else:
-                    results["failed"].append({
-                        "name": sound_name,
-                        "reason": download_result.get("error", "Unknown error")
-                    })
-                    
-            except Exception as e:
-                results["failed"].append({
-                    "name": sound_name,
-                    "reason": str(e)
-                })
+        job = jobs.submit("download_pip_boy_sounds", PIP_BOY_SOUNDS, fetch)
+        if not wait:
+            return _encode({
+                **job.to_dict(include_items=False),
+                "message": f"Poll get_job_status('{job.job_id}') for progress"
+            })
+        
+        job.done.wait()
+        return _encode(_curated_download_summary(job))
+        
+    except Exception as e:
+        return _error(str(e))
+
+@mcp.tool()
+@offloaded
+def rank_sounds(
+    query: str,
+    profile: str = "click",
+    target: dict = None,
+    candidates: int = 10,
+    filter_license: str = "CC0",
+    min_duration: float = 0.1,
+    max_duration: float = 5.0
+) -> str:
+    """
+    Rank search results by how closely they sound like a target profile
+    
+    Low-quality previews of the top candidates are fetched concurrently;
+    duration, RMS level, spectral centroid, onset sharpness and leading
+    silence are computed in one batch and cached per sound.
+    
+    Args:
+        query: Search query
+        profile: "click", "beep", "chime", "whoosh", "static", "hum" or "boot"
+        target: Custom profile instead, e.g. {"duration": 0.2, "centroid_hz": 2500,
+                "onset_sharpness": 15, "rms_db": -18, "max_leading_silence": 0.02}
+        candidates: Search results to rank (at most 150)
+        filter_license: "CC0", "CC-BY", "CC-BY-NC", or "all"
+        min_duration: Minimum sound duration in seconds
+        max_duration: Maximum sound duration in seconds
+    
+    Returns:
+        JSON with the candidates best first, each with its score and features
+    """
+    try:
+        if target:
+            target_profile = TargetProfile(**target)
+        elif profile in PROFILES:
+            target_profile = PROFILES[profile]
+        else:
+            return _error(f"Unknown profile: {profile} (use one of {', '.join(PROFILES)})")
         
-        results["summary"] = f"Downloaded {len(results['downloaded'])}/{len(sound_searches)} sounds"
+        result = _search(query, filter_license, candidates, min_duration, max_duration)
+        ranked = ranker.rank(result.get("results", []), target_profile)
+        return _encode({
+            "profile": target or profile,
+            "ranked": len(ranked),
+            "sounds": [
+                dict(_format_sound(sound, ["id", "name", "duration", "preview_url", "license"]),
+                     score=None if score == float("inf") else round(score, 3),
+                     **({"features": features.to_dict()} if score != float("inf")
+                        else {"feature_error": features}))
+                for score, sound, features in ranked
+            ]
+        })
         
-        return json.dumps(results, indent=2)
+    except Exception as e:
+        return _error(str(e))
+
+@mcp.tool()
+@offloaded
+def sync_sounds(
+    manifest_path: str = "sounds.lock.json",
+    update: list[str] = None,
+    wait: bool = False
+) -> str:
+    """
+    Bring the app's sounds in line with the sound lockfile
+    
+    Every locked file is checked against its pinned SHA-256 in parallel;
+    only missing, changed or not yet pinned sounds are fetched, as a
+    background job. A new lockfile starts from the curated Pip-Boy queries.
+    
+    Args:
+        manifest_path: Lockfile path (see sound_manifest.py)
+        update: Names to search for again and re-pin
+        wait: Block until the sync is done and return the full results
+    
+    Returns:
+        JSON with the job ID and status, or the per-sound results if wait is set
+    """
+    try:
+        manifest = SoundManifest.load(manifest_path)
+        if not manifest.sounds:
+            manifest.add_queries(PIP_BOY_SOUNDS)
+        update = set(update or ())
+        unknown = update - set(manifest.sounds)
+        if unknown:
+            return _error(f"Not in the manifest: {', '.join(sorted(unknown))}")
+        
+        statuses = verify(manifest, JOB_WORKERS)
+        todo = {name: name in update for name, status in statuses.items()
+                if status != "ok" or name in update}
+        
+        def fetch(name: str, update_entry: bool) -> dict:
+            entry, source = sync_entry(client, library, manifest, name, update_entry)
+            manifest.record(name, entry)
+            manifest.save()
+            return {"status": statuses[name], "sound_id": entry.sound_id,
+                    "file_path": str(manifest.file_path(name, entry)), "source": source}
+        
+        job = jobs.submit("sync_sounds", todo, fetch)
+        if wait:
+            job.done.wait()
+        result = {**job.to_dict(include_items=wait), "up_to_date": len(statuses) - len(todo)}
+        if not wait and todo:
+            result["message"] = f"Poll get_job_status('{job.job_id}') for progress"
+        return _encode(result)
         
     except Exception as e:
-        return json.dumps({"error": str(e)}, indent=2)
+        return _error(str(e))
+
+@mcp.tool()
+@offloaded
+def get_job_status(job_id: str, include_items: bool = True) -> str:
+    """
+    Report progress of a background job
+    
+    Args:
+        job_id: ID returned by a bulk tool such as download_pip_boy_sounds
+        include_items: Include per-item status, results and errors
+    
+    Returns:
+        JSON with the job status, progress counts and (partial) results
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return _error(f"Unknown or expired job: {job_id}")
+    status = job.to_dict(include_items)
+    if job.finished is not None and job.kind == "download_pip_boy_sounds":
+        status["result"] = _curated_download_summary(job)
+    return _encode(status)
+
+@mcp.tool()
+@offloaded
+def cancel_job(job_id: str) -> str:
+    """
+    Cancel a background job; sounds already downloading are allowed to finish
+    
+    Args:
+        job_id: ID returned by a bulk tool
+    
+    Returns:
+        JSON with the job status after the cancel request
+    """
+    job = jobs.cancel(job_id)
+    if job is None:
+        return _error(f"Unknown or expired job: {job_id}")
+    return _encode(job.to_dict(include_items=False))
 
 @mcp.tool()
+@offloaded
 def get_api_status() -> str:
     """
     Check Freesound API connection and get API key status
@@ -361,18 +1083,18 @@ def get_api_status() -> str:
         JSON with API status information
     """
     if not FREESOUND_API_KEY:
-        return json.dumps({
-            "connected": False,
-            "error": "FREESOUND_API_KEY not set",
-            "instructions": "Get your free API key at: https://freesound.org/apiv2/apply/",
-            "setup_steps": [
+        return _error(
+            "FREESOUND_API_KEY not set",
+            connected=False,
+            instructions="Get your free API key at: https://freesound.org/apiv2/apply/",
+            setup_steps=[
                 "1. Go to https://freesound.org/apiv2/apply/",
                 "2. Create account or login",
                 "3. Request API key (instant approval)",
                 "4. Set environment variable: FREESOUND_API_KEY=your_key",
                 "5. Restart Cursor"
             ]
-        }, indent=2)
+        )
     
     try:
         # Test API connection
@@ -385,21 +1107,69 @@ def get_api_status() -> str:
             "sounds_count": result.get("num_sounds", 0),
             "api_key": FREESOUND_API_KEY[:8] + "..." + FREESOUND_API_KEY[-4:],
             "message": "✓ Freesound API connected successfully!"
-        }, indent=2)
+        })
         
     except Exception as e:
-        return json.dumps({
-            "connected": False,
-            "error": str(e),
-            "api_key_set": True,
-            "troubleshooting": [
+        return _error(
+            str(e),
+            connected=False,
+            api_key_set=True,
+            troubleshooting=[
                 "- Check if API key is valid",
                 "- Ensure you have internet connection",
                 "- API key may be pending approval"
             ]
-        }, indent=2)
+        )
+
+@mcp.tool()
+@offloaded
+def get_cache_stats(clear: bool = False) -> str:
+    """
+    Show response cache statistics (hits, misses, revalidations, size) and
+    request counters (coalesced calls, 429s, connection reuse)
+    
+    Args:
+        clear: Empty the cache after reporting
+    
+    Returns:
+        JSON with cache and request statistics
+    """
+    stats = {"requests": client.request_stats()}
+    if cache is None:
+        stats["cache"] = {"enabled": False}
+        return _encode(stats)
+    
+    stats["cache"] = {"enabled": True, **cache.stats()}
+    if clear:
+        cache.clear()
+        stats["cache"]["cleared"] = True
+    return _encode(stats)
+
+@mcp.tool()
+@offloaded
+def get_server_metrics(format: str = "json") -> str:
+    """
+    Show latency histograms and counters for this server
+    
+    Tool latency (and time queued for a worker), upstream latency per call
+    type and API endpoint, connection setup time, bytes transferred,
+    errors, and cache lookups split into hits, revalidations and misses.
+    
+    Args:
+        format: "json" (p50/p95/p99 in milliseconds) or "prometheus" (text exposition)
+    
+    Returns:
+        Metrics as JSON, or Prometheus text format
+    """
+    if format == "prometheus":
+        return metrics.prometheus()
+    return _encode(metrics.snapshot())
 
 if __name__ == "__main__":
+    if FREESOUND_METRICS_FILE:
+        metrics.start_textfile_writer(FREESOUND_METRICS_FILE)
+        logger.info(f"Writing metrics to {FREESOUND_METRICS_FILE}")
+    
     # Run the MCP server
     logger.info("Starting Freesound MCP Server...")
     logger.info(f"API Key configured: {bool(FREESOUND_API_KEY)}")
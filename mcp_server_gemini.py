@@ -2,16 +2,32 @@
 """
 Gemini Image Generator MCP Server
 A Model Context Protocol server for generating images using Google's Gemini AI
+
+Batches of prompts run as background jobs (generate_images), polled with
+get_job_status and stopped with cancel_job. Tool and Gemini API latencies
+are reported by get_server_metrics. Source images uploaded for
+transform_image_from_file are reused by content hash until they expire.
+Text-to-image results are cached on disk (image_cache.py), so an unchanged
+prompt is served without calling Gemini.
 """
 
 import os
 import sys
+import time
+import asyncio
 import base64
+import hashlib
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+from image_cache import generate_cached, open_image_cache
+from mcp_jobs import JobManager
+from mcp_metrics import Metrics
+
 try:
-    import google.generativeai as genai
     from mcp.server.fastmcp import FastMCP
 except ImportError as e:
     print(f"Error: Required packages not installed: {e}", file=sys.stderr)
@@ -21,29 +37,160 @@ except ImportError as e:
 # Initialize FastMCP server
 mcp = FastMCP("Gemini Image Generator")
 
-# Configuration
+# Configuration (the directory is created when the first image is saved)
 OUTPUT_DIR = Path(os.getenv("OUTPUT_IMAGE_PATH", "./docs/images"))
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Get API key from environment
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
+if not GEMINI_API_KEY:
     print("Warning: GEMINI_API_KEY not set. Image generation will fail.", file=sys.stderr)
 
+# The Gemini SDK takes far longer to import than the server takes to start,
+# so it is imported and configured by the first tool call that needs it
+_genai = None
+_genai_lock = threading.Lock()
 
-@mcp.tool()
-def generate_image_from_text(prompt: str, filename: Optional[str] = None) -> dict:
+
+def get_genai():
+    """The configured google.generativeai module"""
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            try:
+                import google.generativeai as genai
+            except ImportError as e:
+                raise RuntimeError(f"{e}. Install with: pip install google-generativeai")
+            genai.configure(api_key=GEMINI_API_KEY)
+            _genai = genai
+        return _genai
+
+# Generated images by model, prompt and parameters; opened by the first
+# generation so importing the server writes nothing
+IMAGE_MODEL = 'gemini-2.0-flash-exp'
+TEXT_TO_IMAGE_INSTRUCTION = "Generate this as a high-quality image. Do not include any text in the output."
+_image_cache = None
+_image_cache_opened = False
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """The shared ImageCache, or None when GEMINI_IMAGE_CACHE=0"""
+    global _image_cache, _image_cache_opened
+    with _image_cache_lock:
+        if not _image_cache_opened:
+            _image_cache = open_image_cache()
+            _image_cache_opened = True
+        return _image_cache
+
+# Interactive Gemini calls take seconds; they run on this pool so that the
+# event loop keeps answering get_job_status / cancel_job meanwhile
+# (GEMINI_TOOL_WORKERS concurrent calls)
+tool_executor = ThreadPoolExecutor(max_workers=int(os.getenv("GEMINI_TOOL_WORKERS", "4")),
+                                   thread_name_prefix="gemini-tool")
+
+# Background jobs for batch generation (GEMINI_JOB_WORKERS concurrent requests)
+jobs = JobManager(max_workers=int(os.getenv("GEMINI_JOB_WORKERS", "4")),
+                  thread_name_prefix="gemini-job")
+
+# Latency/byte/error metrics; GEMINI_METRICS_FILE also writes them in
+# Prometheus text format for node_exporter's textfile collector
+metrics = Metrics("gemini_mcp")
+GEMINI_METRICS_FILE = os.getenv("GEMINI_METRICS_FILE", "")
+metrics.add_collector(lambda: {"jobs_running": sum(1 for job in jobs.jobs() if job.finished is None)})
+
+# Source images already uploaded to the Files API, by SHA-256 of their
+# content: sha256 -> (remote file, expiry timestamp). Uploads live for 48
+# hours, so iterating on transforms of one image uploads it once.
+UPLOAD_TTL_SECONDS = 47 * 60 * 60   # assumed when the API reports no expiration
+UPLOAD_EXPIRY_MARGIN = 10 * 60      # stop reusing a file this close to expiring
+uploads = {}
+uploads_lock = threading.Lock()
+# Striped so the lock table stays fixed-size however many images pass through
+UPLOAD_LOCK_STRIPES = 64
+upload_locks = [threading.Lock() for _ in range(UPLOAD_LOCK_STRIPES)]
+metrics.add_collector(lambda: {"uploads_cached": len(uploads)})
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _upload_expiry(uploaded_file) -> float:
+    expiration = getattr(uploaded_file, "expiration_time", None)
+    try:
+        return expiration.timestamp()
+    except (AttributeError, TypeError, ValueError, OverflowError):
+        return time.time() + UPLOAD_TTL_SECONDS
+
+
+def get_uploaded_file(image_path: Path) -> tuple:
+    """(remote file, sha256, reused) for image_path; uploads only new content
+
+    Concurrent calls for the same content wait for one upload.
     """
-    Generate an image from a text prompt using Gemini AI.
+    digest = _file_sha256(image_path)
+    with upload_locks[int(digest, 16) % UPLOAD_LOCK_STRIPES]:
+        now = time.time()
+        with uploads_lock:
+            cached = uploads.get(digest)
+        if cached and cached[1] - UPLOAD_EXPIRY_MARGIN > now:
+            metrics.inc("upload_cache_total", result="hit")
+            return cached[0], digest, True
+        metrics.inc("upload_cache_total", result="expired" if cached else "miss")
+        
+        genai = get_genai()
+        with metrics.timer("upstream_seconds", errors="upstream_errors_total", call="upload_file"):
+            uploaded_file = genai.upload_file(path=str(image_path))
+        metrics.inc("upstream_bytes_sent_total", image_path.stat().st_size, call="upload_file")
+        with uploads_lock:
+            for key in [key for key, (_, expires) in uploads.items() if expires <= now]:
+                del uploads[key]
+            uploads[digest] = (uploaded_file, _upload_expiry(uploaded_file))
+        return uploaded_file, digest, False
+
+
+def forget_upload(digest: str) -> None:
+    with uploads_lock:
+        uploads.pop(digest, None)
+
+
+def instrumented(func):
+    """Record a tool's latency and failed results (success: False)"""
+    return metrics.instrument_tool(
+        func, is_error=lambda result: isinstance(result, dict) and result.get("success") is False
+    )
+
+
+def offloaded(func):
+    """Expose a blocking, instrumented tool as an async handler run on tool_executor
+
+    FastMCP calls plain functions on the event loop thread, where one Gemini
+    request would stall every other tool call. Time spent queued for a
+    worker is recorded separately from the tool's own latency.
+    """
+    tool = instrumented(func)
     
-    Args:
-        prompt: Text description of the image to generate
-        filename: Optional filename (without extension). If not provided, will be auto-generated.
+    @functools.wraps(func)
+    async def handler(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        queued = time.perf_counter()
+        
+        def run():
+            metrics.observe("tool_queue_seconds", time.perf_counter() - queued, tool=func.__name__)
+            return tool(*args, **kwargs)
+        
+        return await loop.run_in_executor(tool_executor, run)
+    return handler
+
+
+def _generate_image(prompt: str, filename: Optional[str], use_cache: bool) -> dict:
+    """Body of generate_image_from_text, shared with generate_images jobs
     
-    Returns:
-        Dictionary with 'success', 'message', 'file_path', and 'base64_data' (if successful)
+    Not instrumented itself: job items must not count as interactive tool calls.
     """
     if not GEMINI_API_KEY:
         return {
@@ -51,44 +198,60 @@ def generate_image_from_text(prompt: str, filename: Optional[str] = None) -> dic
             "message": "GEMINI_API_KEY environment variable not set"
         }
     
-    try:
+    def generate() -> Optional[bytes]:
         # Use Gemini 2.0 Flash Experimental for image generation
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        genai = get_genai()
+        model = genai.GenerativeModel(IMAGE_MODEL)
         
         # Generate the image
-        response = model.generate_content([
-            prompt,
-            {"text": "Generate this as a high-quality image. Do not include any text in the output."}
-        ])
+        with metrics.timer("upstream_seconds", errors="upstream_errors_total", call="generate_content"):
+            response = model.generate_content([
+                prompt,
+                {"text": TEXT_TO_IMAGE_INSTRUCTION}
+            ])
         
         # Check for image data in response
         if hasattr(response, 'parts'):
             for part in response.parts:
                 if hasattr(part, 'inline_data') and part.inline_data:
-                    # Get image data
                     image_data = part.inline_data.data
-                    
-                    # Generate filename if not provided
-                    if not filename:
-                        # Create filename from prompt (first 30 chars, sanitized)
-                        safe_prompt = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in prompt[:30])
-                        filename = safe_prompt.strip().replace(' ', '_').lower()
-                    
-                    # Save the image
-                    output_path = OUTPUT_DIR / f"{filename}.png"
-                    output_path.write_bytes(image_data)
-                    
-                    # Encode as base64 for return
-                    base64_data = base64.b64encode(image_data).decode('utf-8')
-                    
-                    return {
-                        "success": True,
-                        "message": f"Image generated successfully",
-                        "file_path": str(output_path),
-                        "filename": f"{filename}.png",
-                        "size_bytes": len(image_data),
-                        "base64_preview": base64_data[:100] + "..." if len(base64_data) > 100 else base64_data
-                    }
+                    metrics.inc("upstream_bytes_received_total", len(image_data), call="generate_content")
+                    return image_data
+        return None
+    
+    try:
+        image_cache = get_image_cache()
+        image_data, cached = generate_cached(
+            image_cache, IMAGE_MODEL, prompt, {"instruction": TEXT_TO_IMAGE_INSTRUCTION},
+            generate, source="mcp_server_gemini", refresh=not use_cache
+        )
+        if image_cache is not None:
+            metrics.inc("image_cache_total", result="hit" if cached else "miss")
+        
+        if image_data is not None:
+            # Generate filename if not provided
+            if not filename:
+                # Create filename from prompt (first 30 chars, sanitized)
+                safe_prompt = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in prompt[:30])
+                filename = safe_prompt.strip().replace(' ', '_').lower()
+            
+            # Save the image
+            OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+            output_path = OUTPUT_DIR / f"{filename}.png"
+            output_path.write_bytes(image_data)
+            
+            # Encode as base64 for return
+            base64_data = base64.b64encode(image_data).decode('utf-8')
+            
+            return {
+                "success": True,
+                "message": "Image served from cache" if cached else "Image generated successfully",
+                "file_path": str(output_path),
+                "filename": f"{filename}.png",
+                "size_bytes": len(image_data),
+                "cached": cached,
+                "base64_preview": base64_data[:100] + "..." if len(base64_data) > 100 else base64_data
+            }
         
         # No image data found
         return {
@@ -104,6 +267,27 @@ def generate_image_from_text(prompt: str, filename: Optional[str] = None) -> dic
 
 
 @mcp.tool()
+@offloaded
+def generate_image_from_text(prompt: str, filename: Optional[str] = None, use_cache: bool = True) -> dict:
+    """
+    Generate an image from a text prompt using Gemini AI.
+    
+    An image already generated from the same prompt is reused from the
+    on-disk cache instead of calling Gemini again.
+    
+    Args:
+        prompt: Text description of the image to generate
+        filename: Optional filename (without extension). If not provided, will be auto-generated.
+        use_cache: False to generate a new image and replace the cached one
+    
+    Returns:
+        Dictionary with 'success', 'message', 'file_path', 'cached', and 'base64_data' (if successful)
+    """
+    return _generate_image(prompt, filename, use_cache)
+
+
+@mcp.tool()
+@offloaded
 def transform_image_from_file(image_file_path: str, prompt: str, filename: Optional[str] = None) -> dict:
     """
     Transform an existing image based on a text prompt using Gemini AI.
@@ -123,7 +307,7 @@ def transform_image_from_file(image_file_path: str, prompt: str, filename: Optio
         }
     
     try:
-        # Read the input image
+        # Check the input image
         image_path = Path(image_file_path)
         if not image_path.exists():
             return {
@@ -131,20 +315,29 @@ def transform_image_from_file(image_file_path: str, prompt: str, filename: Optio
                 "message": f"Image file not found: {image_file_path}"
             }
         
-        image_data = image_path.read_bytes()
-        
         # Use Gemini for image transformation
+        genai = get_genai()
         model = genai.GenerativeModel('gemini-2.0-flash-exp')
         
-        # Upload the image
-        uploaded_file = genai.upload_file(path=str(image_path))
+        def transform(uploaded_file):
+            with metrics.timer("upstream_seconds", errors="upstream_errors_total", call="generate_content"):
+                return model.generate_content([
+                    uploaded_file,
+                    prompt,
+                    {"text": "Transform the image according to the prompt. Output only the transformed image."}
+                ])
         
-        # Generate transformation
-        response = model.generate_content([
-            uploaded_file,
-            prompt,
-            {"text": "Transform the image according to the prompt. Output only the transformed image."}
-        ])
+        # Upload the image, unless the same content was uploaded recently
+        uploaded_file, digest, upload_reused = get_uploaded_file(image_path)
+        try:
+            response = transform(uploaded_file)
+        except Exception:
+            if not upload_reused:
+                raise
+            # The remote file may have been deleted early; upload it again once
+            forget_upload(digest)
+            uploaded_file, digest, upload_reused = get_uploaded_file(image_path)
+            response = transform(uploaded_file)
         
         # Check for image data in response
         if hasattr(response, 'parts'):
@@ -152,12 +345,14 @@ def transform_image_from_file(image_file_path: str, prompt: str, filename: Optio
                 if hasattr(part, 'inline_data') and part.inline_data:
                     # Get transformed image data
                     new_image_data = part.inline_data.data
+                    metrics.inc("upstream_bytes_received_total", len(new_image_data), call="generate_content")
                     
                     # Generate filename if not provided
                     if not filename:
                         filename = f"{image_path.stem}_transformed"
                     
                     # Save the transformed image
+                    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
                     output_path = OUTPUT_DIR / f"{filename}.png"
                     output_path.write_bytes(new_image_data)
                     
@@ -170,6 +365,7 @@ def transform_image_from_file(image_file_path: str, prompt: str, filename: Optio
                         "file_path": str(output_path),
                         "filename": f"{filename}.png",
                         "size_bytes": len(new_image_data),
+                        "upload_reused": upload_reused,
                         "base64_preview": base64_data[:100] + "..." if len(base64_data) > 100 else base64_data
                     }
         
@@ -187,6 +383,94 @@ def transform_image_from_file(image_file_path: str, prompt: str, filename: Optio
 
 
 @mcp.tool()
+@instrumented
+def generate_images(prompts: dict[str, str], use_cache: bool = True) -> dict:
+    """
+    Generate several images in the background.
+    
+    Returns immediately with a job ID; poll get_job_status for each image's
+    result as it finishes. Prompts already in the image cache finish
+    without calling Gemini.
+    
+    Args:
+        prompts: Mapping of output filename (without extension) to prompt
+        use_cache: False to regenerate every image and replace the cached ones
+    
+    Returns:
+        Dictionary with 'success', 'job_id' and the job's initial status
+    """
+    if not GEMINI_API_KEY:
+        return {
+            "success": False,
+            "message": "GEMINI_API_KEY environment variable not set"
+        }
+    if not prompts:
+        return {
+            "success": False,
+            "message": "No prompts given"
+        }
+    
+    def generate(filename: str, prompt: str) -> dict:
+        result = _generate_image(prompt, filename, use_cache)
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        # The preview is only useful for a single interactive call
+        result.pop("base64_preview", None)
+        return result
+    
+    job = jobs.submit("generate_images", prompts, generate)
+    return {
+        "success": True,
+        "message": f"Generating {len(prompts)} images; poll get_job_status('{job.job_id}')",
+        **job.to_dict(include_items=False)
+    }
+
+
+@mcp.tool()
+@instrumented
+def get_job_status(job_id: str, include_items: bool = True) -> dict:
+    """
+    Get the progress of a background job.
+    
+    Args:
+        job_id: ID returned by generate_images
+        include_items: Include each image's status, result or error
+    
+    Returns:
+        Dictionary with 'success', 'status', 'progress' and (partial) results
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return {
+            "success": False,
+            "message": f"Unknown or expired job: {job_id}"
+        }
+    return {"success": True, **job.to_dict(include_items)}
+
+
+@mcp.tool()
+@instrumented
+def cancel_job(job_id: str) -> dict:
+    """
+    Cancel a background job. Images already being generated are allowed to finish.
+    
+    Args:
+        job_id: ID returned by generate_images
+    
+    Returns:
+        Dictionary with 'success' and the job's status
+    """
+    job = jobs.cancel(job_id)
+    if job is None:
+        return {
+            "success": False,
+            "message": f"Unknown or expired job: {job_id}"
+        }
+    return {"success": True, **job.to_dict(include_items=False)}
+
+
+@mcp.tool()
+@instrumented
 def get_output_directory() -> dict:
     """
     Get the current output directory for generated images.
@@ -203,6 +487,7 @@ def get_output_directory() -> dict:
 
 
 @mcp.tool()
+@instrumented
 def list_generated_images() -> dict:
     """
     List all images in the output directory.
@@ -236,11 +521,31 @@ def list_generated_images() -> dict:
         }
 
 
+@mcp.tool()
+def get_server_metrics(format: str = "json") -> dict:
+    """
+    Get latency histograms and counters for this server.
+    
+    Args:
+        format: "json" (p50/p95/p99 in milliseconds) or "prometheus" (text exposition)
+    
+    Returns:
+        Dictionary with 'success' and 'histograms', 'counters' and 'gauges',
+        or 'prometheus' holding the text format
+    """
+    if format == "prometheus":
+        return {"success": True, "prometheus": metrics.prometheus()}
+    return {"success": True, **metrics.snapshot()}
+
+
 # Run the server
 if __name__ == "__main__":
     print(f"Starting Gemini Image Generator MCP Server", file=sys.stderr)
     print(f"Output directory: {OUTPUT_DIR.absolute()}", file=sys.stderr)
     print(f"API Key configured: {'Yes' if GEMINI_API_KEY else 'No'}", file=sys.stderr)
+    if GEMINI_METRICS_FILE:
+        metrics.start_textfile_writer(GEMINI_METRICS_FILE)
+        print(f"Metrics file: {GEMINI_METRICS_FILE}", file=sys.stderr)
     
     # Run the FastMCP server
     mcp.run()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Pipeline Definition
+Declarative stages, tasks, resource budgets and policies for
+build_optimization_pipeline.py
+
+Pipelines are TOML (pipeline.toml) or JSON files with the same structure;
+see pipeline.toml in the project root for the annotated default.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# Keys that cascade from [defaults] to a stage and from a stage to its tasks
+TASK_DEFAULTS = {
+    "cpus": 1.0,
+    "memory_mb": 4096,
+    "timeout": 300.0,
+    "adaptive_timeout": True,
+    "timeout_factor": 4.0,
+    "min_timeout": 60.0,
+    "max_timeout": 1800.0,
+    "retries": 0,
+    "retry_backoff": 10.0,
+}
+
+TASK_KINDS = ("gradle", "command")
+BUILTINS = ("validate_project", "build_assets", "prepare_deployment")
+
+@dataclass
+class TimeoutPolicy:
+    timeout: float = 300.0
+    adaptive: bool = True
+    factor: float = 4.0
+    min_timeout: float = 60.0
+    max_timeout: float = 1800.0
+
+    def resolve(self, expected: Optional[float], worst: Optional[float]) -> float:
+        """Fixed timeout until there is history, then a multiple of the typical run"""
+        if not self.adaptive or expected is None:
+            return self.timeout
+        budget = max(expected * self.factor, (worst or 0.0) * 1.5)
+        return min(max(budget, self.min_timeout), self.max_timeout)
+
+@dataclass
+class RetryPolicy:
+    retries: int = 0
+    backoff: float = 10.0  # seconds before the first retry, doubled after each
+
+    def delay(self, attempt: int) -> float:
+        return self.backoff * (2 ** attempt)
+
+@dataclass
+class TaskSpec:
+    args: List[str]
+    kind: str = "gradle"
+    when: List[str] = field(default_factory=list)
+    cpus: float = 1.0
+    memory_mb: int = 4096
+    timeout: TimeoutPolicy = field(default_factory=TimeoutPolicy)
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    allow_failure: bool = False
+
+    def key(self, variant: str) -> str:
+        return " ".join(self.resolved_args(variant))
+
+    def resolved_args(self, variant: str) -> List[str]:
+        return [arg.replace("{variant}", variant) for arg in self.args]
+
+@dataclass
+class StageSpec:
+    name: str
+    description: str = ""
+    builtin: Optional[str] = None
+    tasks: List[TaskSpec] = field(default_factory=list)
+    depends_on: List[str] = field(default_factory=list)
+    when: List[str] = field(default_factory=list)
+    budget_cpus: float = 0.0        # 0 = whole host budget
+    budget_memory_mb: int = 0
+    max_parallel: int = 1
+
+@dataclass
+class PipelineSpec:
+    stages: List[StageSpec]
+    host_cpus: float
+    host_memory_mb: int
+    validation_stages: List[str] = field(default_factory=list)
+    speculative_stages: List[str] = field(default_factory=list)
+    source: Optional[Path] = None
+
+    @classmethod
+    def load(cls, path: Path) -> "PipelineSpec":
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Pipeline definition not found: {path}")
+        if path.suffix == ".json":
+            with open(path) as f:
+                data = json.load(f)
+        else:
+            if tomllib is None:
+                raise RuntimeError("TOML pipelines need Python 3.11+; use a .json definition")
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        spec = cls.from_dict(data)
+        spec.source = path
+        return spec
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PipelineSpec":
+        defaults = dict(TASK_DEFAULTS)
+        defaults.update(_pick(data.get("defaults", {}), TASK_DEFAULTS))
+
+        resources = data.get("resources", {})
+        host_cpus = float(resources.get("cpus") or os.cpu_count() or 1)
+        host_memory_mb = int(resources.get("memory_mb") or _physical_memory_mb())
+
+        stages = []
+        previous = None
+        for raw in data.get("stages", []):
+            if "name" not in raw:
+                raise ValueError("Every pipeline stage needs a name")
+            stage_defaults = dict(defaults)
+            stage_defaults.update(_pick(raw, TASK_DEFAULTS))
+            budget = raw.get("budget", {})
+            stage = StageSpec(
+                name=raw["name"],
+                description=raw.get("description", ""),
+                builtin=raw.get("builtin"),
+                tasks=[_parse_task(task, stage_defaults) for task in raw.get("tasks", [])],
+                depends_on=list(raw.get("depends_on", [previous] if previous else [])),
+                when=_as_list(raw.get("when")),
+                budget_cpus=float(budget.get("cpus", 0)),
+                budget_memory_mb=int(budget.get("memory_mb", 0)),
+                max_parallel=int(raw.get("max_parallel", 1)),
+            )
+            if stage.builtin and stage.builtin not in BUILTINS:
+                raise ValueError(f"Stage {stage.name}: unknown builtin {stage.builtin!r}")
+            stages.append(stage)
+            previous = stage.name
+
+        speculation = data.get("speculation", {})
+        spec = cls(
+            stages=stages,
+            host_cpus=host_cpus,
+            host_memory_mb=host_memory_mb,
+            validation_stages=list(speculation.get("validation_stages", [])),
+            speculative_stages=list(speculation.get("speculative_stages", [])),
+        )
+        spec._validate()
+        return spec
+
+    def stage(self, name: str) -> StageSpec:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def ancestors(self, name: str) -> Set[str]:
+        """Every stage that must finish before this one, transitively"""
+        found: Set[str] = set()
+        todo = list(self.stage(name).depends_on)
+        while todo:
+            current = todo.pop()
+            if current not in found:
+                found.add(current)
+                todo.extend(self.stage(current).depends_on)
+        return found
+
+    def downstream_of(self, names: Set[str]) -> Set[str]:
+        """The given stages plus everything that (transitively) depends on them"""
+        return {stage.name for stage in self.stages
+                if stage.name in names or self.ancestors(stage.name) & names}
+
+    def _validate(self) -> None:
+        names = [stage.name for stage in self.stages]
+        if len(names) != len(set(names)):
+            raise ValueError("Pipeline stage names must be unique")
+        for stage in self.stages:
+            for dep in stage.depends_on:
+                if dep not in names:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+        for name in self.validation_stages + self.speculative_stages:
+            if name not in names:
+                raise ValueError(f"[speculation] refers to unknown stage {name}")
+
+        # Kahn's algorithm: anything left over sits on a cycle
+        remaining = {stage.name: set(stage.depends_on) for stage in self.stages}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Pipeline stages form a cycle: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+def _parse_task(raw: Dict[str, Any], stage_defaults: Dict[str, Any]) -> TaskSpec:
+    settings = dict(stage_defaults)
+    settings.update(_pick(raw, TASK_DEFAULTS))
+    kind = raw.get("kind", "gradle")
+    if kind not in TASK_KINDS:
+        raise ValueError(f"Unknown task kind {kind!r}")
+    if not raw.get("args"):
+        raise ValueError("Every pipeline task needs args")
+    return TaskSpec(
+        args=[str(arg) for arg in raw["args"]],
+        kind=kind,
+        when=_as_list(raw.get("when")),
+        cpus=float(settings["cpus"]),
+        memory_mb=int(settings["memory_mb"]),
+        timeout=TimeoutPolicy(
+            timeout=float(settings["timeout"]),
+            adaptive=bool(settings["adaptive_timeout"]),
+            factor=float(settings["timeout_factor"]),
+            min_timeout=float(settings["min_timeout"]),
+            max_timeout=float(settings["max_timeout"]),
+        ),
+        retry=RetryPolicy(
+            retries=int(settings["retries"]),
+            backoff=float(settings["retry_backoff"]),
+        ),
+        allow_failure=bool(raw.get("allow_failure", False)),
+    )
+
+def _pick(table: Dict[str, Any], keys: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in table.items() if key in keys}
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+def _physical_memory_mb() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return 8192
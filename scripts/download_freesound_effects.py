@@ -2,28 +2,40 @@
 # -*- coding: utf-8 -*-
 """
 Download Professional Pip-Boy Sound Effects from Freesound
+
+Which Freesound sound backs each resource is pinned in sounds.lock.json
+(see sound_manifest.py): the first run resolves every query and records
+the sound ID and content hash, later runs verify the files already in
+src/main/res/raw in parallel and fetch only missing or changed ones.
+Sounds are fetched concurrently by a small worker pool; the shared client
+paces API calls to Freesound's rate limits and backs off on 429s.
+
+Usage:
+    python scripts/download_freesound_effects.py
+    python scripts/download_freesound_effects.py --update radio_static vault_hum
+    python scripts/download_freesound_effects.py --update
 """
 
+import argparse
 import os
 import sys
-import json
-import urllib.request
-import urllib.parse
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from freesound_client import FreesoundClient
+from sound_library import SoundLibrary
+from sound_manifest import SoundManifest, sync
+
 # Fix Unicode output on Windows
 if sys.platform == "win32":
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-# Get API key from environment
+# Get API key from environment (checked in main)
 API_KEY = os.environ.get("FREESOUND_API_KEY", "")
-if not API_KEY:
-    print("ERROR: FREESOUND_API_KEY environment variable not set!")
-    sys.exit(1)
 
-BASE_URL = "https://freesound.org/apiv2"
 OUTPUT_DIR = "src/main/res/raw"
+MAX_WORKERS = 6
 
 # Curated search queries for Pip-Boy sounds
 SOUND_SEARCHES = {
@@ -56,64 +68,31 @@ SOUND_SEARCHES = {
     "shutdown": "computer shutdown power down"
 }
 
+# Shared keep-alive client for all API calls and downloads, and the library
+# clips are stored in once per machine and hardlinked from; both set up in main
+client = None
+library = None
+
 def make_api_request(endpoint, params=None):
     """Make request to Freesound API"""
-    if params is None:
-        params = {}
-    params["token"] = API_KEY
-    
-    query_string = urllib.parse.urlencode(params)
-    url = f"{BASE_URL}/{endpoint}?{query_string}"
-    
     try:
-        with urllib.request.urlopen(url) as response:
-            return json.loads(response.read().decode())
+        return client.get_json(endpoint, params)
     except Exception as e:
         print(f"API Error: {e}")
         return None
 
-def search_sound(query, max_duration=3.0):
-    """Search for a sound effect"""
-    print(f"  🔍 Searching: {query}")
-    
-    params = {
-        "query": query,
-        "filter": f'duration:[0.1 TO {max_duration}] AND license:"Creative Commons 0"',
-        "sort": "rating_desc",
-        "page_size": 1,
-        "fields": "id,name,download,previews,duration,license"
-    }
-    
-    result = make_api_request("search/text/", params)
-    
-    if result and result.get("count", 0) > 0:
-        sound = result["results"][0]
-        print(f"  ✓ Found: {sound['name']} ({sound['duration']:.2f}s)")
-        return sound
-    else:
-        print(f"  ✗ No results found")
-        return None
-
-def download_sound(sound, output_path):
-    """Download sound file"""
-    # Use preview (HQ MP3) for faster downloads
-    download_url = sound["previews"]["preview-hq-mp3"]
-    download_url_with_token = f"{download_url}?token={API_KEY}"
-    
-    try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        print(f"  📥 Downloading to: {output_path}")
-        urllib.request.urlretrieve(download_url_with_token, output_path)
-        
-        file_size = os.path.getsize(output_path)
-        print(f"  ✓ Downloaded: {file_size / 1024:.1f} KB")
-        return True
-    except Exception as e:
-        print(f"  ✗ Download failed: {e}")
-        return False
-
 def main():
+    global client, library
+    parser = argparse.ArgumentParser(description="Download the locked Pip-Boy sound effects")
+    parser.add_argument("--update", nargs="*", metavar="NAME",
+                        help="Search again for these sounds (all if no names) and re-pin them")
+    args = parser.parse_args()
+    if not API_KEY:
+        print("ERROR: FREESOUND_API_KEY environment variable not set!")
+        sys.exit(1)
+    client = FreesoundClient(API_KEY)
+    library = SoundLibrary()
+    
     print("=" * 80)
     print("FREESOUND PROFESSIONAL SOUND EFFECTS DOWNLOADER")
     print("=" * 80)
@@ -129,64 +108,51 @@ def main():
         print("✗ API connection failed!")
         sys.exit(1)
     
-    # Download sounds
-    results = {
-        "downloaded": [],
-        "failed": [],
-        "total_size_kb": 0
-    }
+    manifest = SoundManifest.load()
+    manifest.output_dir = OUTPUT_DIR
+    added = manifest.add_queries(SOUND_SEARCHES)
+    if added:
+        print(f"📝 {len(added)} new sound(s) to pin in {manifest.path.name}")
+    update = list(manifest.sounds) if args.update == [] else (args.update or [])
     
-    print(f"Downloading {len(SOUND_SEARCHES)} sound effects...")
+    print(f"Syncing {len(manifest.sounds)} sound effects...")
     print("=" * 80)
     print()
     
-    for sound_name, search_query in SOUND_SEARCHES.items():
-        print(f"[{len(results['downloaded']) + len(results['failed']) + 1}/{len(SOUND_SEARCHES)}] {sound_name}")
-        
-        # Search for sound
-        sound = search_sound(search_query)
-        
-        if sound:
-            # Download sound
-            output_path = os.path.join(OUTPUT_DIR, f"{sound_name}.mp3")
-            if download_sound(sound, output_path):
-                file_size = os.path.getsize(output_path)
-                results["downloaded"].append({
-                    "name": sound_name,
-                    "file": output_path,
-                    "size_kb": file_size / 1024
-                })
-                results["total_size_kb"] += file_size / 1024
-            else:
-                results["failed"].append(sound_name)
-        else:
-            results["failed"].append(sound_name)
-        
-        print()
-        time.sleep(0.5)  # Rate limiting
+    start_time = time.time()
+    results = sync(client, library, manifest, MAX_WORKERS, update)
+    for item in sorted(results["fetched"], key=lambda item: item["name"]):
+        entry = manifest.sounds[item["name"]]
+        print(f"  ✓ {item['name']} ({item['status']}): {entry.title} "
+              f"[{entry.sound_id}, {entry.size / 1024:.1f} KB from {item['source']}]")
+    for item in sorted(results["failed"], key=lambda item: item["name"]):
+        print(f"  ✗ {item['name']}: {item['reason']}")
     
     # Summary
+    print()
     print("=" * 80)
-    print("DOWNLOAD COMPLETE!")
+    print("SYNC COMPLETE!")
     print("=" * 80)
     print()
-    print(f"✓ Downloaded: {len(results['downloaded'])}/{len(SOUND_SEARCHES)} sounds")
+    print(f"✓ Up to date: {len(results['up_to_date'])} sounds")
+    print(f"✓ Fetched: {len(results['fetched'])} sounds")
     print(f"✗ Failed: {len(results['failed'])} sounds")
-    print(f"📦 Total Size: {results['total_size_kb']:.1f} KB")
+    print(f"📦 Total Size: {sum(entry.size or 0 for entry in manifest.sounds.values()) / 1024:.1f} KB")
+    print(f"⏱️  Time: {time.time() - start_time:.1f}s")
     print()
     
     if results["failed"]:
         print("Failed sounds:")
-        for name in results["failed"]:
-            print(f"  - {name}")
+        for item in results["failed"]:
+            print(f"  - {item['name']}")
         print()
     
-    print("All sounds saved to: src/main/res/raw/")
+    print(f"All sounds saved to: {OUTPUT_DIR}/ (pinned in {manifest.path.name})")
     print()
     print("Next steps:")
-    print("  1. Update SoundEffect.kt to use R.raw.[sound_name]")
-    print("  2. Build the app: gradle assembleDebug")
-    print("  3. Test sounds in emulator!")
+    print(f"  1. Commit {manifest.path.name} so every checkout gets the same sounds")
+    print("  2. Update SoundEffect.kt to use R.raw.[sound_name]")
+    print("  3. Build the app: gradle assembleDebug")
     print()
     print("☢️ Your Pip-Boy sounds are now PROFESSIONAL! ☢️")
 
@@ -2,35 +2,28 @@
 """
 Simple Pip-Droid Image Generator using Gemini API
 Based on user's provided example code
+
+Generated images are cached by model and prompt (see image_cache.py), so
+re-running with unchanged prompts makes no API calls; --refresh
+regenerates them.
 """
 
+import argparse
 import os
+import sys
+from io import BytesIO
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from gemini_image_client import MODEL, request_image, require_packages
+from image_cache import generate_cached, open_image_cache
+
 # NOTE: You need to set your Gemini API key first
 # Option 1: Set environment variable: GEMINI_API_KEY
 # Option 2: Modify this script to include your key directly (not recommended for public repos)
 
-try:
-    from google import genai
-    from google.genai import types
-    from PIL import Image
-    from io import BytesIO
-except ImportError:
-    print("ERROR: Required packages not installed!")
-    print("\nInstall with:")
-    print("  pip install google-genai pillow")
-    print("\nOr using conda:")
-    print("  conda install -c conda-forge pillow")
-    print("  pip install google-genai")
-    exit(1)
-
 # Configuration
 OUTPUT_DIR = Path(__file__).parent.parent / "docs" / "images"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-# Initialize Gemini client
-client = genai.Client()
 
 # Image prompts for Pip-Droid repository
 IMAGES = {
@@ -68,47 +61,58 @@ Radio New Vegas, Diamond City Radio, etc.). Include play/pause/stop buttons and
 green on black with retro gauges and dials. Add CRT effects."""
 }
 
-def generate_image(name, prompt):
-    """Generate and save a single image"""
+def generate_image(name, prompt, image_cache=None, refresh=False):
+    """Generate (or reuse from the cache) and save a single image"""
     print(f"\n{'='*70}")
     print(f"Generating: {name}.png")
     print(f"{'='*70}")
     print(f"Prompt: {prompt[:100]}...")
     
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-image-preview",
-            contents=[prompt],
-        )
+        image_data, cached = generate_cached(image_cache, MODEL, prompt, {}, lambda: request_image(prompt),
+                                             source="generate_images_simple", refresh=refresh)
+        if image_data is None:
+            print("\n⚠️  No image data in response")
+            return False
         
-        # Process response
-        for part in response.candidates[0].content.parts:
-            if part.text is not None:
-                print(f"\nResponse text: {part.text}")
-            elif part.inline_data is not None:
-                # Save image
-                image = Image.open(BytesIO(part.inline_data.data))
-                output_path = OUTPUT_DIR / f"{name}.png"
-                image.save(output_path)
-                
-                # Get image info
-                width, height = image.size
-                file_size = os.path.getsize(output_path)
-                
-                print(f"\n✅ SUCCESS!")
-                print(f"   Saved to: {output_path}")
-                print(f"   Size: {width}x{height} pixels")
-                print(f"   File size: {file_size / 1024:.1f} KB")
-                return True
+        # Save image
+        from PIL import Image
+        image = Image.open(BytesIO(image_data))
+        output_path = OUTPUT_DIR / f"{name}.png"
+        image.save(output_path)
         
-        print("\n⚠️  No image data in response")
-        return False
+        # Get image info
+        width, height = image.size
+        file_size = os.path.getsize(output_path)
+        
+        print(f"\n✅ SUCCESS!{' (cached, no API call)' if cached else ''}")
+        print(f"   Saved to: {output_path}")
+        print(f"   Size: {width}x{height} pixels")
+        print(f"   File size: {file_size / 1024:.1f} KB")
+        return True
         
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}")
         return False
 
+# Opened by the first build_image call in this process
+_image_cache = None
+_image_cache_opened = False
+
+def build_image(name, prompt):
+    """generate_image through the shared image cache (build pipeline entry point)"""
+    global _image_cache, _image_cache_opened
+    if not _image_cache_opened:
+        _image_cache = open_image_cache()
+        _image_cache_opened = True
+    return generate_image(name, prompt, _image_cache)
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate the repository images with Gemini")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Regenerate images even when a cached one exists")
+    args = parser.parse_args()
+    
     print("""
 ╔══════════════════════════════════════════════════════════════════════════╗
 ║                                                                          ║
@@ -125,6 +129,10 @@ def main():
         print("⚠️  No GEMINI_API_KEY environment variable found")
         print("   Attempting to use default client configuration...")
     
+    require_packages()
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    image_cache = open_image_cache()
+    
     print(f"\nOutput directory: {OUTPUT_DIR.absolute()}")
     print(f"Images to generate: {len(IMAGES)}")
     
@@ -135,7 +143,7 @@ def main():
     
     results = {}
     for name, prompt in IMAGES.items():
-        success = generate_image(name, prompt)
+        success = generate_image(name, prompt, image_cache, args.refresh)
         results[name] = success
     
     # Summary
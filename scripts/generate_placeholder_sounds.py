@@ -197,6 +197,47 @@ def generate_success_beep(output_dir):
         wave_data[start:start+len(tone)] += tone
     save_wav(os.path.join(output_dir, "success_beep.wav"), wave_data)
 
+# Sounds with a dedicated generator
+SOUND_GENERATORS = {
+    "button_click": generate_button_click,
+    "button_hover": generate_button_hover,
+    "tab_switch": generate_tab_switch,
+    "page_turn": generate_page_turn,
+    "terminal_type": generate_terminal_type,
+    "terminal_enter": generate_terminal_enter,
+    "terminal_error": generate_terminal_error,
+    "terminal_boot": generate_terminal_boot,
+    "quest_complete": generate_quest_complete,
+    "level_up": generate_level_up,
+    "achievement_unlock": generate_achievement_unlock,
+    "error_beep": generate_error_beep,
+    "success_beep": generate_success_beep,
+}
+
+# Minimal placeholders for remaining sounds (to prevent missing resource errors)
+MINIMAL_SOUNDS = [
+    "panel_open", "panel_close", "scroll", "back_button",
+    "quest_accept", "objective_complete", "radio_static",
+    "radio_on", "radio_off", "station_switch", "geiger_click",
+    "vault_hum", "alert", "shutdown"
+]
+
+def generate_minimal_placeholder(output_dir, sound_name):
+    """Generic beep for sounds without a dedicated generator"""
+    wave_data = generate_sine_wave(600, 0.3, amplitude=0.4)
+    wave_data = apply_envelope(wave_data, attack=0.01, release=0.05)
+    save_wav(os.path.join(output_dir, f"{sound_name}.wav"), wave_data)
+
+def generate_sound(output_dir, sound_name):
+    """Generate a single placeholder sound by resource name"""
+    generator = SOUND_GENERATORS.get(sound_name)
+    if generator is not None:
+        generator(output_dir)
+    elif sound_name in MINIMAL_SOUNDS:
+        generate_minimal_placeholder(output_dir, sound_name)
+    else:
+        raise ValueError(f"Unknown placeholder sound: {sound_name}")
+
 def generate_all_placeholders():
     """Generate all placeholder sound effects"""
     output_dir = os.path.join(os.path.dirname(__file__), "..", "src", "main", "res", "raw")
@@ -207,32 +248,11 @@ def generate_all_placeholders():
     print()
     
     # Generate essential sounds
-    generate_button_click(output_dir)
-    generate_button_hover(output_dir)
-    generate_tab_switch(output_dir)
-    generate_page_turn(output_dir)
-    generate_terminal_type(output_dir)
-    generate_terminal_enter(output_dir)
-    generate_terminal_error(output_dir)
-    generate_terminal_boot(output_dir)
-    generate_quest_complete(output_dir)
-    generate_level_up(output_dir)
-    generate_achievement_unlock(output_dir)
-    generate_error_beep(output_dir)
-    generate_success_beep(output_dir)
-    
-    # Create minimal placeholders for remaining sounds (to prevent missing resource errors)
-    minimal_sounds = [
-        "panel_open", "panel_close", "scroll", "back_button",
-        "quest_accept", "objective_complete", "radio_static",
-        "radio_on", "radio_off", "station_switch", "geiger_click",
-        "vault_hum", "alert", "shutdown"
-    ]
-    
-    for sound_name in minimal_sounds:
-        wave_data = generate_sine_wave(600, 0.3, amplitude=0.4)
-        wave_data = apply_envelope(wave_data, attack=0.01, release=0.05)
-        save_wav(os.path.join(output_dir, f"{sound_name}.wav"), wave_data)
+    for sound_name in SOUND_GENERATORS:
+        generate_sound(output_dir, sound_name)
+    
+    for sound_name in MINIMAL_SOUNDS:
+        generate_sound(output_dir, sound_name)
     
     print()
     print("✅ All placeholder sound effects generated!")
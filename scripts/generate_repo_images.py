@@ -2,29 +2,24 @@
 """
 Pip-Droid Image Generator
 Generates repository images using Google Gemini API
+
+Generated images are cached by model and prompt (see image_cache.py), so
+re-running with unchanged prompts makes no API calls; --refresh
+regenerates them.
 """
 
+import argparse
 import os
 import sys
+from io import BytesIO
 from pathlib import Path
 
-try:
-    from google import genai
-    from google.genai import types
-    from PIL import Image
-    from io import BytesIO
-except ImportError:
-    print("Error: Required packages not installed.")
-    print("Install with: pip install google-genai pillow")
-    sys.exit(1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from gemini_image_client import MODEL, request_image, require_packages
+from image_cache import generate_cached, open_image_cache
 
 # Configuration
 OUTPUT_DIR = Path(__file__).parent.parent / "docs" / "images"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-# Gemini API client
-# Note: Set your API key as environment variable: GEMINI_API_KEY
-client = genai.Client()
 
 # Image prompts
 PROMPTS = {
@@ -88,31 +83,25 @@ PROMPTS = {
 }
 
 
-def generate_image(name, prompt, filename):
-    """Generate a single image using Gemini API"""
+def generate_image(name, prompt, filename, image_cache=None, refresh=False):
+    """Generate (or reuse from the cache) a single image using Gemini API"""
     print(f"\n🎨 Generating {name}...")
     print(f"   Prompt: {prompt[:80]}...")
     
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-image-preview",
-            contents=[prompt],
-        )
-        
-        # Process response
-        for part in response.candidates[0].content.parts:
-            if part.text is not None:
-                print(f"   Response: {part.text}")
-            elif part.inline_data is not None:
-                # Save image
-                image = Image.open(BytesIO(part.inline_data.data))
-                output_path = OUTPUT_DIR / filename
-                image.save(output_path)
-                print(f"   ✅ Saved to: {output_path}")
-                return True
+        image_data, cached = generate_cached(image_cache, MODEL, prompt, {}, lambda: request_image(prompt),
+                                             source="generate_repo_images", refresh=refresh)
+        if image_data is None:
+            print(f"   ⚠️  No image data received")
+            return False
         
-        print(f"   ⚠️  No image data received")
-        return False
+        # Save image
+        from PIL import Image
+        image = Image.open(BytesIO(image_data))
+        output_path = OUTPUT_DIR / filename
+        image.save(output_path)
+        print(f"   ✅ Saved to: {output_path}{' (cached)' if cached else ''}")
+        return True
         
     except Exception as e:
         print(f"   ❌ Error: {e}")
@@ -121,6 +110,11 @@ def generate_image(name, prompt, filename):
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Generate the repository images with Gemini")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Regenerate images even when a cached one exists")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("Pip-Droid Repository Image Generator")
     print("Using Google Gemini API")
@@ -132,10 +126,14 @@ def main():
         print("Set it with: export GEMINI_API_KEY='your_key_here'")
         print("\nAttempting to use default client configuration...")
     
+    require_packages()
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    image_cache = open_image_cache()
+    
     # Generate all images
     results = {}
     for name, config in PROMPTS.items():
-        success = generate_image(name, config["prompt"], config["filename"])
+        success = generate_image(name, config["prompt"], config["filename"], image_cache, args.refresh)
         results[name] = success
     
     # Summary
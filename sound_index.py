@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Sound Index
+Offline full-text index of every Freesound sound we have seen metadata for
+
+Search and detail responses are folded in as they arrive (see
+FreesoundClient response hooks). Queries are answered from a SQLite FTS5
+inverted index over name, tags, description and license, ranked with
+BM25, with duration and license filters applied locally.
+
+Usage:
+    python sound_index.py search "radio static" --license CC0
+    python sound_index.py stats
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from freesound_cache import default_cache_path
+
+# BM25 column weights: name, tags, description, license
+COLUMN_WEIGHTS = (4.0, 2.5, 1.0, 0.5)
+
+# search_sounds license filters -> (license URL fragment, license name)
+LICENSE_MATCHES = {
+    "CC0": ("/publicdomain/zero/", "creative commons 0"),
+    "CC-BY": ("/licenses/by/", "attribution"),
+    "CC-BY-NC": ("/licenses/by-nc/", "attribution noncommercial"),
+}
+
+def default_index_path() -> Path:
+    return default_cache_path().parent / "sound_index.sqlite3"
+
+def license_matches(license_value: str, filter_license: Optional[str]) -> bool:
+    if not filter_license or filter_license not in LICENSE_MATCHES:
+        return True
+    url_fragment, name = LICENSE_MATCHES[filter_license]
+    value = (license_value or "").lower()
+    return url_fragment in value or value == name
+
+class SoundIndex:
+    """Thread-safe BM25 index of Freesound metadata"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_index_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self._db.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS sounds_fts USING fts5(
+                    name, tags, description, license, tokenize = 'porter unicode61'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"SQLite was built without FTS5: {e}")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sounds (
+                id INTEGER PRIMARY KEY,
+                duration REAL,
+                license TEXT,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS sounds_duration ON sounds (duration)")
+
+    def add(self, sounds: Iterable[Dict[str, Any]]) -> int:
+        """Merge sound metadata into the index; returns how many were written"""
+        written = 0
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for sound in sounds:
+                    if not isinstance(sound, dict) or "id" not in sound:
+                        continue
+                    row = self._db.execute("SELECT data FROM sounds WHERE id = ?",
+                                           (sound["id"],)).fetchone()
+                    # Responses carry different field subsets; keep the union
+                    merged = json.loads(row[0]) if row else {}
+                    merged.update(sound)
+                    self._write(merged)
+                    written += 1
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return written
+
+    def add_response(self, endpoint: str, data: Any) -> None:
+        """FreesoundClient response hook: fold search and detail responses in"""
+        endpoint = endpoint.lstrip("/")
+        if endpoint.startswith("search/") and isinstance(data, dict):
+            self.add(data.get("results", []))
+        elif re.match(r"sounds/\d+/?$", endpoint):
+            self.add([data])
+
+    def search(self, query: str, filter_license: Optional[str] = None,
+               min_duration: Optional[float] = None, max_duration: Optional[float] = None,
+               limit: int = 10, require_all_terms: bool = False) -> List[Tuple[float, Dict[str, Any]]]:
+        """Return (score, metadata) pairs, best first; higher scores are better
+
+        By default a sound matching any query term qualifies and BM25 ranks
+        those matching more (and rarer) terms first; require_all_terms only
+        returns sounds matching every term.
+        """
+        match = self._match_expression(query, " AND " if require_all_terms else " OR ")
+        if not match:
+            return []
+        sql = (f"SELECT -bm25(sounds_fts, {', '.join(map(str, COLUMN_WEIGHTS))}) AS score, "
+               "sounds.license, sounds.data FROM sounds_fts "
+               "JOIN sounds ON sounds.id = sounds_fts.rowid WHERE sounds_fts MATCH ?")
+        args: List[Any] = [match]
+        if min_duration is not None:
+            sql += " AND sounds.duration >= ?"
+            args.append(min_duration)
+        if max_duration is not None:
+            sql += " AND sounds.duration <= ?"
+            args.append(max_duration)
+        sql += " ORDER BY score DESC"
+
+        results = []
+        with self._lock:
+            for score, license_value, data in self._db.execute(sql, args):
+                if license_matches(license_value, filter_license):
+                    results.append((score, json.loads(data)))
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def get(self, sound_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM sounds WHERE id = ?", (sound_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def sounds(self) -> List[Dict[str, Any]]:
+        """Metadata of every indexed sound, by ID"""
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM sounds ORDER BY id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM sounds").fetchone()[0]
+        return {"sounds": count, "path": str(self.path)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _write(self, sound: Dict[str, Any]) -> None:
+        tags = sound.get("tags") or []
+        self._db.execute("DELETE FROM sounds_fts WHERE rowid = ?", (sound["id"],))
+        self._db.execute(
+            "INSERT INTO sounds_fts (rowid, name, tags, description, license) VALUES (?, ?, ?, ?, ?)",
+            (sound["id"], sound.get("name", ""), " ".join(tags) if isinstance(tags, list) else str(tags),
+             sound.get("description", ""), sound.get("license", ""))
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO sounds (id, duration, license, data, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (sound["id"], sound.get("duration"), sound.get("license", ""), json.dumps(sound), time.time())
+        )
+
+    @staticmethod
+    def _match_expression(query: str, operator: str) -> str:
+        """FTS5 query of quoted terms, so user input is never parsed as syntax"""
+        terms = re.findall(r"\w+", query.lower())
+        return operator.join(f'"{term}"' for term in dict.fromkeys(terms))
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Search the offline Freesound metadata index")
+    parser.add_argument("--index", help="Index database path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    search_parser = subparsers.add_parser("search", help="BM25 search over indexed sounds")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--license", default="all", help="CC0, CC-BY, CC-BY-NC or all")
+    search_parser.add_argument("--min-duration", type=float)
+    search_parser.add_argument("--max-duration", type=float)
+    search_parser.add_argument("--limit", type=int, default=10)
+    subparsers.add_parser("stats", help="Show index size")
+    args = parser.parse_args()
+
+    index = SoundIndex(Path(args.index) if args.index else None)
+    if args.command == "search":
+        start = time.perf_counter()
+        results = index.search(args.query, args.license, args.min_duration,
+                               args.max_duration, args.limit)
+        for score, sound in results:
+            print(f"{score:7.2f}  {sound['id']:>8}  {sound.get('duration', 0):6.2f}s  {sound.get('name', '')}")
+        print(f"\n{len(results)} result(s) in {(time.perf_counter() - start) * 1000:.1f} ms",
+              file=sys.stderr)
+        return 0
+    if args.command == "stats":
+        print(json.dumps(index.stats(), indent=2))
+        return 0
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
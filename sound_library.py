@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Sound Library
+Content-addressed local store of downloaded Freesound clips, shared by
+every checkout on the machine
+
+Layout (under ~/.cache/pip-droid/sounds by default, FREESOUND_LIBRARY_DIR
+to relocate):
+- objects/<sha256[:2]>/<sha256>  one blob per distinct file content
+- library.sqlite3                 (sound ID, variant) -> blob, with the
+                                  sound's name, license and metadata
+- tmp/                            in-flight downloads (resumable)
+
+Installing a sound into a project hardlinks the blob, falls back to a
+reflink (copy-on-write clone) across hardlink boundaries, and only copies
+as a last resort. Blobs are stored read-only, and one modified after it
+was stored (e.g. an installed hardlink edited in place) is re-hashed and
+dropped if its content changed, so later installs never get the edit.
+
+Usage:
+    python sound_library.py list
+    python sound_library.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from freesound_cache import default_cache_path
+
+FICLONE = 0x40049409  # Linux ioctl: share extents with another file (btrfs, XFS, ...)
+BLOB_MODE = 0o444
+
+def default_library_dir() -> Path:
+    library_dir = os.environ.get("FREESOUND_LIBRARY_DIR")
+    return Path(library_dir) if library_dir else default_cache_path().parent / "sounds"
+
+@dataclass
+class LibraryEntry:
+    sound_id: int
+    variant: str        # "original" or "preview"
+    sha256: str
+    size: int
+    extension: str
+    name: str
+    license: str
+    username: str
+    metadata: Dict[str, Any]
+    blob: Path
+
+class SoundLibrary:
+    """Thread-safe content-addressed sound store"""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else default_library_dir()
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[tuple, threading.Lock] = {}
+        self._db = sqlite3.connect(str(self.root / "library.sqlite3"),
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sounds (
+                sound_id INTEGER NOT NULL,
+                variant TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                extension TEXT NOT NULL,
+                name TEXT,
+                license TEXT,
+                username TEXT,
+                metadata TEXT,
+                added_at REAL NOT NULL,
+                PRIMARY KEY (sound_id, variant)
+            )
+        """)
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256
+
+    def lookup(self, sound_id: int, variant: str) -> Optional[LibraryEntry]:
+        """The stored entry, if its blob is still present and unmodified"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sound_id, variant, sha256, size, extension, name, license, username, metadata, "
+                "added_at FROM sounds WHERE sound_id = ? AND variant = ?", (sound_id, variant)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = self._entry(row[:-1])
+        try:
+            stat = entry.blob.stat()
+        except FileNotFoundError:
+            return None
+        if stat.st_size != entry.size:
+            return None
+        # Written since it was stored: trust it only if the content still matches,
+        # otherwise unlink it so the next fetch stores a clean copy
+        if stat.st_mtime > row[-1] and _sha256(entry.blob) != entry.sha256:
+            entry.blob.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def add(self, sound: Dict[str, Any], variant: str, path: Path, sha256: str,
+            extension: str) -> LibraryEntry:
+        """Move a verified download into the store (deduplicated by content)"""
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(exist_ok=True)
+        size = Path(path).stat().st_size
+        if blob.exists() and blob.stat().st_size == size:
+            os.remove(path)
+        else:
+            # Read-only, so editing an installed hardlink fails instead of
+            # rewriting the shared blob
+            os.chmod(path, BLOB_MODE)
+            os.replace(path, blob)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sounds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sound["id"], variant, sha256, size, extension, sound.get("name"),
+                 sound.get("license"), sound.get("username"), json.dumps(sound), time.time())
+            )
+        return self.lookup(sound["id"], variant)
+
+    def fetch(self, client, sound: Dict[str, Any], variant: str, url: str, extension: str,
+              expected_size: Optional[int] = None,
+              expected_sha256: Optional[str] = None) -> LibraryEntry:
+        """Return the library entry for a sound, downloading it only if missing
+
+        expected_sha256 rejects a download whose content differs (the stored
+        entry, if any, is returned as is; callers compare its sha256).
+        """
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault((sound["id"], variant), threading.Lock())
+        # Two names mapping to one clip must not stream into the same staging file
+        with fetch_lock:
+            entry = self.lookup(sound["id"], variant)
+            if entry is not None:
+                return entry
+            staging = self.tmp_dir / f"{sound['id']}-{variant}{extension}"
+            result = client.download(url, str(staging), expected_size=expected_size,
+                                     expected_sha256=expected_sha256)
+            return self.add(sound, variant, staging, result.sha256, extension)
+
+    def install(self, entry: LibraryEntry, destination: str) -> str:
+        """Place a blob at destination; returns "hardlink", "reflink" or "copy"
+
+        The new name is built beside the destination and renamed over it, so
+        a half-installed file is never visible.
+        """
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        # Already linked: rename() over the same inode is a no-op that would
+        # leave the staging name behind
+        if destination.exists() and os.path.samefile(entry.blob, destination):
+            return "hardlink"
+        staging = destination.parent / f".{destination.name}.install"
+        if staging.exists():
+            staging.unlink()
+        method = self._link(entry.blob, staging)
+        os.replace(staging, destination)
+        return method
+
+    def entries(self) -> List[LibraryEntry]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT sound_id, variant, sha256, size, extension, name, license, username, metadata "
+                "FROM sounds ORDER BY sound_id, variant"
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.entries()
+        blobs = {entry.sha256: entry.size for entry in entries}
+        return {
+            "sounds": len(entries),
+            "blobs": len(blobs),
+            "stored_bytes": sum(blobs.values()),
+            "logical_bytes": sum(entry.size for entry in entries),
+            "path": str(self.root),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _entry(self, row) -> LibraryEntry:
+        sound_id, variant, sha256, size, extension, name, license_, username, metadata = row
+        return LibraryEntry(sound_id, variant, sha256, size, extension, name or "",
+                            license_ or "", username or "", json.loads(metadata or "{}"),
+                            self.blob_path(sha256))
+
+    @staticmethod
+    def _link(source: Path, target: Path) -> str:
+        try:
+            os.link(source, target)
+            return "hardlink"
+        except OSError:
+            pass
+        try:
+            import fcntl
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except (ImportError, OSError):
+            if target.exists():
+                target.unlink()
+        shutil.copyfile(source, target)
+        return "copy"
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect the local Freesound sound library")
+    parser.add_argument("--library-dir", help="Library directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List stored sounds with their licenses")
+    subparsers.add_parser("stats", help="Show storage and deduplication totals")
+    args = parser.parse_args()
+
+    library = SoundLibrary(Path(args.library_dir) if args.library_dir else None)
+    if args.command == "list":
+        for entry in library.entries():
+            print(f"{entry.sound_id:>8}  {entry.variant:<8}  {entry.sha256[:12]}  "
+                  f"{entry.size / 1024:8.1f} KB  {entry.name}  [{entry.license}] by {entry.username}")
+        return 0
+    if args.command == "stats":
+        print(json.dumps(library.stats(), indent=2))
+        return 0
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
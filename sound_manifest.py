@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Sound Manifest
+Lockfile pinning each app sound resource (a res/raw name such as
+button_click) to a Freesound sound, format and content hash, with a
+verified incremental sync
+
+sounds.lock.json layout (next to build.gradle by default):
+    {
+      "version": 1,
+      "output_dir": "src/main/res/raw",
+      "sounds": {
+        "button_click": {"query": "mechanical button click computer",
+                         "sound_id": 12345, "variant": "preview", "format": "mp3",
+                         "sha256": "...", "size": 20480, "title": "...",
+                         "license": "...", "username": "..."}
+      }
+    }
+
+Features:
+- An entry without a sound_id is resolved once from its search query and
+  stays pinned from then on; --update re-resolves the given names
+- verify hashes the files in output_dir in parallel (a size mismatch skips
+  the hash) and reports which are missing or changed
+- sync fetches only those entries, through the shared sound library when
+  it is enabled, and rejects any download that differs from the pinned hash
+- The lockfile is rewritten atomically with sorted keys, so it diffs cleanly
+
+Usage:
+    python sound_manifest.py verify
+    python sound_manifest.py sync
+    python sound_manifest.py sync --update radio_static
+    python sound_manifest.py list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST = Path(__file__).resolve().parent / "sounds.lock.json"
+DEFAULT_OUTPUT_DIR = "src/main/res/raw"
+DEFAULT_WORKERS = 6
+
+# How an unpinned query is resolved: the curated downloads' search settings
+RESOLVE_FILTER = 'duration:[0.1 TO 3.0] AND license:"Creative Commons 0"'
+RESOLVE_FIELDS = "id,name,download,previews,type,filesize,license,username"
+
+@dataclass
+class ManifestEntry:
+    query: str
+    sound_id: Optional[int] = None
+    variant: str = "preview"        # "preview" (HQ MP3) or "original"
+    format: str = "mp3"
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    title: str = ""
+    license: str = ""
+    username: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value not in (None, "")}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ManifestEntry":
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+class SoundManifest:
+    """The lockfile in memory; record() is safe to call from worker threads"""
+
+    def __init__(self, path: Path = DEFAULT_MANIFEST, output_dir: str = DEFAULT_OUTPUT_DIR,
+                 sounds: Optional[Dict[str, ManifestEntry]] = None):
+        self.path = Path(path)
+        self.output_dir = output_dir
+        self.sounds: Dict[str, ManifestEntry] = sounds or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_MANIFEST) -> "SoundManifest":
+        """Read the lockfile; a missing file gives an empty manifest"""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"{path}: unsupported manifest version {data.get('version')}")
+        sounds = {name: ManifestEntry.from_dict(entry) for name, entry in data.get("sounds", {}).items()}
+        return cls(path, data.get("output_dir", DEFAULT_OUTPUT_DIR), sounds)
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                "version": MANIFEST_VERSION,
+                "output_dir": self.output_dir,
+                "sounds": {name: self.sounds[name].to_dict() for name in sorted(self.sounds)},
+            }
+            staging = self.path.with_name(f".{self.path.name}.tmp")
+            staging.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+            os.replace(staging, self.path)
+
+    def add_queries(self, queries: Dict[str, str]) -> List[str]:
+        """Add unpinned entries for names not in the manifest yet; returns them"""
+        with self._lock:
+            added = [name for name in queries if name not in self.sounds]
+            for name in added:
+                self.sounds[name] = ManifestEntry(query=queries[name])
+        return added
+
+    def record(self, name: str, entry: ManifestEntry) -> None:
+        with self._lock:
+            self.sounds[name] = entry
+
+    def file_path(self, name: str, entry: Optional[ManifestEntry] = None) -> Path:
+        """Where the sound lives, relative to the lockfile's directory"""
+        entry = entry or self.sounds[name]
+        return self.path.parent / self.output_dir / f"{name}.{entry.format}"
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def check_file(manifest: SoundManifest, name: str) -> str:
+    """ok, missing, changed, unpinned (no sound yet) or unverified (no hash yet)"""
+    entry = manifest.sounds[name]
+    if entry.sound_id is None:
+        return "unpinned"
+    if entry.sha256 is None:
+        return "unverified"
+    path = manifest.file_path(name)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return "missing"
+    if entry.size is not None and size != entry.size:
+        return "changed"
+    return "ok" if sha256_file(path) == entry.sha256 else "changed"
+
+def verify(manifest: SoundManifest, workers: int = DEFAULT_WORKERS) -> Dict[str, str]:
+    """Status of every entry, checked in parallel"""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        statuses = dict(zip(manifest.sounds, executor.map(lambda name: check_file(manifest, name),
+                                                          list(manifest.sounds))))
+    return {name: statuses[name] for name in sorted(statuses)}
+
+def _download_url(sound: Dict[str, Any], variant: str) -> str:
+    return sound["previews"]["preview-hq-mp3"] if variant == "preview" else sound["download"]
+
+def _pinned(entry: ManifestEntry, sound: Dict[str, Any]) -> ManifestEntry:
+    """entry pinned to sound; the hash is filled in once the file is fetched"""
+    file_format = "mp3" if entry.variant == "preview" else sound.get("type", "wav").lstrip(".")
+    return ManifestEntry(query=entry.query, sound_id=sound["id"], variant=entry.variant,
+                         format=file_format, title=sound.get("name", ""),
+                         license=sound.get("license", ""), username=sound.get("username", ""))
+
+def resolve(client, entry: ManifestEntry) -> Tuple[ManifestEntry, Dict[str, Any]]:
+    """Pin entry to the top search result for its query"""
+    result = client.get_json("search/text/", {
+        "query": entry.query,
+        "filter": RESOLVE_FILTER,
+        "sort": "rating_desc",
+        "page_size": 1,
+        "fields": RESOLVE_FIELDS,
+    })
+    if not result.get("results"):
+        raise LookupError(f"No results for query: {entry.query}")
+    sound = result["results"][0]
+    return _pinned(entry, sound), sound
+
+def sync_entry(client, library, manifest: SoundManifest, name: str,
+               update: bool = False) -> Tuple[ManifestEntry, str]:
+    """Put one entry's file in place; returns the new entry and where the bytes came from
+
+    Unpinned (or update) entries are resolved first. A pinned hash must
+    match, so a re-uploaded or regenerated sound fails instead of silently
+    replacing the locked one; --update re-pins it.
+    """
+    entry = replace(manifest.sounds[name])
+    sound = None
+    if update or entry.sound_id is None:
+        entry, sound = resolve(client, entry)
+    destination = manifest.file_path(name, entry)
+    expected_size = None if entry.variant == "preview" else (sound or {}).get("filesize")
+    source = "download"
+
+    if library is not None:
+        stored = library.lookup(entry.sound_id, entry.variant)
+        if stored is not None:
+            source = "library"
+        else:
+            if sound is None:
+                sound = client.get_json(f"sounds/{entry.sound_id}/", {"fields": RESOLVE_FIELDS})
+            stored = library.fetch(client, sound, entry.variant, _download_url(sound, entry.variant),
+                                   f".{entry.format}", expected_size, entry.sha256)
+        if entry.sha256 and stored.sha256 != entry.sha256:
+            raise ValueError(f"{name}: sound {entry.sound_id} does not match the locked sha256 "
+                             f"(sync --update {name} to re-pin)")
+        library.install(stored, str(destination))
+        sha256, size = stored.sha256, stored.size
+    else:
+        if sound is None:
+            sound = client.get_json(f"sounds/{entry.sound_id}/", {"fields": RESOLVE_FIELDS})
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        download = client.download(_download_url(sound, entry.variant), str(destination),
+                                   expected_size=expected_size, expected_sha256=entry.sha256)
+        sha256, size = download.sha256, download.size
+
+    # A re-pin to another variant or format changes the file name: drop the
+    # previously pinned file so the build doesn't ship both
+    previous = manifest.sounds[name]
+    if previous.sound_id is not None:
+        previous_path = manifest.file_path(name, previous)
+        if previous_path != destination:
+            previous_path.unlink(missing_ok=True)
+
+    entry.sha256, entry.size = sha256, size
+    return entry, source
+
+def sync(client, library, manifest: SoundManifest, workers: int = DEFAULT_WORKERS,
+         update: Iterable[str] = ()) -> Dict[str, Any]:
+    """Verify every entry, fetch the missing/changed/unpinned ones, save the lockfile"""
+    update = set(update)
+    unknown = update - set(manifest.sounds)
+    if unknown:
+        raise KeyError(f"Not in the manifest: {', '.join(sorted(unknown))}")
+    statuses = verify(manifest, workers)
+    todo = [name for name, status in statuses.items() if status != "ok" or name in update]
+    results = {
+        "up_to_date": [name for name in statuses if name not in todo],
+        "fetched": [],
+        "failed": [],
+    }
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(sync_entry, client, library, manifest, name, name in update): name
+                       for name in todo}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    entry, source = future.result()
+                except Exception as e:
+                    results["failed"].append({"name": name, "status": statuses[name], "reason": str(e)})
+                    continue
+                manifest.record(name, entry)
+                results["fetched"].append({"name": name, "status": statuses[name],
+                                           "sound_id": entry.sound_id, "source": source})
+        manifest.save()
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Verify and sync the app's locked Freesound sounds")
+    parser.add_argument("--manifest", default=str(DEFAULT_MANIFEST), help="Lockfile path")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel checks and downloads")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("verify", help="Check files against the lockfile (exit 1 on drift)")
+    sync_parser = subparsers.add_parser("sync", help="Fetch missing, changed and unpinned sounds")
+    sync_parser.add_argument("--update", nargs="*", metavar="NAME",
+                             help="Re-resolve these names from their queries (all if none given)")
+    subparsers.add_parser("list", help="List locked sounds")
+    args = parser.parse_args()
+
+    manifest = SoundManifest.load(Path(args.manifest))
+    if args.command == "list":
+        for name, entry in sorted(manifest.sounds.items()):
+            pin = f"{entry.sound_id:>8}  {(entry.sha256 or '-')[:12]:<12}" if entry.sound_id else f"{'-':>8}  {'-':<12}"
+            print(f"{name:<20} {pin}  {entry.format:<4}  {entry.title}  [{entry.query}]")
+        return 0
+    if args.command == "verify":
+        statuses = verify(manifest, args.workers)
+        for name, status in statuses.items():
+            print(f"{'✓' if status == 'ok' else '✗'} {name:<20} {status}")
+        drift = sum(1 for status in statuses.values() if status != "ok")
+        print(f"\n{len(statuses) - drift}/{len(statuses)} sounds up to date")
+        return 1 if drift else 0
+
+    # Only sync talks to Freesound; same switches as the MCP server
+    from freesound_cache import ResponseCache
+    from freesound_client import FREESOUND_BASE_URL, FreesoundClient
+    from sound_library import SoundLibrary
+    api_key = os.environ.get("FREESOUND_API_KEY", "")
+    if not api_key:
+        print("ERROR: FREESOUND_API_KEY environment variable not set!", file=sys.stderr)
+        return 1
+    cache = ResponseCache() if os.environ.get("FREESOUND_CACHE", "1") != "0" else None
+    client = FreesoundClient(api_key, os.environ.get("FREESOUND_BASE_URL", FREESOUND_BASE_URL), cache=cache)
+    library = SoundLibrary() if os.environ.get("FREESOUND_LIBRARY", "1") != "0" else None
+    update = list(manifest.sounds) if args.update == [] else (args.update or [])
+    results = sync(client, library, manifest, args.workers, update)
+    for item in sorted(results["fetched"], key=lambda item: item["name"]):
+        print(f"✓ {item['name']:<20} {item['status']:<10} -> {item['sound_id']} ({item['source']})")
+    for item in sorted(results["failed"], key=lambda item: item["name"]):
+        print(f"✗ {item['name']:<20} {item['status']:<10} {item['reason']}")
+    print(f"\n{len(results['up_to_date'])} up to date, {len(results['fetched'])} fetched, "
+          f"{len(results['failed'])} failed")
+    return 1 if results["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
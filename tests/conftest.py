@@ -0,0 +1,31 @@
+"""Shared fixtures: an offline fake Freesound API (tools/fake_freesound.py)"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from fake_freesound import FAKE_API_KEY, FakeConfig, FakeFreesoundServer, generate_catalog
+from freesound_client import FreesoundClient, RateLimiter
+
+
+@pytest.fixture
+def fake():
+    server = FakeFreesoundServer(generate_catalog(40), FakeConfig(latency=0)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(fake):
+    client = FreesoundClient(FAKE_API_KEY, base_url=fake.base_url, rate_limiter=RateLimiter(per_minute=0))
+    yield client
+    client.close()
+
+
+def preview_url(fake, sound_id: int) -> str:
+    return f"{fake.base_url.rsplit('/apiv2', 1)[0]}/previews/{sound_id}-hq.mp3"
@@ -0,0 +1,44 @@
+"""Generated assets are rebuilt when their inputs change, never when their output was replaced"""
+
+import os
+
+from build_optimization_pipeline import AssetManifest, AssetTarget
+
+
+def _target(tmp_path):
+    script = tmp_path / "make_asset.py"
+    script.write_text("def make(): pass\n")
+    output = tmp_path / "asset.png"
+    output.write_bytes(b"built")
+    return AssetTarget(output, script, "make", params={"size": 64})
+
+
+def test_changed_inputs_are_stale(tmp_path):
+    target = _target(tmp_path)
+    manifest = AssetManifest(tmp_path / "manifest.json")
+    manifest.record("asset.png", target.fingerprint(), 1.0, target.output)
+
+    assert not manifest.is_stale("asset.png", target, target.fingerprint())
+    assert manifest.is_stale("asset.png", target, "new inputs")
+
+
+def test_touched_output_is_still_ours(tmp_path):
+    target = _target(tmp_path)
+    manifest = AssetManifest(tmp_path / "manifest.json")
+    manifest.record("asset.png", target.fingerprint(), 1.0, target.output)
+    stat = target.output.stat()
+    os.utime(target.output, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert manifest.is_stale("asset.png", target, "new inputs")
+
+
+def test_replaced_output_is_adopted(tmp_path):
+    target = _target(tmp_path)
+    manifest = AssetManifest(tmp_path / "manifest.json")
+    manifest.record("asset.png", target.fingerprint(), 1.0, target.output)
+    target.output.write_bytes(b"drawn by hand")
+    os.chmod(target.output, 0o444)
+
+    assert not manifest.is_stale("asset.png", target, "new inputs")
+    assert not manifest.is_stale("asset.png", target, "new inputs")
+    assert target.output.read_bytes() == b"drawn by hand"
@@ -0,0 +1,89 @@
+"""Resumable downloads must never splice bytes from two different remote files"""
+
+import json
+import os
+import urllib.request
+
+from conftest import preview_url
+
+
+def _ids(fake):
+    return sorted(fake.sounds)
+
+
+def _body(url: str) -> bytes:
+    with urllib.request.urlopen(url) as response:
+        return response.read()
+
+
+def _leave_part(output, data: bytes, meta: dict) -> str:
+    part = output.parent / f".{output.name}.part"
+    part.write_bytes(data)
+    (output.parent / f".{output.name}.part.json").write_text(json.dumps(meta))
+    return str(part)
+
+
+def _etag(url: str) -> str:
+    with urllib.request.urlopen(url) as response:
+        return response.headers["ETag"]
+
+
+def test_resumes_part_of_the_same_file(fake, client, tmp_path):
+    url = preview_url(fake, _ids(fake)[0])
+    body = _body(url)
+    output = tmp_path / "click.mp3"
+    _leave_part(output, body[:1000], {"url": url, "etag": _etag(url), "total": len(body)})
+
+    result = client.download(url, str(output))
+
+    assert result.resumed_from == 1000
+    assert output.read_bytes() == body
+    assert sorted(os.listdir(tmp_path)) == ["click.mp3"]
+
+
+def test_part_from_a_different_url_is_discarded(fake, client, tmp_path):
+    old_url, new_url = preview_url(fake, _ids(fake)[0]), preview_url(fake, _ids(fake)[1])
+    old_body = _body(old_url)
+    output = tmp_path / "click.mp3"
+    _leave_part(output, old_body[:1000], {"url": old_url, "etag": _etag(old_url), "total": len(old_body)})
+
+    result = client.download(new_url, str(output))
+
+    assert result.resumed_from == 0
+    assert output.read_bytes() == _body(new_url)
+
+
+def test_part_of_a_changed_remote_file_is_discarded(fake, client, tmp_path):
+    url = preview_url(fake, _ids(fake)[0])
+    old_body = _body(url)
+    output = tmp_path / "click.mp3"
+    _leave_part(output, old_body[:1000], {"url": url, "etag": _etag(url), "total": len(old_body)})
+    fake.sounds[_ids(fake)[0]]["duration"] += 1.0   # new content, new ETag
+
+    client.download(url, str(output))
+
+    assert output.read_bytes() == _body(url) != old_body
+
+
+def test_complete_part_of_a_changed_remote_file_is_not_reported_complete(fake, client, tmp_path):
+    url = preview_url(fake, _ids(fake)[0])
+    old_body = _body(url)
+    output = tmp_path / "click.mp3"
+    _leave_part(output, old_body, {"url": url, "etag": _etag(url), "total": len(old_body)})
+    fake.sounds[_ids(fake)[0]]["duration"] /= 2
+
+    client.download(url, str(output))
+
+    assert output.read_bytes() == _body(url) != old_body
+
+
+def test_part_without_a_validator_is_not_resumed(fake, client, tmp_path):
+    url = preview_url(fake, _ids(fake)[0])
+    body = _body(url)
+    output = tmp_path / "click.mp3"
+    _leave_part(output, b"x" * 1000, {"url": url, "total": len(body)})
+
+    result = client.download(url, str(output))
+
+    assert result.resumed_from == 0
+    assert output.read_bytes() == body
@@ -0,0 +1,34 @@
+"""The image cache generates each key once and never evicts a blob that is being read"""
+
+from image_cache import ImageCache
+
+
+def _cache(tmp_path, max_bytes=1024):
+    return ImageCache(tmp_path / "images", max_bytes=max_bytes)
+
+
+def test_generates_once_per_key(tmp_path):
+    cache = _cache(tmp_path)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return b"png"
+
+    assert cache.get_or_generate("model", "a  logo", {}, generate) == (b"png", False)
+    assert cache.get_or_generate("model", "a logo", {}, generate) == (b"png", True)
+    assert len(calls) == 1
+
+
+def test_eviction_skips_a_key_being_read(tmp_path):
+    cache = _cache(tmp_path, max_bytes=150)
+    first = cache.put("model", "first", {}, b"1" * 100)
+
+    with cache._key_lock(first.key):
+        cache.put("model", "second", {}, b"2" * 100)
+        assert first.path.exists()
+        assert cache.lookup(first.key) is not None
+
+    cache.put("model", "third", {}, b"3" * 100)
+    assert not first.path.exists()
+    assert cache.lookup(first.key) is None
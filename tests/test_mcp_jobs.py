@@ -0,0 +1,38 @@
+"""Background jobs report cancellation only when it actually skipped work"""
+
+import threading
+
+from mcp_jobs import JobManager
+
+
+def test_cancel_skips_items_not_yet_started():
+    jobs = JobManager(max_workers=1)
+    release = threading.Event()
+    job = jobs.submit("test", {"first": None, "second": None}, lambda name, arg: release.wait(5))
+    jobs.cancel(job.job_id)
+    release.set()
+
+    assert job.done.wait(5)
+    assert job.items["second"].status == "cancelled"
+    assert job.status == "cancelled"
+
+
+def test_late_cancel_still_completes():
+    jobs = JobManager(max_workers=2)
+    started = threading.Semaphore(0)
+    release = threading.Event()
+
+    def run(name, arg):
+        started.release()
+        release.wait(5)
+        return name
+
+    job = jobs.submit("test", {"first": None, "second": None}, run)
+    started.acquire(timeout=5)
+    started.acquire(timeout=5)
+    jobs.cancel(job.job_id)
+    assert job.status == "cancelling"
+    release.set()
+
+    assert job.done.wait(5)
+    assert job.status == "completed"
@@ -0,0 +1,43 @@
+"""Syncing the lockfile leaves exactly one file per locked sound"""
+
+from sound_manifest import ManifestEntry, SoundManifest, sync
+
+
+def _query(fake):
+    """A query that resolves: the name of a sound matching the resolve filter"""
+    return next(sound["name"] for sound in fake.sounds.values()
+                if "publicdomain/zero" in sound["license"] and 0.1 <= sound["duration"] <= 3.0)
+
+
+def _manifest(fake, tmp_path):
+    manifest = SoundManifest(tmp_path / "sounds.lock.json", "raw",
+                             {"click": ManifestEntry(query=_query(fake))})
+    manifest.save()
+    return manifest
+
+
+def test_sync_pins_and_fetches(fake, client, tmp_path):
+    manifest = _manifest(fake, tmp_path)
+
+    results = sync(client, None, manifest)
+
+    assert [item["name"] for item in results["fetched"]] == ["click"]
+    entry = SoundManifest.load(manifest.path).sounds["click"]
+    assert entry.sound_id is not None and entry.sha256
+    assert manifest.file_path("click").exists()
+
+
+def test_repin_to_another_format_removes_the_old_file(fake, client, tmp_path):
+    manifest = _manifest(fake, tmp_path)
+    sync(client, None, manifest)
+    mp3 = manifest.file_path("click")
+    assert mp3.suffix == ".mp3" and mp3.exists()
+
+    manifest.sounds["click"].variant = "original"
+    results = sync(client, None, manifest, update=["click"])
+
+    assert not results["failed"]
+    wav = manifest.file_path("click")
+    assert wav.suffix == ".wav" and wav.exists()
+    assert not mp3.exists()
+    assert sorted(path.name for path in (tmp_path / "raw").iterdir()) == ["click.wav"]
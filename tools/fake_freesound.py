@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Fake Freesound API
+Local stand-in for freesound.org/apiv2, for benchmarking and regression
+testing the MCP server and scripts without network access or API quota
+
+Features:
+- search/text/ (query terms, id/duration/license filters, sort, paging,
+  fields), sounds/{id}/, sounds/{id}/download/, me/ and preview files
+- Fixtures: a generated catalog, a JSON file of recorded sound metadata,
+  or the local offline sound index (sound_index.py)
+- Generated audio bodies (WAV originals, MP3 previews) whose sizes match
+  the metadata, with Range/If-Range support for resumes and header probes
+- ETag/If-None-Match and gzip, like the real API
+- Configurable latency, jitter, bandwidth and injected 429 responses
+
+Usage:
+    python tools/fake_freesound.py --port 8765 --latency 0.08 --jitter 0.03
+    FREESOUND_BASE_URL=http://127.0.0.1:8765/apiv2 python mcp_server_freesound.py
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FAKE_API_KEY = "fake-freesound-key"
+WRITE_CHUNK = 16 * 1024
+MP3_FRAME = b"\xff\xfb\x90\x00"     # MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo
+MP3_FRAME_BYTES = 417
+MP3_FRAME_SAMPLES = 1152
+
+LICENSES = {
+    "Creative Commons 0": "http://creativecommons.org/publicdomain/zero/1.0/",
+    "Attribution": "http://creativecommons.org/licenses/by/4.0/",
+    "Attribution Noncommercial": "http://creativecommons.org/licenses/by-nc/4.0/",
+}
+
+# license:"..." filter values -> fragment of the license URL they match
+LICENSE_FILTERS = {
+    "Creative Commons 0": "/publicdomain/zero/",
+    "Attribution": "/licenses/by/",
+    "Attribution Noncommercial": "/licenses/by-nc/",
+}
+
+# Vocabulary for the generated catalog
+WORDS = ["button", "click", "mechanical", "computer", "beep", "terminal", "keyboard",
+         "key", "press", "startup", "boot", "interface", "swoosh", "transition",
+         "success", "confirmation", "error", "warning", "radio", "static", "noise",
+         "power", "chime", "achievement", "level", "up", "retro", "switch", "panel",
+         "slide", "hum", "tuning", "geiger", "counter", "typewriter", "relay"]
+
+@dataclass
+class FakeConfig:
+    latency: float = 0.0            # seconds added before every response
+    jitter: float = 0.0             # +/- seconds of uniform noise on the latency
+    bandwidth: int = 0              # body bytes per second per response, 0 = unlimited
+    rate_limit_probability: float = 0.0   # share of metadata requests answered with 429
+    retry_after: int = 1            # Retry-After seconds on injected 429s
+    seed: int = 0
+
+def generate_catalog(count: int = 500, seed: int = 0) -> List[Dict[str, Any]]:
+    """Deterministic sound metadata resembling Freesound search results"""
+    rng = random.Random(seed)
+    sounds = []
+    for index in range(count):
+        words = rng.sample(WORDS, 4)
+        sounds.append({
+            "id": 100000 + index,
+            "name": " ".join(words[:2]).title() + f" {index}",
+            "tags": words + ["fx"],
+            "description": f"{words[0]} {words[1]} recorded for {words[2]} {words[3]}",
+            "license": rng.choice(list(LICENSES.values())),
+            "username": f"recordist{index % 37}",
+            "duration": round(rng.uniform(0.1, 6.0), 3),
+            "samplerate": rng.choice([22050, 44100, 48000]),
+            "channels": rng.choice([1, 2]),
+            "bitdepth": 16,
+            "avg_rating": round(rng.uniform(0, 5), 2),
+            "num_downloads": rng.randint(0, 50000),
+            "created": f"20{10 + index % 15:02d}-01-01T00:00:00",
+        })
+    return [_normalized(sound) for sound in sounds]
+
+def load_fixtures(path: str) -> List[Dict[str, Any]]:
+    """Recorded metadata: a JSON list of sounds or a search response"""
+    data = json.loads(Path(path).read_text())
+    sounds = data.get("results", []) if isinstance(data, dict) else data
+    return [_normalized(sound) for sound in sounds if isinstance(sound, dict) and "id" in sound]
+
+def load_index_fixtures(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Every sound recorded in the local offline sound index"""
+    from sound_index import SoundIndex
+    index = SoundIndex(Path(path) if path else None)
+    try:
+        return [_normalized(sound) for sound in index.sounds()]
+    finally:
+        index.close()
+
+def _normalized(sound: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in the fields the fake needs and make sizes match generated bodies
+
+    Originals are always served as 16-bit WAV, so type, bit depth and file
+    size are rewritten to describe that file.
+    """
+    sound = dict(sound)
+    sound["id"] = int(sound["id"])
+    sound.setdefault("name", f"Sound {sound['id']}")
+    sound.setdefault("tags", [])
+    sound.setdefault("description", "")
+    sound.setdefault("license", LICENSES["Creative Commons 0"])
+    sound.setdefault("username", "recordist")
+    sound["duration"] = float(sound.get("duration") or 1.0)
+    sound["samplerate"] = int(sound.get("samplerate") or 44100)
+    sound["channels"] = int(sound.get("channels") or 2)
+    sound.setdefault("avg_rating", 0.0)
+    sound.setdefault("num_downloads", 0)
+    sound.setdefault("num_ratings", 0)
+    sound.setdefault("created", "2020-01-01T00:00:00")
+    sound["type"] = "wav"
+    sound["bitdepth"] = 16
+    sound["filesize"] = len(_wav_header(sound)) + _wav_data_bytes(sound)
+    sound["bitrate"] = round(sound["samplerate"] * sound["channels"] * 16 / 1000)
+    # URLs are filled in per request from the Host header
+    for key in ("url", "download", "previews", "images", "analysis"):
+        sound.pop(key, None)
+    return sound
+
+def _wav_data_bytes(sound: Dict[str, Any]) -> int:
+    frames = int(sound["duration"] * sound["samplerate"])
+    return frames * sound["channels"] * 2
+
+def _wav_header(sound: Dict[str, Any]) -> bytes:
+    rate, channels = sound["samplerate"], sound["channels"]
+    data_bytes = _wav_data_bytes(sound)
+    return (b"RIFF" + (36 + data_bytes).to_bytes(4, "little") + b"WAVE"
+            + b"fmt " + (16).to_bytes(4, "little") + (1).to_bytes(2, "little")
+            + channels.to_bytes(2, "little") + rate.to_bytes(4, "little")
+            + (rate * channels * 2).to_bytes(4, "little") + (channels * 2).to_bytes(2, "little")
+            + (16).to_bytes(2, "little") + b"data" + data_bytes.to_bytes(4, "little"))
+
+def _mp3_preview(sound: Dict[str, Any]) -> bytes:
+    frames = max(1, int(sound["duration"] * 44100 / MP3_FRAME_SAMPLES))
+    return (MP3_FRAME + bytes(MP3_FRAME_BYTES - len(MP3_FRAME))) * frames
+
+class FakeFreesoundServer:
+    """Threaded fake API server; binds on creation, start() serves on a thread"""
+
+    def __init__(self, sounds: List[Dict[str, Any]], config: Optional[FakeConfig] = None,
+                 host: str = "127.0.0.1", port: int = 0, api_key: str = FAKE_API_KEY):
+        self.sounds = {sound["id"]: sound for sound in sounds}
+        self.config = config or FakeConfig()
+        self.api_key = api_key
+        self.counters: Dict[str, int] = {}
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"fake": self})
+        self._httpd = ThreadingHTTPServer((host, port), handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/apiv2"
+
+    def start(self) -> "FakeFreesoundServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name="fake-freesound", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def delay(self) -> float:
+        with self._lock:
+            noise = self._rng.uniform(-self.config.jitter, self.config.jitter)
+        return max(0.0, self.config.latency + noise)
+
+    def throttle(self) -> bool:
+        if self.config.rate_limit_probability <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.config.rate_limit_probability
+
+    def search(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Sounds matching search/text/ query and filter, in sort order"""
+        sounds = list(self.sounds.values())
+        filter_text = params.get("filter", "")
+        ids = re.search(r"id:\(([^)]*)\)", filter_text)
+        if ids:
+            wanted = {int(value) for value in re.findall(r"\d+", ids.group(1))}
+            sounds = [sound for sound in sounds if sound["id"] in wanted]
+        duration = re.search(r"duration:\[([\d.*]+) TO ([\d.*]+)\]", filter_text)
+        if duration:
+            low, high = (float(value) if value != "*" else None for value in duration.groups())
+            sounds = [sound for sound in sounds
+                      if (low is None or sound["duration"] >= low)
+                      and (high is None or sound["duration"] <= high)]
+        license_name = re.search(r'license:"([^"]+)"', filter_text)
+        if license_name:
+            fragment = LICENSE_FILTERS.get(license_name.group(1))
+            sounds = [sound for sound in sounds
+                      if fragment in sound["license"] or sound["license"] == license_name.group(1)]
+
+        terms = re.findall(r"\w+", params.get("query", "").lower())
+        scored = []
+        for sound in sounds:
+            text = " ".join([sound["name"], " ".join(sound["tags"]), sound["description"]]).lower()
+            score = sum(1 for term in terms if term in text)
+            if score or not terms:
+                scored.append((score, sound))
+
+        sort = params.get("sort", "score")
+        keys = {
+            "rating_desc": lambda entry: (-entry[1]["avg_rating"], entry[1]["id"]),
+            "downloads_desc": lambda entry: (-entry[1]["num_downloads"], entry[1]["id"]),
+            "duration_asc": lambda entry: (entry[1]["duration"], entry[1]["id"]),
+            "duration_desc": lambda entry: (-entry[1]["duration"], entry[1]["id"]),
+            "created_desc": lambda entry: (entry[1]["created"], entry[1]["id"]),
+        }
+        scored.sort(key=keys.get(sort, lambda entry: (-entry[0], entry[1]["id"])),
+                    reverse=sort == "created_desc")
+        return [sound for _, sound in scored]
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake: FakeFreesoundServer
+
+    def setup(self) -> None:
+        super().setup()
+        # Headers and body go out as separate writes; without this, Nagle plus
+        # delayed ACKs add ~40 ms to every response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        parsed = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(parsed.query))
+        path = parsed.path
+        self.fake.count("requests")
+        time.sleep(self.fake.delay())
+
+        preview = re.fullmatch(r"/previews/(\d+)-hq\.mp3", path)
+        if preview:
+            return self._file(int(preview.group(1)), preview=True)
+        if not path.startswith("/apiv2/"):
+            return self._json(404, {"detail": "Not found."})
+
+        token = params.get("token") or self.headers.get("Authorization", "").removeprefix("Token ")
+        if token != self.fake.api_key:
+            return self._json(401, {"detail": "Invalid token."})
+        endpoint = path[len("/apiv2/"):]
+        # 429s are injected on metadata calls; downloads are paced by bandwidth
+        if not endpoint.endswith("/download/") and self.fake.throttle():
+            self.fake.count("throttled")
+            return self._json(429, {"detail": "Request was throttled."},
+                              {"Retry-After": str(self.fake.config.retry_after)})
+        if endpoint == "me/":
+            return self._json(200, {"username": "fake-user", "email": "fake-user@example.invalid",
+                                    "url": f"{self._root()}/people/fake-user/", "num_sounds": 0})
+        if endpoint == "search/text/":
+            return self._search(params)
+        download = re.fullmatch(r"sounds/(\d+)/download/", endpoint)
+        if download:
+            return self._file(int(download.group(1)), preview=False)
+        details = re.fullmatch(r"sounds/(\d+)/", endpoint)
+        if details:
+            sound = self.fake.sounds.get(int(details.group(1)))
+            if sound is None:
+                return self._json(404, {"detail": "Not found."})
+            return self._json(200, self._with_urls(sound, params.get("fields")))
+        return self._json(404, {"detail": "Not found."})
+
+    def _root(self) -> str:
+        return f"http://{self.headers.get('Host', '%s:%d' % self.server.server_address[:2])}"
+
+    def _with_urls(self, sound: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+        root = self._root()
+        sound = dict(sound)
+        sound["url"] = f"{root}/people/{sound['username']}/sounds/{sound['id']}/"
+        sound["download"] = f"{root}/apiv2/sounds/{sound['id']}/download/"
+        sound["previews"] = {
+            "preview-hq-mp3": f"{root}/previews/{sound['id']}-hq.mp3",
+            "preview-lq-mp3": f"{root}/previews/{sound['id']}-hq.mp3",
+        }
+        # Listed like the real API, but not served
+        sound["images"] = {name: f"{root}/displays/{sound['id']}_{name}.png"
+                           for name in ("waveform_l", "waveform_m", "spectral_l", "spectral_m")}
+        if fields:
+            wanted = fields.split(",")
+            sound = {key: sound[key] for key in wanted if key in sound}
+        return sound
+
+    def _search(self, params: Dict[str, str]) -> None:
+        results = self.fake.search(params)
+        page = max(1, int(params.get("page", 1)))
+        page_size = max(1, min(int(params.get("page_size", 15)), 150))
+        start = (page - 1) * page_size
+        if start and start >= len(results):
+            return self._json(404, {"detail": "Invalid page."})
+
+        def page_url(number: int) -> str:
+            query = urllib.parse.urlencode({**params, "page": number})
+            return f"{self._root()}/apiv2/search/text/?{query}"
+
+        fields = params.get("fields")
+        self._json(200, {
+            "count": len(results),
+            "next": page_url(page + 1) if start + page_size < len(results) else None,
+            "previous": page_url(page - 1) if page > 1 else None,
+            "results": [self._with_urls(sound, fields or "id,name,tags,license,username")
+                        for sound in results[start:start + page_size]],
+        })
+
+    def _json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data).encode()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", {"ETag": etag})
+            return
+        headers = dict(headers or {})
+        headers["Content-Type"] = "application/json"
+        if status == 200:
+            headers["ETag"] = etag
+        if "gzip" in self.headers.get("Accept-Encoding", "") and len(body) > 1024:
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        self._send(status, body, headers)
+
+    def _file(self, sound_id: int, preview: bool) -> None:
+        sound = self.fake.sounds.get(sound_id)
+        if sound is None:
+            return self._json(404, {"detail": "Not found."})
+        self.fake.count("downloads" if not preview else "previews")
+        if preview:
+            body = _mp3_preview(sound)
+            content_type = "audio/mpeg"
+        else:
+            body = _wav_header(sound) + bytes(_wav_data_bytes(sound))
+            content_type = "audio/wav"
+
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if_range = self.headers.get("If-Range")
+        # A stale If-Range validator gets the whole (changed) file
+        byte_range = self._range(len(body)) if if_range in (None, etag) else None
+        if byte_range == "invalid":
+            return self._send(416, b"", {"Content-Range": f"bytes */{len(body)}", "ETag": etag})
+        headers = {"Content-Type": content_type, "Accept-Ranges": "bytes", "ETag": etag}
+        if byte_range is None:
+            return self._send(200, body, headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+        self._send(206, body[start:end + 1], headers)
+
+    def _range(self, size: int):
+        """(start, end) inclusive, None for the whole body, or "invalid" """
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if not match or match.groups() == ("", ""):
+            return None
+        first, last = match.groups()
+        if not first:
+            return max(0, size - int(last)), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        return (start, end) if start < size and start <= end else "invalid"
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        bandwidth = self.fake.config.bandwidth
+        try:
+            for offset in range(0, len(body), WRITE_CHUNK):
+                chunk = body[offset:offset + WRITE_CHUNK]
+                if bandwidth:
+                    time.sleep(len(chunk) / bandwidth)
+                self.wfile.write(chunk)
+                self.fake.count("bytes_sent", len(chunk))
+        except (BrokenPipeError, ConnectionResetError):
+            # Probes close the connection once they have the header
+            self.close_connection = True
+
+def add_fake_arguments(parser: argparse.ArgumentParser) -> None:
+    """Fixture and network-shaping options, shared with the load harness"""
+    parser.add_argument("--sounds", type=int, default=500, help="Size of the generated catalog")
+    parser.add_argument("--fixtures", help="JSON file of recorded sound metadata")
+    parser.add_argument("--from-index", action="store_true",
+                        help="Use every sound in the local offline sound index")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of latency noise")
+    parser.add_argument("--bandwidth", type=float, default=0.0,
+                        help="KB/s per response body, 0 = unlimited")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Share of metadata requests answered with 429 (0-1)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429s")
+    parser.add_argument("--seed", type=int, default=0)
+
+def fake_from_args(args: argparse.Namespace, host: str = "127.0.0.1",
+                   port: int = 0) -> FakeFreesoundServer:
+    if args.fixtures:
+        sounds = load_fixtures(args.fixtures)
+    elif args.from_index:
+        sounds = load_index_fixtures()
+    else:
+        sounds = generate_catalog(args.sounds, args.seed)
+    config = FakeConfig(latency=args.latency, jitter=args.jitter,
+                        bandwidth=int(args.bandwidth * 1024),
+                        rate_limit_probability=args.rate_limit,
+                        retry_after=args.retry_after, seed=args.seed)
+    return FakeFreesoundServer(sounds, config, host, port)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve a fake Freesound API locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    fake = fake_from_args(args, args.host, args.port)
+    print(f"Fake Freesound API with {len(fake.sounds)} sounds at {fake.base_url}")
+    print(f"API key: {fake.api_key}")
+    print(f"Run the MCP server with FREESOUND_BASE_URL={fake.base_url} "
+          f"FREESOUND_API_KEY={fake.api_key}")
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(fake.stats(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
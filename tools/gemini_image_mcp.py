@@ -2,27 +2,51 @@
 """
 Gemini Image Generator MCP Tool
 Generates images using Google's Gemini 2.0 Flash Image model
+
+Generated images are cached by model and prompt (see image_cache.py), so
+re-running with unchanged prompts makes no API calls; --refresh
+regenerates them.
 """
 
+import argparse
 import os
 import sys
 from pathlib import Path
-import google.generativeai as genai
-from PIL import Image
 from io import BytesIO
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from image_cache import generate_cached, open_image_cache
 
 # Configuration
 OUTPUT_DIR = Path(__file__).parent.parent / "docs" / "images"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-# Get API key from environment
+# Get API key from environment (checked in main)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    print("Error: GEMINI_API_KEY environment variable not set")
-    sys.exit(1)
 
-# Configure Gemini
-genai.configure(api_key=GEMINI_API_KEY)
+# The Gemini SDK is imported and configured by the first request that needs
+# it: importing it is slow, and a run served from the image cache never does
+_genai = None
+
+def get_genai():
+    global _genai
+    if _genai is None:
+        if not GEMINI_API_KEY:
+            raise RuntimeError("GEMINI_API_KEY environment variable not set")
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        _genai = genai
+    return _genai
+
+MODEL = "gemini-2.0-flash-exp"
+FALLBACK_MODEL = "imagen-3.0-generate-001"
+INSTRUCTION = "Generate this as a high-quality image. Do not include any text in the output, only respond with the image data."
+# Everything besides the prompt that shapes the result, part of the cache key
+GENERATION_PARAMS = {
+    "instruction": INSTRUCTION,
+    "fallback": {"model": FALLBACK_MODEL, "aspect_ratio": "1:1",
+                 "safety_filter_level": "block_some", "person_generation": "allow_adult"},
+}
 
 # Image prompts for Pip-Droid repository
 PROMPTS = {
@@ -69,57 +93,67 @@ PROMPTS = {
 }
 
 
-def generate_image(name: str, prompt: str) -> bool:
-    """Generate a single image using Gemini 2.0 Flash"""
+def request_image(prompt: str, output_path: Path) -> Optional[bytes]:
+    """Image bytes from Gemini 2.0 Flash, falling back to Imagen; None if neither produced one"""
+    # Use Gemini 2.0 Flash for image generation
+    genai = get_genai()
+    model = genai.GenerativeModel(MODEL)
+    
+    response = model.generate_content([
+        prompt,
+        {"text": INSTRUCTION}
+    ])
+    
+    # Check if we got image data
+    if hasattr(response, 'parts'):
+        for part in response.parts:
+            if hasattr(part, 'inline_data') and part.inline_data:
+                return part.inline_data.data
+    
+    print(f"   ⚠️  No image data received - trying alternative method")
+    
+    # Alternative: Try using imagen
+    try:
+        fallback = GENERATION_PARAMS["fallback"]
+        imagen_model = genai.ImageGenerationModel(FALLBACK_MODEL)
+        result = imagen_model.generate_images(
+            prompt=prompt,
+            number_of_images=1,
+            safety_filter_level=fallback["safety_filter_level"],
+            person_generation=fallback["person_generation"],
+            aspect_ratio=fallback["aspect_ratio"]
+        )
+        
+        if result.images:
+            result.images[0].save(output_path)
+            return output_path.read_bytes()
+            
+    except Exception as e_alt:
+        print(f"   ⚠️  Alternative method also failed: {e_alt}")
+    
+    return None
+
+
+def generate_image(name: str, prompt: str, image_cache=None, refresh: bool = False) -> bool:
+    """Generate (or reuse from the cache) a single image using Gemini 2.0 Flash"""
     print(f"\n🎨 Generating {name}...")
     print(f"   Prompt: {prompt[:80]}...")
     
     try:
-        # Use Gemini 2.0 Flash for image generation
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        response = model.generate_content([
-            prompt,
-            {"text": "Generate this as a high-quality image. Do not include any text in the output, only respond with the image data."}
-        ])
+        output_path = OUTPUT_DIR / f"{name}.png"
+        image_data, cached = generate_cached(image_cache, MODEL, prompt, GENERATION_PARAMS,
+                                             lambda: request_image(prompt, output_path),
+                                             source="gemini_image_mcp", refresh=refresh)
+        if image_data is None:
+            return False
         
-        # Check if we got image data
-        if hasattr(response, 'parts'):
-            for part in response.parts:
-                if hasattr(part, 'inline_data') and part.inline_data:
-                    # Save the image
-                    image_data = part.inline_data.data
-                    image = Image.open(BytesIO(image_data))
-                    
-                    output_path = OUTPUT_DIR / f"{name}.png"
-                    image.save(output_path)
-                    
-                    print(f"   ✅ Saved to: {output_path}")
-                    return True
+        # Save the image
+        from PIL import Image
+        image = Image.open(BytesIO(image_data))
+        image.save(output_path)
         
-        print(f"   ⚠️  No image data received - trying alternative method")
-        
-        # Alternative: Try using imagen
-        try:
-            imagen_model = genai.ImageGenerationModel("imagen-3.0-generate-001")
-            result = imagen_model.generate_images(
-                prompt=prompt,
-                number_of_images=1,
-                safety_filter_level="block_some",
-                person_generation="allow_adult",
-                aspect_ratio="1:1"
-            )
-            
-            if result.images:
-                output_path = OUTPUT_DIR / f"{name}.png"
-                result.images[0].save(output_path)
-                print(f"   ✅ Saved to: {output_path}")
-                return True
-                
-        except Exception as e_alt:
-            print(f"   ⚠️  Alternative method also failed: {e_alt}")
-        
-        return False
+        print(f"   ✅ Saved to: {output_path}{' (cached)' if cached else ''}")
+        return True
         
     except Exception as e:
         print(f"   ❌ Error: {e}")
@@ -128,14 +162,25 @@ def generate_image(name: str, prompt: str) -> bool:
 
 def main():
     """Generate all repository images"""
+    parser = argparse.ArgumentParser(description="Generate the repository images with Gemini")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Regenerate images even when a cached one exists")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("Pip-Droid Repository Image Generator (MCP)")
     print("Using Google Gemini AI")
     print("=" * 70)
     
+    if not GEMINI_API_KEY:
+        print("\n⚠️  GEMINI_API_KEY environment variable not set; only cached images can be produced")
+    
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    image_cache = open_image_cache()
+    
     results = {}
     for name, prompt in PROMPTS.items():
-        success = generate_image(name, prompt)
+        success = generate_image(name, prompt, image_cache, args.refresh)
         results[name] = success
     
     # Summary
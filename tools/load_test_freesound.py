@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Freesound MCP Load Test
+Drives the Freesound MCP server's tools concurrently against the fake
+Freesound API (tools/fake_freesound.py) and reports throughput and
+latency percentiles; runs fully offline
+
+Features:
+- Calls go through FastMCP's call_tool, so argument validation and result
+  serialization are part of the measurement
+- Weighted tool mix, fixed request count and concurrency, seeded plan
+- Network shaping and 429 injection via the fake server's options
+- Throw-away cache, library and index directories; nothing touches ~/.cache
+- Per-tool p50/p95/p99, error counts, response sizes, fake server
+  traffic and the server's own upstream metrics
+- Response encoding and field projection for the search and metadata
+  tools, to compare payload sizes and serialization cost
+
+Usage:
+    python tools/load_test_freesound.py --requests 500 --concurrency 32
+    python tools/load_test_freesound.py --latency 0.12 --jitter 0.05 --rate-limit 0.05
+    python tools/load_test_freesound.py --mix search_sounds=1 --no-cache --json
+    python tools/load_test_freesound.py --encoding ndjson --fields id,name,duration
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from fake_freesound import WORDS, add_fake_arguments, fake_from_args
+
+DEFAULT_MIX = "search_sounds=4,get_sound_details=3,get_sounds_batch=1,probe_sound=1,download_sound=1"
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+def build_plan(mix: Dict[str, int], count: int, sound_ids: List[int], output_dir: str,
+               seed: int, encoding: str = None,
+               fields: List[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Tool calls to make, in order; the same seed gives the same plan"""
+    rng = random.Random(seed)
+    tools, weights = zip(*mix.items())
+    plan = []
+    for index in range(count):
+        tool = rng.choices(tools, weights)[0]
+        if tool == "search_sounds":
+            args = {"query": " ".join(rng.sample(WORDS, 2)), "filter_license": "all",
+                    "max_results": rng.choice([5, 10, 15]), "max_duration": 6.0}
+        elif tool == "get_sound_details":
+            args = {"sound_id": rng.choice(sound_ids)}
+        elif tool == "get_sounds_batch":
+            args = {"sound_ids": rng.sample(sound_ids, min(len(sound_ids), 25))}
+        elif tool == "probe_sound":
+            args = {"sound_id": rng.choice(sound_ids), "use_preview": rng.random() < 0.5}
+        elif tool == "download_sound":
+            use_preview = rng.random() < 0.5
+            args = {"sound_id": rng.choice(sound_ids), "use_preview": use_preview,
+                    "output_path": os.path.join(output_dir, f"sound_{index}.{'mp3' if use_preview else 'wav'}")}
+        elif tool == "get_api_status":
+            args = {}
+        else:
+            raise SystemExit(f"Unsupported tool in --mix: {tool}")
+        if encoding and tool in ("search_sounds", "get_sound_details", "get_sounds_batch"):
+            args["encoding"] = encoding
+        if fields and tool in ("search_sounds", "get_sound_details"):
+            args["fields"] = fields
+        plan.append((tool, args))
+    return plan
+
+async def run_plan(server, plan: List[Tuple[str, Dict[str, Any]]],
+                   concurrency: int) -> Tuple[List[Tuple[str, float, bool, int]], float]:
+    """Return ([(tool, seconds, failed, response bytes)], wall seconds)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def call(tool: str, args: Dict[str, Any]) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            size = 0
+            try:
+                result = await server.mcp.call_tool(tool, args)
+                content = result[0] if isinstance(result, tuple) else result
+                failed = server._is_error_result(content[0].text)
+                size = len(content[0].text.encode())
+            except Exception:
+                failed = True
+            samples.append((tool, time.perf_counter() - start, failed, size))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(tool, args) for tool, args in plan))
+    return samples, time.perf_counter() - start
+
+def summarize(samples: List[Tuple[str, float, bool, int]], wall: float) -> Dict[str, Any]:
+    by_tool: Dict[str, List[Tuple[float, bool, int]]] = {}
+    for tool, seconds, failed, size in samples:
+        by_tool.setdefault(tool, []).append((seconds, failed, size))
+    by_tool["all"] = [sample[1:] for sample in samples]
+
+    report = {"wall_seconds": round(wall, 3),
+              "throughput_rps": round(len(samples) / wall, 1) if wall else 0.0,
+              "tools": {}}
+    for tool, entries in sorted(by_tool.items()):
+        latencies = sorted(seconds for seconds, _, _ in entries)
+        report["tools"][tool] = {
+            "calls": len(entries),
+            "errors": sum(1 for _, failed, _ in entries if failed),
+            "avg_bytes": round(sum(size for _, _, size in entries) / len(entries)),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+        }
+    return report
+
+def print_report(report: Dict[str, Any]) -> None:
+    print()
+    print(f"{'tool':<20} {'calls':>6} {'errors':>6} {'avg B':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9}")
+    for tool, row in report["tools"].items():
+        print(f"{tool:<20} {row['calls']:>6} {row['errors']:>6} {row['avg_bytes']:>8} {row['p50_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}")
+    print()
+    print(f"⏱️  {report['wall_seconds']}s wall, {report['throughput_rps']} calls/s")
+    fake = report["fake_server"]
+    print(f"🌐 Fake API: {fake.get('requests', 0)} requests, {fake.get('throttled', 0)} throttled, "
+          f"{fake.get('bytes_sent', 0) / 1024:.0f} KB sent")
+    client = report["client"]
+    print(f"🔁 Client: {client['single_flight']['coalesced']} coalesced, "
+          f"{client['throttled_responses']} 429s retried, "
+          f"{client['rate_limit_wait_seconds']}s rate-limit wait")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the Freesound MCP server offline")
+    parser.add_argument("--requests", type=int, default=200, help="Tool calls to make")
+    parser.add_argument("--concurrency", type=int, default=16, help="Tool calls in flight at once")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Tool weights, e.g. search_sounds=4,download_sound=1")
+    parser.add_argument("--warmup", type=int, default=0, help="Untimed calls before the run")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument("--respect-rate-limit", action="store_true",
+                        help="Keep the client's 60/min pacing (slow; off by default)")
+    parser.add_argument("--encoding", choices=["pretty", "compact", "ndjson"],
+                        help="Response encoding for search and metadata tools")
+    parser.add_argument("--fields", help="Comma-separated result fields for search_sounds "
+                                         "and get_sound_details")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--keep-files", action="store_true",
+                        help="Keep the scratch cache, library and downloads")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    fake = fake_from_args(args).start()
+    work_dir = tempfile.mkdtemp(prefix="freesound-load-")
+    # The server reads its configuration at import time
+    os.environ.update({
+        "FREESOUND_BASE_URL": fake.base_url,
+        "FREESOUND_API_KEY": fake.api_key,
+        "FREESOUND_CACHE_DIR": os.path.join(work_dir, "cache"),
+        "FREESOUND_LIBRARY_DIR": os.path.join(work_dir, "sounds"),
+        "FREESOUND_TOOL_WORKERS": str(max(args.concurrency, 4)),
+    })
+    if args.no_cache:
+        os.environ["FREESOUND_CACHE"] = "0"
+    logging.disable(logging.INFO)
+    import mcp_server_freesound as server
+    from freesound_client import RateLimiter
+    if not args.respect_rate_limit:
+        server.client.rate_limiter = RateLimiter(per_minute=0)
+
+    plan = build_plan(parse_mix(args.mix), args.warmup + args.requests, sorted(fake.sounds),
+                      os.path.join(work_dir, "out"), args.seed, args.encoding,
+                      args.fields.split(",") if args.fields else None)
+    if not args.json:
+        print(f"🔊 {len(fake.sounds)} fake sounds at {fake.base_url}")
+        print(f"🚀 {args.requests} calls, concurrency {args.concurrency}, mix {args.mix}")
+    if args.warmup:
+        asyncio.run(run_plan(server, plan[:args.warmup], args.concurrency))
+    samples, wall = asyncio.run(run_plan(server, plan[args.warmup:], args.concurrency))
+
+    report = summarize(samples, wall)
+    report["fake_server"] = fake.stats()
+    report["client"] = server.client.request_stats()
+    report["server_metrics"] = server.metrics.snapshot()["histograms"].get("upstream_seconds", [])
+    fake.stop()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    if args.keep_files:
+        print(f"📁 Scratch files: {work_dir}", file=sys.stderr)
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
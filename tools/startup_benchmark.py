@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures cold-start import time of the MCP servers and asset scripts and
+profiles where it goes
+
+Each target is imported in fresh interpreters (no shared module state),
+with HOME, XDG_CACHE_HOME and the working directory pointed at an empty
+scratch directory, so anything a module writes at import time shows up as
+a side effect.
+
+Features:
+- Import time and whole-process wall time, min and median over N runs
+- Import profile from python -X importtime: slowest modules by self and
+  cumulative time
+- Files created during import, and stderr output, per target
+
+Usage:
+    python tools/startup_benchmark.py
+    python tools/startup_benchmark.py --runs 10 --top 15 mcp_server_freesound
+    python tools/startup_benchmark.py --json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_TARGETS = [
+    "mcp_server_freesound",
+    "mcp_server_gemini",
+    "scripts/generate_images_simple",
+    "scripts/generate_repo_images",
+    "scripts/download_freesound_effects",
+    "tools/gemini_image_mcp",
+]
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+# Prints the import time in ms; the parent measures the whole process
+PROBE = ("import sys, time; start = time.perf_counter(); import {module}; "
+         "print('IMPORT_MS', (time.perf_counter() - start) * 1000)")
+
+def run_import(target: str, scratch: Path, profile: bool = False) -> Dict[str, Any]:
+    """Import target in a fresh interpreter; return timings and output"""
+    directory, _, module = target.rpartition("/")
+    env = dict(os.environ)
+    search_path = [str(REPO_ROOT / directory)] if directory else []
+    search_path += [str(REPO_ROOT), env.get("PYTHONPATH", "")]
+    env.update({
+        "PYTHONPATH": os.pathsep.join(path for path in search_path if path),
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "HOME": str(scratch),
+        "XDG_CACHE_HOME": str(scratch / ".cache"),
+    })
+    command = [sys.executable] + (["-X", "importtime"] if profile else []) + ["-c", PROBE.format(module=module)]
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=scratch, env=env, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    match = re.search(r"IMPORT_MS ([\d.]+)", completed.stdout)
+    profile_lines = [line for line in completed.stderr.splitlines() if line.startswith("import time:")]
+    other_stderr = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+    return {
+        "ok": completed.returncode == 0 and match is not None,
+        "import_ms": float(match.group(1)) if match else None,
+        "process_ms": wall_ms,
+        "stderr": other_stderr,
+        "importtime": profile_lines,
+    }
+
+def parse_importtime(lines: List[str]) -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, nesting depth) per imported module"""
+    modules = []
+    for line in lines:
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+def created_files(scratch: Path) -> List[str]:
+    return sorted(str(path.relative_to(scratch)) for path in scratch.rglob("*"))
+
+def benchmark(target: str, runs: int, top: int) -> Dict[str, Any]:
+    import_ms, process_ms = [], []
+    side_effects: List[str] = []
+    stderr: List[str] = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory(prefix="startup-") as scratch:
+            result = run_import(target, Path(scratch))
+            if not result["ok"]:
+                return {"target": target, "ok": False, "error": result["stderr"][-5:]}
+            import_ms.append(result["import_ms"])
+            process_ms.append(result["process_ms"])
+            side_effects = created_files(Path(scratch))
+            stderr = result["stderr"]
+
+    with tempfile.TemporaryDirectory(prefix="startup-") as scratch:
+        modules = parse_importtime(run_import(target, Path(scratch), profile=True)["importtime"])
+    return {
+        "target": target,
+        "ok": True,
+        "import_ms": {"min": round(min(import_ms), 1), "median": round(statistics.median(import_ms), 1)},
+        "process_ms": {"min": round(min(process_ms), 1), "median": round(statistics.median(process_ms), 1)},
+        "modules_imported": len(modules),
+        "slowest_self": [{"module": name, "ms": round(self_us / 1000, 1)}
+                         for name, self_us, _, _ in sorted(modules, key=lambda m: -m[1])[:top]],
+        "slowest_top_level": [{"module": name, "ms": round(cumulative_us / 1000, 1)}
+                              for name, _, cumulative_us, depth in sorted(modules, key=lambda m: -m[2])
+                              if depth <= 1][:top],
+        "files_created": side_effects,
+        "stderr": stderr,
+    }
+
+def print_result(result: Dict[str, Any]) -> None:
+    print(f"\n{'=' * 70}\n{result['target']}\n{'=' * 70}")
+    if not result["ok"]:
+        print("❌ Import failed:")
+        for line in result["error"]:
+            print(f"   {line}")
+        return
+    print(f"⏱️  import  {result['import_ms']['median']:>8.1f} ms median  ({result['import_ms']['min']:.1f} min)")
+    print(f"⏱️  process {result['process_ms']['median']:>8.1f} ms median  ({result['process_ms']['min']:.1f} min)")
+    print(f"📦 {result['modules_imported']} modules imported")
+    print("\nSlowest imports (cumulative, top level):")
+    for entry in result["slowest_top_level"]:
+        print(f"   {entry['ms']:>8.1f} ms  {entry['module']}")
+    print("\nSlowest modules (self time):")
+    for entry in result["slowest_self"]:
+        print(f"   {entry['ms']:>8.1f} ms  {entry['module']}")
+    if result["files_created"]:
+        print(f"\n⚠️  Files created at import: {', '.join(result['files_created'])}")
+    else:
+        print("\n✓ No files created at import")
+    for line in result["stderr"]:
+        print(f"   stderr: {line}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS,
+                        help="Modules, as repo-relative paths without .py")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=10, help="Modules listed per profile")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [benchmark(target, args.runs, args.top) for target in args.targets]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print_result(result)
+    return 0 if all(result["ok"] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())